@@ -0,0 +1,45 @@
+// Games changed since the last push to the AI service data store
+// (models record them on write, RecommendationController.syncAIData pushes them before the next AI call)
+const changedGameIds = new Set<number>()
+const deletedGameIds = new Set<number>()
+
+export interface PendingGameChanges {
+  changed: number[]
+  deleted: number[]
+}
+
+export function markGameChanged(gameId: number): void {
+  deletedGameIds.delete(gameId)
+  changedGameIds.add(gameId)
+}
+
+export function markGameDeleted(gameId: number): void {
+  changedGameIds.delete(gameId)
+  deletedGameIds.add(gameId)
+}
+
+export function hasGameChanges(): boolean {
+  return changedGameIds.size > 0 || deletedGameIds.size > 0
+}
+
+/**
+ * Take (and clear) the pending game changes
+ */
+export function takeGameChanges(): PendingGameChanges {
+  const changes = { changed: [...changedGameIds], deleted: [...deletedGameIds] }
+  changedGameIds.clear()
+  deletedGameIds.clear()
+  return changes
+}
+
+/**
+ * Put back changes whose push failed (newer changes to the same games win)
+ */
+export function restoreGameChanges(changes: PendingGameChanges): void {
+  for (const gameId of changes.changed) {
+    if (!deletedGameIds.has(gameId)) changedGameIds.add(gameId)
+  }
+  for (const gameId of changes.deleted) {
+    if (!changedGameIds.has(gameId)) deletedGameIds.add(gameId)
+  }
+}
@@ -2,14 +2,157 @@ import { Request, Response } from 'express'
 import axios from 'axios'
 import { pool } from '../db'
 import { GameModel } from '../models'
+import { hasGameChanges, restoreGameChanges, takeGameChanges } from '../aiSync'
 
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://localhost:5000'
+// Full catalog + users push interval (between pushes only the requesting user is synced)
+const AI_FULL_SYNC_INTERVAL_MS = parseInt(process.env.AI_FULL_SYNC_INTERVAL_MS || '300000')
+// AI service errors meaning its data store is behind ours (full resync + one retry)
+const AI_RESYNC_ERRORS = ['DATA_VERSION_MISMATCH', 'DATA_NOT_SYNCED']
+// Game fields the frontend renders (AI service projects its response to these)
+const AI_RECOMMENDATION_FIELDS = 'id,name,price,image,description,rating,genre,platform,publisher,score'
+
+export interface AIDataVersion {
+  epoch: string
+  version: number
+  games: number
+  users: number
+}
 
 export class RecommendationController {
+  // Delta-sync state of the AI service data store (epoch changes when the AI service restarts)
+  private static aiDataEpoch: string | null = null
+  private static lastFullSyncAt = 0
+  private static fullSync: Promise<AIDataVersion> | null = null
+
+  /**
+   * Make sure the AI service data store holds our catalog and users
+   * - Full push (replace) when the AI service restarted, is empty, or the last full push is older than AI_FULL_SYNC_INTERVAL_MS
+   * - Otherwise games created / updated / deleted since the last push are upserted / deleted, and the
+   *   requesting user's record is upserted (no version change on the AI side when unchanged)
+   * Returns the data version to send with /api/recommend and /api/similar-games
+   */
+  static async syncAIData(userId?: number): Promise<AIDataVersion> {
+    let { data: info } = await axios.get(`${AI_SERVICE_URL}/api/data/version`, { timeout: 5000 })
+
+    const stale = Date.now() - RecommendationController.lastFullSyncAt > AI_FULL_SYNC_INTERVAL_MS
+    if (info.epoch !== RecommendationController.aiDataEpoch || info.games === 0 || stale) {
+      // Concurrent requests share one full push
+      if (!RecommendationController.fullSync) {
+        RecommendationController.fullSync = RecommendationController.pushAllData()
+          .finally(() => { RecommendationController.fullSync = null })
+      }
+      return RecommendationController.fullSync
+    }
+
+    if (hasGameChanges()) {
+      info = await RecommendationController.pushGameChanges() || info
+    }
+
+    if (!userId) {
+      return info
+    }
+
+    const user = await RecommendationController.prepareUser(userId)
+    if (!user) {
+      return info
+    }
+
+    const { data: synced } = await axios.post(`${AI_SERVICE_URL}/api/data/users`, { users: [user] }, {
+      timeout: 10000
+    })
+    return synced
+  }
+
+  /**
+   * Call the AI service with the synced data version
+   * When the AI service answers 409 DATA_VERSION_MISMATCH / DATA_NOT_SYNCED (it restarted or lost data
+   * after our sync), push all data again and retry once
+   */
+  static async callWithAIData<T>(call: (dataVersion: AIDataVersion) => Promise<T>, userId?: number): Promise<T> {
+    const dataVersion = await RecommendationController.syncAIData(userId)
+    try {
+      return await call(dataVersion)
+    } catch (error: any) {
+      const code = error.response?.status === 409 ? error.response.data?.error : null
+      if (!AI_RESYNC_ERRORS.includes(code)) {
+        throw error
+      }
+      console.log(`⚠️ AI data out of sync (${code}) - full resync and retry`)
+      RecommendationController.lastFullSyncAt = 0
+      return call(await RecommendationController.syncAIData(userId))
+    }
+  }
+
+  /**
+   * Push the games changed since the last push (upsert changed ones, delete removed ones)
+   * Returns the new data version, or null when nothing was sent
+   */
+  private static async pushGameChanges(): Promise<AIDataVersion | null> {
+    const changes = takeGameChanges()
+    try {
+      let synced: AIDataVersion | null = null
+      const deleted = [...changes.deleted]
+
+      if (changes.changed.length > 0) {
+        const games = await RecommendationController.prepareGameData(changes.changed)
+        const found = new Set(games.map((game: any) => game.id))
+        // Changed, then deleted before this push
+        deleted.push(...changes.changed.filter(gameId => !found.has(gameId)))
+        if (games.length > 0) {
+          const response = await axios.post(`${AI_SERVICE_URL}/api/data/games`, { games }, { timeout: 10000 })
+          synced = response.data
+        }
+      }
+
+      if (deleted.length > 0) {
+        const response = await axios.delete(`${AI_SERVICE_URL}/api/data/games`, {
+          data: { ids: deleted },
+          timeout: 10000
+        })
+        synced = response.data
+      }
+
+      console.log(`✅ AI games synced (${changes.changed.length} changed, ${deleted.length} deleted)`)
+      return synced
+    } catch (error) {
+      restoreGameChanges(changes)
+      throw error
+    }
+  }
+
+  /**
+   * Replace the AI service catalog and users with the full current data
+   */
+  private static async pushAllData(): Promise<AIDataVersion> {
+    console.log('🔄 Full data sync to AI service...')
+    // The full push includes every pending game change
+    const changes = takeGameChanges()
+    let synced: AIDataVersion
+    try {
+      const games = await RecommendationController.prepareGameData()
+      const users = await RecommendationController.prepareUserData()
+
+      await axios.post(`${AI_SERVICE_URL}/api/data/games`, { games, replace: true }, { timeout: 30000 })
+      const response = await axios.post(`${AI_SERVICE_URL}/api/data/users`, { users, replace: true }, {
+        timeout: 30000
+      })
+      synced = response.data
+    } catch (error) {
+      restoreGameChanges(changes)
+      throw error
+    }
+
+    RecommendationController.aiDataEpoch = synced.epoch
+    RecommendationController.lastFullSyncAt = Date.now()
+    console.log(`✅ AI data synced (version ${synced.version}: ${synced.games} games, ${synced.users} users)`)
+    return synced
+  }
+
   /**
-   * Prepare data for AI service
+   * Prepare data for AI service (only the given games when gameIds is set)
    */
-  private static async prepareGameData() {
+  private static async prepareGameData(gameIds?: number[]) {
     try {
       console.log('\n=== PREPARING GAME DATA ===')
 
@@ -32,7 +175,8 @@ export class RecommendationController {
           pub.name as publisher
         FROM game g
         LEFT JOIN publisher pub ON g.publisher_id = pub.publisher_id
-      `)
+        ${gameIds ? 'WHERE g.game_id IN (?)' : ''}
+      `, gameIds ? [gameIds] : [])
 
       const games = gamesRows as any[]
 
@@ -133,81 +277,7 @@ export class RecommendationController {
 
       // Fetch interactions for each user
       for (const user of users) {
-        // Favorite games (from wishlist) - ALL TIME for SVD
-        const [wishlistRows] = await pool.query(`
-          SELECT game_id
-          FROM wishlist
-          WHERE user_id = ?
-        `, [user.id])
-        user.favorite_games = (wishlistRows as any[]).map((w: any) => w.game_id)
-
-        // Purchased games with ratings - ALL TIME for SVD
-        const [purchasedRows] = await pool.query(`
-          SELECT p.game_id, COALESCE(r.rating, 3) as rating
-          FROM purchase p
-          LEFT JOIN review r ON p.user_id = r.user_id AND p.game_id = r.game_id
-          WHERE p.user_id = ?
-        `, [user.id])
-
-        user.purchased_games = {}
-        for (const purchase of (purchasedRows as any[])) {
-          user.purchased_games[purchase.game_id] = purchase.rating
-        }
-
-        // View history - ALL TIME for SVD
-        const [viewsRows] = await pool.query(`
-          SELECT game_id, SUM(view_count) as view_count
-          FROM view
-          WHERE user_id = ?
-          GROUP BY game_id
-        `, [user.id])
-
-        user.view_history = {}
-        for (const view of (viewsRows as any[])) {
-          user.view_history[view.game_id] = view.view_count || 1
-        }
-
-        // ⚡ PRE-FILTERED INTERACTIONS (Last 7 Days) for Adaptive Boosting
-        // This MUST be limited to recent days to correctly reflect "current mood/trend"
-        user.interactions = []
-
-        // 1. Recent Wishlist
-        const [recentWish] = await pool.query('SELECT game_id FROM wishlist WHERE user_id = ? AND created_at >= NOW() - INTERVAL 7 DAY', [user.id])
-        for (const item of (recentWish as any[])) {
-          user.interactions.push({ game_id: item.game_id, type: 'favorite' })
-        }
-
-        // 2. Recent Purchases
-        const [recentPurch] = await pool.query(`
-            SELECT p.game_id, COALESCE(r.rating, 3) as rating
-            FROM purchase p
-            LEFT JOIN review r ON p.user_id = r.user_id AND p.game_id = r.game_id
-            WHERE p.user_id = ? AND p.purchase_date >= NOW() - INTERVAL 7 DAY
-        `, [user.id])
-        for (const item of (recentPurch as any[])) {
-          user.interactions.push({ game_id: item.game_id, type: 'purchase', rating: item.rating })
-        }
-
-        // 3. Recent Views
-        const [recentViews] = await pool.query('SELECT game_id, view_count FROM view WHERE user_id = ? AND viewed_at >= NOW() - INTERVAL 7 DAY', [user.id])
-        for (const item of (recentViews as any[])) {
-          user.interactions.push({ game_id: item.game_id, type: 'view', count: item.view_count })
-        }
-
-        // 4. Recent Reviews (that might not be recent purchases)
-        const [recentReviews] = await pool.query(`
-            SELECT game_id, COALESCE(rating, 3) as rating
-            FROM review
-            WHERE user_id = ? AND review_date >= NOW() - INTERVAL 7 DAY
-        `, [user.id])
-
-        for (const item of (recentReviews as any[])) {
-          // Check if already recorded as a recent purchase to avoid duplicates
-          const existing = user.interactions.find((i: any) => i.game_id === item.game_id && i.type === 'purchase')
-          if (!existing) {
-            user.interactions.push({ game_id: item.game_id, type: 'review', rating: item.rating })
-          }
-        }
+        await RecommendationController.loadUserInteractions(user)
       }
 
       console.log(`✅ Prepared ${users.length} users`)
@@ -218,12 +288,111 @@ export class RecommendationController {
     }
   }
 
+  /**
+   * Prepare a single user (with interactions) for AI service delta sync
+   */
+  private static async prepareUser(userId: number) {
+    const [usersRows] = await pool.query(`
+      SELECT user_id as id, username as name, email, age, gender
+      FROM user
+      WHERE user_id = ?
+    `, [userId])
+    const user = (usersRows as any[])[0]
+    if (!user) {
+      return null
+    }
+
+    await RecommendationController.loadUserInteractions(user)
+    return user
+  }
+
+  /**
+   * Attach favorite / purchased / viewed games and recent interactions to a user row
+   */
+  private static async loadUserInteractions(user: any) {
+    // Favorite games (from wishlist) - ALL TIME for SVD
+    const [wishlistRows] = await pool.query(`
+      SELECT game_id
+      FROM wishlist
+      WHERE user_id = ?
+    `, [user.id])
+    user.favorite_games = (wishlistRows as any[]).map((w: any) => w.game_id)
+
+    // Purchased games with ratings - ALL TIME for SVD
+    const [purchasedRows] = await pool.query(`
+      SELECT p.game_id, COALESCE(r.rating, 3) as rating
+      FROM purchase p
+      LEFT JOIN review r ON p.user_id = r.user_id AND p.game_id = r.game_id
+      WHERE p.user_id = ?
+    `, [user.id])
+
+    user.purchased_games = {}
+    for (const purchase of (purchasedRows as any[])) {
+      user.purchased_games[purchase.game_id] = purchase.rating
+    }
+
+    // View history - ALL TIME for SVD
+    const [viewsRows] = await pool.query(`
+      SELECT game_id, SUM(view_count) as view_count
+      FROM view
+      WHERE user_id = ?
+      GROUP BY game_id
+    `, [user.id])
+
+    user.view_history = {}
+    for (const view of (viewsRows as any[])) {
+      user.view_history[view.game_id] = view.view_count || 1
+    }
+
+    // ⚡ PRE-FILTERED INTERACTIONS (Last 7 Days) for Adaptive Boosting
+    // This MUST be limited to recent days to correctly reflect "current mood/trend"
+    user.interactions = []
+
+    // 1. Recent Wishlist
+    const [recentWish] = await pool.query('SELECT game_id FROM wishlist WHERE user_id = ? AND created_at >= NOW() - INTERVAL 7 DAY', [user.id])
+    for (const item of (recentWish as any[])) {
+      user.interactions.push({ game_id: item.game_id, type: 'favorite' })
+    }
+
+    // 2. Recent Purchases
+    const [recentPurch] = await pool.query(`
+        SELECT p.game_id, COALESCE(r.rating, 3) as rating
+        FROM purchase p
+        LEFT JOIN review r ON p.user_id = r.user_id AND p.game_id = r.game_id
+        WHERE p.user_id = ? AND p.purchase_date >= NOW() - INTERVAL 7 DAY
+    `, [user.id])
+    for (const item of (recentPurch as any[])) {
+      user.interactions.push({ game_id: item.game_id, type: 'purchase', rating: item.rating })
+    }
+
+    // 3. Recent Views
+    const [recentViews] = await pool.query('SELECT game_id, view_count FROM view WHERE user_id = ? AND viewed_at >= NOW() - INTERVAL 7 DAY', [user.id])
+    for (const item of (recentViews as any[])) {
+      user.interactions.push({ game_id: item.game_id, type: 'view', count: item.view_count })
+    }
+
+    // 4. Recent Reviews (that might not be recent purchases)
+    const [recentReviews] = await pool.query(`
+        SELECT game_id, COALESCE(rating, 3) as rating
+        FROM review
+        WHERE user_id = ? AND review_date >= NOW() - INTERVAL 7 DAY
+    `, [user.id])
+
+    for (const item of (recentReviews as any[])) {
+      // Check if already recorded as a recent purchase to avoid duplicates
+      const existing = user.interactions.find((i: any) => i.game_id === item.game_id && i.type === 'purchase')
+      if (!existing) {
+        user.interactions.push({ game_id: item.game_id, type: 'review', rating: item.rating })
+      }
+    }
+  }
+
   /**
    * Get AI-powered game recommendations
    */
   static async getRecommendations(req: Request, res: Response) {
     try {
-      const { user_id, query, days, enable_adaptive } = req.query
+      const { user_id, query, days, enable_adaptive, limit, offset, cursor } = req.query
 
       if (!user_id) {
         return res.status(400).json({
@@ -248,30 +417,41 @@ export class RecommendationController {
       console.log('AI Service URL:', AI_SERVICE_URL)
 
       try {
-        // Prepare data
-        const games = await RecommendationController.prepareGameData()
-        const users = await RecommendationController.prepareUserData()
-
         console.log('\n🚀 Calling AI Service...')
         console.log('Sending to AI: enable_adaptive =', enableAdaptive)
 
         // Call AI service
-        // Request all games (or a large number) and let frontend handle pagination
-        const requestBody = {
+        // Paginated (limit / offset / cursor): the AI service caches the ranking and returns one page
+        // Otherwise request all games and let frontend handle pagination
+        const paginated = limit !== undefined || offset !== undefined || cursor !== undefined
+        const requestBody: Record<string, any> = {
           user_id: userId,
-          games: games,
-          users: users,
           query: searchQuery,
           days: recentDays,
           enable_adaptive: enableAdaptive, // Pass adaptive boost setting to AI service
-          top_n: games.length // Get all available games
+          fields: AI_RECOMMENDATION_FIELDS
+        }
+        if (paginated) {
+          if (cursor) requestBody.cursor = cursor as string
+          if (limit) requestBody.limit = parseInt(limit as string)
+          if (offset) requestBody.offset = parseInt(offset as string)
         }
 
         console.log('Request body enable_adaptive:', requestBody.enable_adaptive)
 
-        const aiResponse = await axios.post(`${AI_SERVICE_URL}/api/recommend`, requestBody, {
-          timeout: 30000 // 30 second timeout
-        })
+        // Delta sync: the AI service keeps catalog + users, we only send ids + data version
+        const aiResponse = await RecommendationController.callWithAIData(dataVersion => {
+          console.log('AI data version:', dataVersion.version)
+          return axios.post(`${AI_SERVICE_URL}/api/recommend`, {
+            ...requestBody,
+            data_version: dataVersion.version,
+            data_epoch: dataVersion.epoch,
+            // Get all available games
+            ...(paginated ? {} : { top_n: dataVersion.games })
+          }, {
+            timeout: 30000 // 30 second timeout
+          })
+        }, userId)
 
         console.log('✅ AI Service responded successfully')
         console.log('Recommendations count:', aiResponse.data.games?.length || 0)
@@ -296,6 +476,12 @@ export class RecommendationController {
           success: true,
           games: recommendations,
           total: recommendations.length,
+          ...(paginated ? {
+            total_ranked: aiResponse.data.total_ranked,
+            offset: aiResponse.data.offset,
+            limit: aiResponse.data.limit,
+            next_cursor: aiResponse.data.next_cursor
+          } : {}),
           message: 'AI recommendations generated successfully'
         })
 
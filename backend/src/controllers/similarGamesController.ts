@@ -1,6 +1,7 @@
 import { Request, Response } from 'express'
 import axios from 'axios'
 import { pool } from '../db'
+import { RecommendationController } from './recommendationController'
 
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://localhost:5000'
 
@@ -26,9 +27,6 @@ export class SimilarGamesController {
       console.log('User ID:', userId || '(anonymous)')
       
       try {
-        // Prepare games data
-        const games = await SimilarGamesController.prepareGameData()
-        
         // Get user's purchased games to exclude
         let excludePurchased: number[] = []
         if (userId) {
@@ -41,14 +39,18 @@ export class SimilarGamesController {
         console.log('🚀 Calling AI Service for similar games...')
         
         // Call AI service
-        const aiResponse = await axios.post(`${AI_SERVICE_URL}/api/similar-games`, {
-          game_id: gameId,
-          games: games,
-          top_n: 8,
-          exclude_purchased: excludePurchased
-        }, {
-          timeout: 15000 // 15 second timeout
-        })
+        // Delta sync: the AI service keeps the catalog, we only send ids + data version
+        const aiResponse = await RecommendationController.callWithAIData(dataVersion =>
+          axios.post(`${AI_SERVICE_URL}/api/similar-games`, {
+            game_id: gameId,
+            data_version: dataVersion.version,
+            data_epoch: dataVersion.epoch,
+            top_n: 8,
+            exclude_purchased: excludePurchased
+          }, {
+            timeout: 15000 // 15 second timeout
+          })
+        )
         
         console.log('✅ AI Service responded successfully')
         console.log('Similar games count:', aiResponse.data.similar_games?.length || 0)
@@ -130,58 +132,5 @@ export class SimilarGamesController {
       })
     }
   }
-  
-  /**
-   * Prepare games data for AI service
-   */
-  private static async prepareGameData() {
-    try {
-      const [gamesRows] = await pool.query(`
-        SELECT 
-          g.game_id as id,
-          g.name,
-          g.description,
-          g.price,
-          g.release_date,
-          g.image,
-          g.downloads,
-          g.mode,
-          g.multiplayer,
-          g.age_rating,
-          g.average_rating as rating,
-          pub.name as publisher
-        FROM game g
-        LEFT JOIN publisher pub ON g.publisher_id = pub.publisher_id
-      `)
-      
-      const games = gamesRows as any[]
-      
-      // Fetch genres and platforms for each game
-      for (const game of games) {
-        // Genres
-        const [genresRows] = await pool.query(`
-          SELECT gen.name
-          FROM game_genre gg
-          JOIN genre gen ON gg.genre_id = gen.genre_id
-          WHERE gg.game_id = ?
-        `, [game.id])
-        game.genre = (genresRows as any[]).map((g: any) => g.name)
-        
-        // Platforms
-        const [platformsRows] = await pool.query(`
-          SELECT p.name
-          FROM game_platform gp
-          JOIN platform p ON gp.platform_id = p.platform_id
-          WHERE gp.game_id = ?
-        `, [game.id])
-        game.platform = (platformsRows as any[]).map((p: any) => p.name)
-      }
-      
-      return games
-    } catch (error) {
-      console.error('❌ Error preparing game data:', error)
-      throw error
-    }
-  }
 }
 
@@ -1,4 +1,5 @@
 import { pool } from '../db'
+import { markGameChanged, markGameDeleted } from '../aiSync'
 
 export interface Game {
   game_id: number
@@ -428,6 +429,7 @@ export class GameModel {
       data.image || null,
       data.link_download || null
     ])
+    markGameChanged((result as any).insertId)
     return (result as any).insertId
   }
 
@@ -496,9 +498,13 @@ export class GameModel {
       `UPDATE Game SET ${fields.join(', ')} WHERE game_id = ?`,
       values
     )
+    markGameChanged(gameId)
     return (result as any).affectedRows > 0
   }
 
+  // Counter updates (rating / downloads) are not pushed to the AI service one by one:
+  // the periodic full sync carries them (a push per download would rebuild the AI model each time)
+
   // Update game rating
   static async updateRating(gameId: number, newRating: number): Promise<boolean> {
     const [result] = await pool.execute(
@@ -532,6 +538,7 @@ export class GameModel {
       'DELETE FROM Game WHERE game_id = ?',
       [gameId]
     )
+    markGameDeleted(gameId)
     return (result as any).affectedRows > 0
   }
 }
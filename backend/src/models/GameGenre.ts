@@ -1,4 +1,5 @@
 import { pool } from '../db'
+import { markGameChanged } from '../aiSync'
 
 export interface GameGenre {
   game_id: number
@@ -31,6 +32,7 @@ export class GameGenreModel {
         'INSERT INTO Game_Genre (game_id, genre_id) VALUES (?, ?)',
         [gameId, genreId]
       )
+      markGameChanged(gameId)
       return true
     } catch (error) {
       return false
@@ -43,6 +45,7 @@ export class GameGenreModel {
       'DELETE FROM Game_Genre WHERE game_id = ? AND genre_id = ?',
       [gameId, genreId]
     )
+    markGameChanged(gameId)
     return (result as any).affectedRows > 0
   }
 
@@ -69,6 +72,7 @@ export class GameGenreModel {
       }
 
       await connection.commit()
+      markGameChanged(gameId)
       return true
     } catch (error) {
       await connection.rollback()
@@ -1,4 +1,5 @@
 import { pool } from '../db'
+import { markGameChanged } from '../aiSync'
 
 export interface GameLanguage {
   game_id: number
@@ -31,6 +32,7 @@ export class GameLanguageModel {
         'INSERT INTO Game_Language (game_id, language_id) VALUES (?, ?)',
         [gameId, languageId]
       )
+      markGameChanged(gameId)
       return true
     } catch (error) {
       return false
@@ -43,6 +45,7 @@ export class GameLanguageModel {
       'DELETE FROM Game_Language WHERE game_id = ? AND language_id = ?',
       [gameId, languageId]
     )
+    markGameChanged(gameId)
     return (result as any).affectedRows > 0
   }
 
@@ -69,6 +72,7 @@ export class GameLanguageModel {
       }
 
       await connection.commit()
+      markGameChanged(gameId)
       return true
     } catch (error) {
       await connection.rollback()
@@ -1,4 +1,5 @@
 import { pool } from '../db'
+import { markGameChanged } from '../aiSync'
 
 export interface GamePlatform {
   game_id: number
@@ -31,6 +32,7 @@ export class GamePlatformModel {
         'INSERT INTO Game_Platform (game_id, platform_id) VALUES (?, ?)',
         [gameId, platformId]
       )
+      markGameChanged(gameId)
       return true
     } catch (error) {
       return false
@@ -43,6 +45,7 @@ export class GamePlatformModel {
       'DELETE FROM Game_Platform WHERE game_id = ? AND platform_id = ?',
       [gameId, platformId]
     )
+    markGameChanged(gameId)
     return (result as any).affectedRows > 0
   }
 
@@ -69,6 +72,7 @@ export class GamePlatformModel {
       }
 
       await connection.commit()
+      markGameChanged(gameId)
       return true
     } catch (error) {
       await connection.rollback()
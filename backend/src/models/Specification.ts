@@ -1,4 +1,5 @@
 import { pool } from '../db'
+import { markGameChanged } from '../aiSync'
 
 export interface Specification {
   spec_id: number
@@ -173,6 +174,7 @@ export class SpecificationModel {
       }
 
       await connection.commit()
+      markGameChanged(gameId)
       return true
     } catch (error) {
       await connection.rollback()
@@ -11,12 +11,24 @@ import json
 import os
 import numpy as np
 from datetime import datetime
-import sqlite3
-from game_recommendation_system import GameRecommendationSystem
+from game_recommendation_system import GameRecommendationSystem, DATA_FILES
+from model_snapshot import load_model_snapshot, save_model_snapshot, file_fingerprint, SnapshotError
+from retrain_scheduler import RetrainScheduler
+from interaction_store import InteractionStore
 
 app = Flask(__name__)
 app.secret_key = 'game_recommendation_secret_key_2024'
 
+# Thư mục snapshot model (rỗng = tắt, luôn train lại khi khởi động) - cùng biến môi trường với unified_ai_service.py
+MODEL_SNAPSHOT_DIR = os.environ.get('AI_MODEL_SNAPSHOT_DIR', '')
+
+# Retrain nền: đủ 50 tương tác mới (hoặc tương tác cũ nhất chưa được học quá 10 phút)
+RETRAIN_MIN_INTERACTIONS = 50
+RETRAIN_MAX_STALENESS_SECONDS = 600
+
+# Database tương tác (pool kết nối, WAL, ghi gộp transaction)
+interaction_db = InteractionStore('user_interactions.db')
+
 # Khởi tạo recommendation system
 recommender = None
 user_interactions = {}  # Lưu trữ tương tác người dùng
@@ -27,89 +39,64 @@ def init_recommender():
     global recommender
     if recommender is None:
         print("🚀 Khởi tạo Game Recommendation System...")
-        recommender = GameRecommendationSystem()
-        recommender.load_data()
-        recommender.preprocess_data()
-        recommender.train_svd_model()
-        recommender.build_content_similarity()
+        fingerprint = file_fingerprint(*DATA_FILES) if MODEL_SNAPSHOT_DIR else None
+        if fingerprint:
+            # Snapshot khớp dữ liệu hiện tại → load model đã train (memory-mapped), không train lại
+            try:
+                recommender, _ = load_model_snapshot(MODEL_SNAPSHOT_DIR, fingerprint)
+                print(f"⚡ Load snapshot model từ {MODEL_SNAPSHOT_DIR}")
+            except FileNotFoundError:
+                pass
+            except SnapshotError as e:
+                print(f"⚠️ Bỏ qua snapshot ({e}) - train lại")
+        if recommender is None:
+            recommender = GameRecommendationSystem()
+            recommender.load_data()
+            recommender.preprocess_data()
+            recommender.train_svd_model()
+            recommender.build_content_similarity()
+            if fingerprint:
+                try:
+                    save_model_snapshot(recommender, MODEL_SNAPSHOT_DIR, fingerprint)
+                except (OSError, SnapshotError) as e:
+                    print(f"⚠️ Không lưu được snapshot: {e}")
         print("✅ Hệ thống đã sẵn sàng!")
     return recommender
 
 def init_database():
-    """Khởi tạo database để lưu trữ tương tác"""
-    conn = sqlite3.connect('user_interactions.db')
-    cursor = conn.cursor()
-    
-    # Bảng lưu trữ tương tác người dùng
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_interactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            game_id INTEGER,
-            interaction_type TEXT,
-            rating REAL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Bảng lưu trữ feedback
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            game_id INTEGER,
-            feedback_type TEXT,
-            score REAL,
-            comment TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Bảng lưu trữ learning data
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS learning_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            feature_name TEXT,
-            feature_value REAL,
-            weight REAL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    """Khởi tạo database để lưu trữ tương tác (tạo bảng / index còn thiếu)"""
+    interaction_db.init_schema()
     print("✅ Database đã được khởi tạo!")
 
-def get_user_interactions(user_id):
-    """Lấy tương tác của user"""
-    conn = sqlite3.connect('user_interactions.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT game_id, interaction_type, rating, timestamp 
-        FROM user_interactions 
-        WHERE user_id = ? 
-        ORDER BY timestamp DESC
-    ''', (user_id,))
-    
-    interactions = cursor.fetchall()
-    conn.close()
-    
-    return interactions
+def get_user_interactions(user_id, since=None):
+    """Lấy tương tác của user (mới nhất trước; since: chỉ lấy từ thời điểm này)"""
+    return interaction_db.get_interactions(user_id, since)
+
+# Giới hạn số nguyên của SQLite (INTEGER 64-bit)
+SQLITE_INT_MIN = -2 ** 63
+SQLITE_INT_MAX = 2 ** 63 - 1
+
+def parse_db_id(value):
+    """ID từ JSON (int hoặc chuỗi số) → int trong giới hạn SQLite, None nếu không hợp lệ"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        value = int(value)
+    if isinstance(value, int) and SQLITE_INT_MIN <= value <= SQLITE_INT_MAX:
+        return value
+    return None
+
+def parse_optional_number(value):
+    """rating / score: số hoặc chuỗi số → float (None giữ nguyên); ValueError nếu không phải số"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError('must be a number')
+    return float(value)
 
 def save_user_interaction(user_id, game_id, interaction_type, rating=None):
     """Lưu tương tác người dùng"""
-    conn = sqlite3.connect('user_interactions.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO user_interactions (user_id, game_id, interaction_type, rating)
-        VALUES (?, ?, ?, ?)
-    ''', (user_id, game_id, interaction_type, rating))
-    
-    conn.commit()
-    conn.close()
+    interaction_db.add_interaction(user_id, game_id, interaction_type, rating)
     
     # Cập nhật learning data
     update_learning_data(user_id, game_id, interaction_type, rating)
@@ -185,7 +172,7 @@ def analyze_user_behavior(user_id):
     
     for interaction in interactions:
         # Lấy thông tin game từ recommender
-        game_info = next((g for g in recommender.games_data if g['id'] == interaction['game_id']), None)
+        game_info = recommender.games_by_id.get(interaction['game_id'])
         if game_info:
             # Phân tích genres
             for genre in game_info.get('genre', []):
@@ -331,9 +318,6 @@ def analyze_user_behavior(user_id):
 def save_behavior_patterns_to_db(user_id, behavior_patterns):
     """Lưu behavior patterns vào database"""
     try:
-        conn = sqlite3.connect('user_interactions.db')
-        cursor = conn.cursor()
-        
         # Chuẩn bị dữ liệu
         preferred_genres = json.dumps(behavior_patterns.get('preferred_genres', {}))
         avg_price_range = f"{behavior_patterns.get('avg_price', 0):.0f}"
@@ -342,16 +326,8 @@ def save_behavior_patterns_to_db(user_id, behavior_patterns):
         pattern_data = json.dumps(behavior_patterns)
         
         # Insert or update behavior patterns
-        cursor.execute('''
-            INSERT OR REPLACE INTO user_behavior_patterns 
-            (user_id, preferred_genres, avg_price_range, prefers_new_games, 
-             engagement_score, last_analyzed, pattern_data)
-            VALUES (?, ?, ?, ?, ?, datetime('now'), ?)
-        ''', [user_id, preferred_genres, avg_price_range, prefers_new_games, 
-              engagement_score, pattern_data])
-        
-        conn.commit()
-        conn.close()
+        interaction_db.save_behavior_patterns(user_id, preferred_genres, avg_price_range, prefers_new_games,
+                                              engagement_score, pattern_data)
         
         print(f"✅ Saved behavior patterns for user {user_id}")
         
@@ -554,57 +530,53 @@ def get_dynamic_weights(user_id, keyword=None):
     return weights
 
 def check_and_retrain_svd(user_id):
-    """Kiểm tra và retrain SVD model nếu cần thiết"""
+    """Báo tương tác mới cho scheduler - model được train lại ở thread nền, không chặn request"""
+    retrain_scheduler.record_interactions()
+
+def build_recommender():
+    """Train recommender mới từ file dữ liệu + tương tác đã học (like / purchase)"""
+    new_recommender = GameRecommendationSystem()
+    new_recommender.load_data()
+    
+    # Gộp tương tác vào user data (copy - request khác vẫn đang ghi learning_data)
+    users_by_id = {user['id']: user for user in new_recommender.users_data}
+    for user_id, user_data in list(learning_data.items()):
+        user = users_by_id.get(user_id)
+        if user is None:
+            continue
+        for interaction in list(user_data['interaction_history']):
+            game_id = interaction['game_id']
+            if interaction['type'] == 'like' and game_id not in user.setdefault('favorite_games', []):
+                user['favorite_games'].append(game_id)
+            elif interaction['type'] == 'purchase':
+                user.setdefault('purchased_games', {}).setdefault(str(game_id), interaction['rating'] or 5)
+    
+    new_recommender.preprocess_data()
+    new_recommender.train_svd_model()
+    new_recommender.build_content_similarity()
+    return new_recommender
+
+def retrain_recommender(changes):
+    """Train model mới ở thread nền rồi đổi sang model mới (request đang chạy vẫn dùng model cũ)"""
     global recommender
-    
-    if user_id not in learning_data:
-        return
-    
-    user_data = learning_data[user_id]
-    interactions = user_data['interaction_history']
-    
-    # Chỉ retrain nếu có đủ dữ liệu
-    if len(interactions) < 10:  # Cần ít nhất 10 tương tác
-        return
-    
-    # Kiểm tra xem có cần retrain không (mỗi 50 tương tác mới)
-    last_retrain = user_data.get('last_retrain_count', 0)
-    current_count = len(interactions)
-    
-    if current_count - last_retrain >= 50:  # Retrain mỗi 50 tương tác mới
-        print(f"🔄 Auto-retraining SVD model for user {user_id}...")
-        
-        try:
-            # Retrain SVD model
-            recommender.retrain_svd_model()
-            
-            # Cập nhật last retrain count
-            user_data['last_retrain_count'] = current_count
-            
-            # Log retraining event
-            log_retraining_event(user_id, current_count)
-            
-            print(f"✅ SVD model retrained for user {user_id}")
-            
-        except Exception as e:
-            print(f"❌ Error retraining SVD model: {e}")
+    print(f"🔄 Retraining model nền ({changes['interactions']} tương tác mới)...")
+    new_recommender = build_recommender()
+    recommender = new_recommender
+    log_retraining_event(None, changes['interactions'])
+    print("✅ Đã chuyển sang model mới")
+
+retrain_scheduler = RetrainScheduler(
+    retrain_recommender, name='web_app_model', min_interactions=RETRAIN_MIN_INTERACTIONS,
+    max_staleness_seconds=RETRAIN_MAX_STALENESS_SECONDS
+)
 
 def log_retraining_event(user_id, interactions_count):
     """Log retraining event vào database"""
     try:
-        conn = sqlite3.connect('user_interactions.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO ai_training_log 
-            (user_id, training_type, interactions_count, timestamp, notes)
-            VALUES (?, ?, ?, datetime('now'), ?)
-        ''', [user_id, 'auto_retrain', interactions_count, f'Auto-retrained after {interactions_count} interactions'])
-        
-        conn.commit()
-        conn.close()
+        interaction_db.log_training(user_id, 'auto_retrain', interactions_count,
+                                    f'Auto-retrained after {interactions_count} interactions')
         
-        print(f"✅ Logged retraining event for user {user_id}")
+        print(f"✅ Logged retraining event ({interactions_count} interactions)")
         
     except Exception as e:
         print(f"❌ Error logging retraining event: {e}")
@@ -612,81 +584,22 @@ def log_retraining_event(user_id, interactions_count):
 def get_system_health():
     """Kiểm tra tình trạng hệ thống AI"""
     try:
-        conn = sqlite3.connect('user_interactions.db')
-        cursor = conn.cursor()
-        
-        # Lấy thống kê tổng quan
-        cursor.execute('SELECT COUNT(*) FROM user_interactions')
-        total_interactions = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT user_id) FROM user_interactions')
-        total_users = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM user_behavior_patterns')
-        users_with_behavior = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM ai_training_log')
-        total_retrains = cursor.fetchone()[0]
-        
-        # Lấy retrain gần nhất
-        cursor.execute('''
-            SELECT timestamp, interactions_count, notes 
-            FROM ai_training_log 
-            ORDER BY timestamp DESC 
-            LIMIT 1
-        ''')
-        last_retrain = cursor.fetchone()
-        
-        conn.close()
+        # Lấy thống kê tổng quan + retrain gần nhất
+        stats = interaction_db.stats()
         
         return {
-            'total_interactions': total_interactions,
-            'total_users': total_users,
-            'users_with_behavior': users_with_behavior,
-            'total_retrains': total_retrains,
-            'last_retrain': last_retrain,
-            'system_status': 'healthy' if total_interactions > 0 else 'no_data'
+            **stats,
+            'retraining': retrain_scheduler.stats(),
+            'system_status': 'healthy' if stats['total_interactions'] > 0 else 'no_data'
         }
         
     except Exception as e:
         print(f"❌ Error getting system health: {e}")
         return {
             'system_status': 'error',
-            'error': str(e)
+            'error': str(e),
+            'retraining': retrain_scheduler.stats()
         }
-    
-    # Chỉ retrain nếu có đủ dữ liệu mới (ít nhất 5 tương tác mới)
-    if len(interactions) < 5:
-        return
-    
-    # Kiểm tra xem có cần retrain không (mỗi 10 tương tác)
-    if len(interactions) % 10 == 0:
-        print(f"🔄 Retraining SVD model for user {user_id}...")
-        
-        # Cập nhật user-item matrix với dữ liệu mới
-        try:
-            # Lấy recommender instance
-            global recommender
-            if recommender:
-                # Cập nhật user data trong recommender
-                for user in recommender.users_data:
-                    if user['id'] == user_id:
-                        # Cập nhật favorite_games, purchased_games từ learning_data
-                        user['favorite_games'] = learning_data[user_id]['preferences'].get('liked_games', [])
-                        user['purchased_games'] = learning_data[user_id]['preferences'].get('purchased_games', [])
-                        break
-                
-                # Retrain SVD model
-                recommender.preprocess_data()
-                recommender.train_svd_model()
-                print(f"✅ SVD model retrained successfully for user {user_id}")
-                
-                # Ghi log retrain vào file với tham số model
-                log_retrain_info(user_id, interactions, recommender)
-                
-        except Exception as e:
-            print(f"❌ Error retraining SVD model: {e}")
-            log_retrain_error(user_id, str(e))
 
 def log_retrain_info(user_id, interactions, recommender=None):
     """Ghi thông tin retrain vào file log"""
@@ -763,10 +676,11 @@ def log_retrain_info(user_id, interactions, recommender=None):
                     }
                 
                 # Content similarity matrix info
-                if hasattr(recommender, 'content_similarity_matrix') and recommender.content_similarity_matrix is not None:
+                if hasattr(recommender, 'similarity_index') and recommender.similarity_index is not None:
                     retrain_info['model_parameters']['content_similarity'] = {
-                        'shape': list(recommender.content_similarity_matrix.shape),
-                        'type': str(type(recommender.content_similarity_matrix).__name__)
+                        'games': recommender.similarity_index.n_items,
+                        'top_k': recommender.similarity_index.top_k,
+                        'type': str(type(recommender.similarity_index).__name__)
                     }
                 
                 # Dynamic weights for this user
@@ -824,7 +738,8 @@ def get_smart_recommendations(user_id, top_n=None, keyword=None):
     # Sử dụng trực tiếp get_hybrid_recommendations từ game_recommendation_system.py
     # Hàm này đã có sẵn logic xử lý keyword và trọng số động
     # ⏰ SỬ DỤNG 7 NGÀY GẦN NHẤT để analyze preferences
-    basic_recs = recommender.get_hybrid_recommendations(
+    rec_system = recommender  # Giữ model hiện tại cho cả request (retrain nền có thể đổi model)
+    basic_recs = rec_system.get_hybrid_recommendations(
         user_id=user_id, 
         top_n=top_n, 
         keyword=keyword,
@@ -837,20 +752,21 @@ def get_smart_recommendations(user_id, top_n=None, keyword=None):
         user_data = learning_data[user_id]
         
         # Boost games theo preferred genres, release year, và price
+        # ⚡ Đọc genre / năm phát hành / giá từ feature store (release_date đã parse sẵn)
+        features = rec_system.feature_store
+        release_years = features.release_years(2020)
         for rec in basic_recs:
-            game_id = rec['game_id']
-            game_info = next((g for g in recommender.games_data if g['id'] == game_id), None)
+            row = features.row(rec['game_id'])
             
-            if game_info:
+            if row is not None:
                 total_boost = 0
                 
                 # 1. Genre boost
                 if 'preferred_genres' in user_data['behavior_patterns']:
                     preferred_genres = user_data['behavior_patterns']['preferred_genres']
-                    game_genres = game_info.get('genre', [])
                     
                     genre_boost = 0
-                    for genre in game_genres:
+                    for genre in features.labels('genre', row):
                         if genre in preferred_genres:
                             genre_boost += preferred_genres[genre] * 0.1
                     total_boost += genre_boost
@@ -858,18 +774,14 @@ def get_smart_recommendations(user_id, top_n=None, keyword=None):
                 # 2. Release year boost (games mới)
                 if user_data['behavior_patterns'].get('prefers_new_games', False):
                     current_year = datetime.now().year
-                    release_date = game_info.get('release_date', '2020-01-01')
-                    try:
-                        game_year = int(release_date.split('-')[0]) if release_date else 2020
-                    except:
-                        game_year = 2020
+                    game_year = release_years[row]
                     if game_year >= current_year - 1:  # Games trong 1 năm gần đây
                         year_boost = 0.15  # Boost cao cho games mới
                         total_boost += year_boost
                 
                 # 3. Price boost (theo price tolerance)
                 price_tolerance = user_data['behavior_patterns'].get('price_tolerance', {})
-                game_price = game_info.get('price', 0)
+                game_price = features.price[row]
                 
                 if price_tolerance.get('low', False) and game_price < 500000:
                     total_boost += 0.1
@@ -907,7 +819,7 @@ def users():
 def user_profile(user_id):
     """Trang profile user"""
     recommender = init_recommender()
-    user_data = next((u for u in recommender.users_data if u['id'] == user_id), None)
+    user_data = recommender.users_by_id.get(user_id)
     
     if not user_data:
         return "User không tồn tại", 404
@@ -944,10 +856,15 @@ def api_recommendations(user_id):
 def api_interact():
     """API xử lý tương tác người dùng"""
     data = request.json
-    user_id = data.get('user_id')
-    game_id = data.get('game_id')
+    user_id = parse_db_id(data.get('user_id'))
+    game_id = parse_db_id(data.get('game_id'))
     interaction_type = data.get('type')  # 'view', 'like', 'purchase', 'dislike'
-    rating = data.get('rating')
+    if user_id is None or game_id is None:
+        return jsonify({'status': 'error', 'message': 'user_id và game_id phải là số nguyên hợp lệ'}), 400
+    try:
+        rating = parse_optional_number(data.get('rating'))
+    except (ValueError, OverflowError):
+        return jsonify({'status': 'error', 'message': 'rating phải là số'}), 400
     
     # Lưu tương tác
     save_user_interaction(user_id, game_id, interaction_type, rating)
@@ -958,26 +875,27 @@ def api_interact():
 def api_feedback():
     """API xử lý feedback"""
     data = request.json
-    user_id = data.get('user_id')
-    game_id = data.get('game_id')
+    user_id = parse_db_id(data.get('user_id'))
+    game_id = parse_db_id(data.get('game_id'))
     feedback_type = data.get('feedback_type')  # 'helpful', 'not_helpful'
-    score = data.get('score')
     comment = data.get('comment')
+    if user_id is None or game_id is None:
+        return jsonify({'status': 'error', 'message': 'user_id và game_id phải là số nguyên hợp lệ'}), 400
+    try:
+        score = parse_optional_number(data.get('score'))
+    except (ValueError, OverflowError):
+        return jsonify({'status': 'error', 'message': 'score phải là số'}), 400
     
     # Lưu feedback
-    conn = sqlite3.connect('user_interactions.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO user_feedback (user_id, game_id, feedback_type, score, comment)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (user_id, game_id, feedback_type, score, comment))
-    
-    conn.commit()
-    conn.close()
+    interaction_db.add_feedback(user_id, game_id, feedback_type, score, comment)
     
     return jsonify({'status': 'success', 'message': 'Feedback đã được lưu'})
 
+@app.route('/api/system-health')
+def api_system_health():
+    """API tình trạng hệ thống AI (tương tác, retrain nền: thời gian build, độ trễ model)"""
+    return jsonify(get_system_health())
+
 @app.route('/api/learning/<int:user_id>')
 def api_learning_data(user_id):
     """API lấy dữ liệu học của user"""
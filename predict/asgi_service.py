@@ -0,0 +1,326 @@
+"""
+ASGI Service
+asyncio front end of the unified AI service (same endpoints and responses as the Flask app)
+- Connections, request bodies and responses are handled on the event loop → slow clients and
+  large uploads hold no scoring thread
+- JSON bodies are parsed on the loop (up to PARSE_ON_LOOP_MAX_BYTES; larger ones are parsed by
+  the scoring thread so one upload does not stall every other connection)
+- Requests then run the Flask app (unified_ai_service.app) on a bounded pool of scoring threads:
+  at most SCORING_THREADS at once, MAX_QUEUED waiting in arrival order, anything beyond is
+  answered 503 OVERLOADED at once instead of queueing without bound
+- Requests whose client disconnects while queued are dropped before scoring
+- /health, /metrics and /api/data/version run on the loop (answered even when the pool is full)
+The Flask app stays available as before (python unified_ai_service.py / prefork_server.py)
+
+Usage:
+    python asgi_service.py --port 5000 --threads 4   (needs uvicorn)
+    <any ASGI server> asgi_service:app
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Request
+
+import metrics
+import unified_ai_service as service
+from logging_config import get_logger
+
+logger = get_logger('asgi')
+
+# Requests scored at once (threads of the scoring pool)
+SCORING_THREADS = int(os.environ.get('AI_ASGI_THREADS', os.cpu_count() or 1))
+
+# Requests waiting for a scoring thread before new ones are rejected with 503
+MAX_QUEUED = int(os.environ.get('AI_ASGI_MAX_QUEUED', 64))
+
+# Longest wait for a scoring thread (seconds) before the request is rejected with 503
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get('AI_ASGI_QUEUE_TIMEOUT', 30))
+
+# Larger request bodies are rejected with 413 (full games/users payloads fit)
+MAX_BODY_BYTES = int(os.environ.get('AI_ASGI_MAX_BODY_BYTES', 256 * 1024 * 1024))
+
+# JSON bodies up to this size are parsed on the event loop, larger ones by the scoring thread
+PARSE_ON_LOOP_MAX_BYTES = 1024 * 1024
+
+# Cheap read-only endpoints answered on the event loop
+LOOP_PATHS = frozenset(('/health', '/metrics', '/api/data/version'))
+
+# WSGI environ key carrying the body parsed on the loop
+PARSED_JSON_KEY = 'ai.parsed_json'
+
+REJECTED = metrics.registry.counter(
+    'ai_asgi_rejected_total', 'Requests refused by the ASGI front end by reason', ('reason',)
+)
+
+
+class PreparsedJSONRequest(Request):
+    """Flask request that reuses the JSON body parsed on the event loop"""
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if PARSED_JSON_KEY in self.environ:
+            return self.environ[PARSED_JSON_KEY]
+        return super().get_json(force=force, silent=silent, cache=cache)
+
+
+class BodyTooLarge(Exception):
+    """Request body above MAX_BODY_BYTES"""
+
+
+def wsgi_environ(scope, body):
+    """WSGI environ of an ASGI http request with its fully received body"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = name if name == 'CONTENT_TYPE' else 'HTTP_' + name
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def call_wsgi(wsgi_app, environ):
+    """Run a WSGI app → (status code, [(name, value), ...], body bytes)"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    chunks = wsgi_app(environ, start_response)
+    try:
+        body = b''.join(chunks)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    return started['status'], started['headers'], body
+
+
+def error_response(status, error, message):
+    """JSON error in the service's {"success": false, "error", "message"} shape"""
+    body = json.dumps({'success': False, 'error': error, 'message': message}).encode('utf-8')
+    headers = [('Content-Type', 'application/json'), ('Access-Control-Allow-Origin', '*')]
+    if status == 503:
+        headers.append(('Retry-After', '1'))
+    return status, headers, body
+
+
+async def read_body(scope, receive, limit):
+    """Whole request body (None if the client disconnected first)"""
+    for name, value in scope.get('headers', ()):
+        if name == b'content-length' and value.isdigit() and int(value) > limit:
+            raise BodyTooLarge()
+
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+class AsgiService:
+    """ASGI application serving a Flask app from a bounded pool of scoring threads"""
+
+    def __init__(self, flask_app, threads=SCORING_THREADS, max_queued=MAX_QUEUED,
+                 queue_timeout=QUEUE_TIMEOUT_SECONDS, max_body_bytes=MAX_BODY_BYTES):
+        flask_app.request_class = PreparsedJSONRequest
+        self.flask_app = flask_app
+        self.threads = threads
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.max_body_bytes = max_body_bytes
+        self.admitted = 0   # running + queued
+        self.running = 0
+        self._executor = None
+        self._slots = None
+
+    def start(self):
+        """Scoring pool (created on the serving loop at startup or on the first request)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='ai-scoring')
+            self._slots = asyncio.Semaphore(self.threads)
+            logger.info("ASGI front end: %d scoring threads, %d queued at most", self.threads, self.max_queued)
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self.handle_http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.handle_lifespan(receive, send)
+
+    async def handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.stop)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle_http(self, scope, receive, send):
+        self.start()
+        timer = metrics.stage_timer('asgi')
+        try:
+            body = await read_body(scope, receive, self.max_body_bytes)
+        except BodyTooLarge:
+            REJECTED.inc('body_too_large')
+            await self.respond(send, *error_response(
+                413, 'PAYLOAD_TOO_LARGE', f'Request body is larger than {self.max_body_bytes} bytes'
+            ))
+            return
+        if body is None:
+            return
+        timer.lap('receive')
+
+        environ = wsgi_environ(scope, body)
+        if body and len(body) <= PARSE_ON_LOOP_MAX_BYTES and self.is_json(environ):
+            try:
+                environ[PARSED_JSON_KEY] = self.flask_app.json.loads(body)
+            except ValueError:
+                pass   # Flask answers malformed bodies as before
+            timer.lap('parse')
+
+        if scope['path'] in LOOP_PATHS:
+            await self.respond(send, *call_wsgi(self.flask_app, environ))
+            return
+
+        result = await self.run_scoring(environ, receive)
+        if result is not None:
+            timer.lap('queue_and_run')
+            await self.respond(send, *result)
+
+    async def run_scoring(self, environ, receive):
+        """Run the request on a scoring thread → response, or None when the client went away while queued"""
+        # Counted on admission (before any await) → concurrent arrivals cannot all slip past the limit
+        if self.admitted >= self.threads + self.max_queued:
+            REJECTED.inc('queue_full')
+            return error_response(503, 'OVERLOADED', 'Too many requests waiting - retry later')
+
+        self.admitted += 1
+        try:
+            acquire = asyncio.ensure_future(self._slots.acquire())
+            disconnect = asyncio.ensure_future(receive())
+            done, _ = await asyncio.wait(
+                (acquire, disconnect), timeout=self.queue_timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if acquire not in done:
+                if not acquire.cancel():
+                    self._slots.release()   # acquired while we gave up
+                disconnect.cancel()
+                if disconnect in done:
+                    REJECTED.inc('client_gone')
+                    return None
+                REJECTED.inc('queue_timeout')
+                return error_response(
+                    503, 'OVERLOADED', f'No scoring thread free within {self.queue_timeout:g}s - retry later'
+                )
+
+            self.running += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, call_wsgi, self.flask_app, environ
+                )
+            finally:
+                self.running -= 1
+                self._slots.release()
+                disconnect.cancel()
+        finally:
+            self.admitted -= 1
+
+    @staticmethod
+    def is_json(environ):
+        mimetype = environ.get('CONTENT_TYPE', '').split(';', 1)[0].strip().lower()
+        return mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+    @staticmethod
+    async def respond(send, status, headers, body):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = AsgiService(service.app)
+
+
+def collect_asgi_stats():
+    """Scoring pool occupancy (read at scrape time)"""
+    return [
+        ('ai_asgi_requests', 'gauge', 'Requests in the ASGI scoring pool by state', [
+            ({'state': 'running'}, app.running),
+            ({'state': 'queued'}, app.admitted - app.running),
+        ]),
+    ]
+
+
+metrics.registry.register_collector(collect_asgi_stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Unified AI service behind an asyncio (ASGI) front end')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=SCORING_THREADS, help='Scoring threads')
+    parser.add_argument('--max-queued', type=int, default=MAX_QUEUED, help='Requests waiting for a thread before 503')
+    parser.add_argument('--backlog', type=int, default=2048)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        parser.error("uvicorn is not installed (pip install uvicorn) - or serve asgi_service:app with another ASGI server")
+
+    app.threads = args.threads
+    app.max_queued = args.max_queued
+    uvicorn.run(app, host=args.host, port=args.port, backlog=args.backlog, lifespan='on', log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
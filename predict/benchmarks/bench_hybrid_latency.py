@@ -0,0 +1,118 @@
+"""
+Hybrid recommendation latency vs catalog size
+Measures get_hybrid_recommendations() on synthetic catalogs of growing size and
+reports the log-log slope (≈1 means latency grows linearly with the number of games)
+
+Usage (from predict/):
+    python benchmarks/bench_hybrid_latency.py --sizes 1000 2500 5000 10000 --users 50
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from game_recommendation_system import GameRecommendationSystem
+
+GENRES = ['Action', 'Adventure', 'RPG', 'Shooter', 'Horror', 'Puzzle', 'Casual', 'Racing', 'Sports', 'Strategy']
+PLATFORMS = ['PC', 'PS5', 'Xbox', 'Mobile', 'Switch']
+PUBLISHERS = [f'Publisher {i}' for i in range(40)]
+
+
+def make_dataset(n_games, n_users, seed=42):
+    """Small synthetic dataset in the game.json schema"""
+    rng = random.Random(seed)
+    games = []
+    for game_id in range(1, n_games + 1):
+        games.append({
+            'id': game_id,
+            'name': f'Game {game_id}',
+            'description': ' '.join(rng.choice(GENRES).lower() for _ in range(12)),
+            'price': rng.choice([0, 150000, 300000, 600000, 1200000]),
+            'release_date': f'{rng.randint(2005, 2024)}-01-01',
+            'downloads': rng.randint(1000, 10_000_000),
+            'mode': rng.choice(['Online', 'Offline']),
+            'multiplayer': rng.random() < 0.4,
+            'capacity': rng.randint(1, 120),
+            'age_rating': rng.choice(['3+', '12+', '16+', '18+']),
+            'rating': round(rng.uniform(2.5, 5.0), 1),
+            'publisher': rng.choice(PUBLISHERS),
+            'genre': rng.sample(GENRES, rng.randint(1, 3)),
+            'platform': rng.sample(PLATFORMS, rng.randint(1, 3)),
+            'language': ['English'],
+            'min_spec': {'cpu': 'Intel i5', 'gpu': 'GTX 1060', 'ram': '8GB'},
+            'rec_spec': {'cpu': 'Intel i7', 'gpu': 'RTX 3060', 'ram': '16GB'},
+        })
+
+    users = []
+    for user_id in range(1, n_users + 1):
+        picks = rng.sample(range(1, n_games + 1), 30)
+        users.append({
+            'id': user_id,
+            'name': f'User {user_id}',
+            'age': rng.randint(14, 45),
+            'gender': rng.choice(['male', 'female']),
+            'favorite_games': picks[:5],
+            'purchased_games': {str(g): rng.randint(1, 5) for g in picks[5:12]},
+            'view_history': {str(g): rng.randint(1, 10) for g in picks[12:]},
+        })
+    return games, users
+
+
+def build_recommender(games, users):
+    recommender = GameRecommendationSystem()
+    recommender.games_data = games
+    recommender.users_data = users
+    recommender.keyword_library = {}
+    recommender.cpu_data = {}
+    recommender.gpu_data = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender.preprocess_data()
+        recommender.train_svd_model()
+        recommender.build_content_similarity()
+    return recommender
+
+
+def time_hybrid(recommender, user_ids, repeats):
+    timings = []
+    for _ in range(repeats):
+        for user_id in user_ids:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                recommender.get_hybrid_recommendations(user_id, top_n=20, keyword='', enable_adaptive=True)
+            timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hybrid recommendation latency vs catalog size')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 2500, 5000, 10000])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'games':>8} {'median latency (ms)':>20}")
+    for n_games in args.sizes:
+        games, users = make_dataset(n_games, args.users)
+        recommender = build_recommender(games, users)
+        latency = time_hybrid(recommender, [1, 2, 3], args.repeats)
+        results.append((n_games, latency))
+        print(f"{n_games:>8} {latency * 1000:>20.1f}")
+
+    if len(results) >= 2:
+        sizes = np.log([r[0] for r in results])
+        latencies = np.log([r[1] for r in results])
+        slope = np.polyfit(sizes, latencies, 1)[0]
+        print(f"\nlog-log slope: {slope:.2f} (1.0 = linear in catalog size, 2.0 = quadratic)")
+
+
+if __name__ == '__main__':
+    main()
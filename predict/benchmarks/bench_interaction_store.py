@@ -0,0 +1,130 @@
+"""
+Write-path benchmark of the web app interaction database
+Concurrent client threads each insert interactions for a fixed time, for every client count:
+- per_call: connect / insert / commit / close per interaction (the previous app.py helpers,
+  default rollback journal)
+- store: InteractionStore (pooled WAL connections, group commit on one writer thread)
+Reports inserts/s, p50 / p95 insert latency and failed inserts ("database is locked")
+Each run uses a fresh database file in a temporary directory
+
+Usage (from predict/):
+    python benchmarks/bench_interaction_store.py --clients 1 2 4 8 16 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+PREDICT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, PREDICT_DIR)
+
+from interaction_store import InteractionStore, INSERT_INTERACTION
+
+INTERACTION_TYPES = ('view', 'like', 'purchase', 'dislike')
+
+
+def per_call_writer(path):
+    """Insert function of the previous helpers (one connection per call)"""
+    store = InteractionStore(path)
+    store.init_schema()
+    store.close()
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.close()
+
+    def insert(user_id, game_id, interaction_type, rating):
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute(INSERT_INTERACTION, (user_id, game_id, interaction_type, rating))
+            conn.commit()
+        finally:
+            conn.close()
+
+    return insert, None
+
+
+def store_writer(path):
+    store = InteractionStore(path)
+    store.init_schema()
+    return store.add_interaction, store
+
+
+def run(insert, clients, seconds):
+    """Inserts from `clients` threads for `seconds` → (latencies of the successful ones, failures)"""
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def client(index):
+        own = []
+        failed = 0
+        n = index
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                insert(n % 5000, n % 300, INTERACTION_TYPES[n % 4], float(n % 5 + 1))
+                own.append(time.perf_counter() - started)
+            except sqlite3.Error:
+                failed += 1
+            n += clients
+        with lock:
+            latencies.extend(own)
+            failures[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), failures[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Interaction insert throughput by concurrent clients')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--seconds', type=float, default=5.0, help='Timed inserts per client count')
+    parser.add_argument('--out', help='Write the JSON results here')
+    args = parser.parse_args()
+
+    results = []
+    for name, make_writer in (('per_call', per_call_writer), ('store', store_writer)):
+        for clients in args.clients:
+            with tempfile.TemporaryDirectory() as directory:
+                insert, store = make_writer(os.path.join(directory, 'interactions.db'))
+                try:
+                    latencies, failures = run(insert, clients, args.seconds)
+                finally:
+                    if store is not None:
+                        store.close()
+            result = {
+                'writer': name,
+                'clients': clients,
+                'inserts': int(latencies.size),
+                'failures': failures,
+                'inserts_per_s': round(latencies.size / args.seconds, 1),
+                'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3) if latencies.size else None,
+                'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 3) if latencies.size else None,
+            }
+            if store is not None:
+                result['writes_per_commit'] = round(store.writes / max(store.write_batches, 1), 1)
+            results.append(result)
+            print(f"{name:>8} {clients:>3} clients: {result['inserts_per_s']:>9} inserts/s  "
+                  f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  failures {failures}"
+                  + (f"  {result['writes_per_commit']} writes/commit" if store is not None else ''))
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'seconds': args.seconds, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
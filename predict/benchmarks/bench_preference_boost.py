@@ -0,0 +1,79 @@
+"""
+Adaptive preference boost: per-game breakdown vs vectorized PreferenceBoostEngine
+Checks the vectorized factors are bit-identical to _calculate_boost_factor_breakdown, then times both
+
+Usage (from predict/):
+    python benchmarks/bench_preference_boost.py --games 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_hybrid_latency import make_dataset
+from game_feature_store import GameFeatureStore
+from game_recommendation_system import GameRecommendationSystem
+from preference_boost import PreferenceBoostEngine, BOOST_FACTORS
+
+
+def build_profiles(recommender, n_users):
+    """Preference profiles of the first users, plus variants exercising the price branches"""
+    profiles = []
+    for user in recommender.users_data[:n_users]:
+        preferences = recommender.analyze_user_preferences(user['id'], recent_days=None)
+        if preferences:
+            profiles.append(preferences)
+
+    base = profiles[0]
+    profiles.append(dict(base, price={'avg': base['price_avg'], 'std': base['price_std'] or 1}))
+    profiles.append(dict(base, price={'avg': 0, 'std': 1}))
+    profiles.append(dict(base, genres={}, platforms={}))
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-game vs vectorized preference boost')
+    parser.add_argument('--games', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=20)
+    args = parser.parse_args()
+
+    games, users = make_dataset(args.games, args.users)
+    recommender = GameRecommendationSystem()
+    recommender.games_data = games
+    recommender.users_data = users
+    recommender.build_lookup_tables()
+    recommender.feature_store = GameFeatureStore(games)
+    engine = PreferenceBoostEngine(recommender.feature_store)
+
+    profiles = build_profiles(recommender, args.users)
+
+    loop_time = 0.0
+    vector_time = 0.0
+    for preferences in profiles:
+        start = time.perf_counter()
+        breakdowns = [recommender._calculate_boost_factor_breakdown(game, preferences) for game in games]
+        loop_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        total, matrix = engine.boost_factors(preferences, breakdown=True)
+        vector_time += time.perf_counter() - start
+
+        expected_total = np.array([b['total'] for b in breakdowns])
+        expected_matrix = np.array([[b[factor] for factor in BOOST_FACTORS] for b in breakdowns])
+        if not (np.array_equal(total, expected_total) and np.array_equal(matrix, expected_matrix)):
+            raise SystemExit('Vectorized boost factors differ from the per-game breakdown')
+
+    n = len(profiles)
+    print(f"{args.games} games × {n} profiles - vectorized factors bit-identical")
+    print(f"per-game breakdown: {loop_time / n * 1000:10.1f} ms / profile")
+    print(f"vectorized engine:  {vector_time / n * 1000:10.1f} ms / profile")
+    print(f"speedup:            {loop_time / vector_time:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Throughput benchmark of the pre-fork server (prefork_server.py) by worker count
+For each worker count: start the server, sync a synthetic dataset through /api/data/*, warm every
+worker, then fire /api/recommend from concurrent clients for a fixed time
+Reports requests/s, p50 / p95 latency and the PSS of the workers (proportional set size:
+shared model pages are split between the processes mapping them)
+
+Usage (from predict/):
+    python benchmarks/bench_prefork.py --games 5000 --users 20000 --workers 1 2 4 --clients 16
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+PREDICT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_data import SyntheticDataGenerator
+
+STARTUP_TIMEOUT_SECONDS = 120
+
+
+def post(base_url, path, body, timeout=600):
+    request = urllib.request.Request(
+        base_url + path, data=json.dumps(body).encode('utf-8'), headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def wait_until_up(base_url):
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/health', timeout=2):
+                return
+        except OSError:   # refused / timed out while the workers import the service
+            time.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+
+def worker_pss_kb(supervisor_pid):
+    """PSS (kB) of each worker process of a supervisor"""
+    children = subprocess.run(['ps', '--ppid', str(supervisor_pid), '-o', 'pid='],
+                              capture_output=True, text=True).stdout.split()
+    sizes = []
+    for pid in children:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        sizes.append(int(line.split()[1]))
+        except OSError:
+            pass
+    return sizes
+
+
+def load(base_url, body_for, clients, seconds):
+    """Requests from `clients` threads for `seconds` → latencies (s) of the successful ones"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def client(index):
+        n = index
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                post(base_url, '/api/recommend', body_for(n))
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+            n += clients
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def bench_workers(workers, games, users, args):
+    port = args.port
+    base_url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, AI_LOG_LEVEL='WARNING')
+    server = subprocess.Popen(
+        [sys.executable, 'prefork_server.py', '--workers', str(workers), '--port', str(port), '--host', '127.0.0.1'],
+        cwd=PREDICT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(base_url)
+        post(base_url, '/api/data/games', {'games': games, 'replace': True})
+        synced = post(base_url, '/api/data/users', {'users': users, 'replace': True})
+
+        user_ids = [user['id'] for user in users]
+
+        def body_for(n):
+            return {'user_id': user_ids[n % len(user_ids)], 'data_version': synced['version'], 'top_n': args.top_n}
+
+        # Every worker maps the model before timing starts
+        load(base_url, body_for, workers * 2, 2.0)
+
+        latencies, errors = load(base_url, body_for, args.clients, args.seconds)
+        latencies = np.array(latencies)
+        pss = worker_pss_kb(server.pid)
+        return {
+            'workers': workers,
+            'requests': int(latencies.size),
+            'errors': errors,
+            'rps': round(latencies.size / args.seconds, 1),
+            'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 2) if latencies.size else None,
+            'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 2) if latencies.size else None,
+            'worker_pss_mb': round(sum(pss) / 1024, 1),
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-fork server throughput by worker count')
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--seconds', type=float, default=20.0, help='Timed load per worker count')
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--out', help='Write the JSON results here')
+    args = parser.parse_args()
+
+    print(f"Dataset: {args.games} games, {args.users} users (seed {args.seed}), {os.cpu_count()} CPUs")
+    generator = SyntheticDataGenerator(args.games, args.users, args.seed)
+    games = generator.generate_games()
+    users = generator.generate_users()
+
+    results = []
+    for workers in args.workers:
+        result = bench_workers(workers, games, users, args)
+        results.append(result)
+        print(f"{workers:>3} workers: {result['rps']:>8} req/s  p50 {result['p50_ms']} ms  "
+              f"p95 {result['p95_ms']} ms  workers PSS {result['worker_pss_mb']} MB  errors {result['errors']}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'dataset': {'games': args.games, 'users': args.users, 'seed': args.seed},
+                       'clients': args.clients, 'seconds': args.seconds, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+Stage-level benchmark of the recommendation pipeline on synthetic data
+Times every stage (preprocess, SVD, content similarity, preferences, hybrid / batch scoring,
+similar-games table) and the service endpoints, with the process RSS peak / growth during each stage
+- Dataset: benchmarks/synthetic_data.py (same seed → same data → comparable runs)
+- Report: JSON with the environment (git commit, library versions, CPU) + one entry per stage
+- --compare OLD.json prints current / old ratios to spot regressions between commits
+
+Usage (from predict/):
+    python benchmarks/bench_stages.py --games 20000 --users 100000 --out benchmarks/results/stages.json
+    python benchmarks/bench_stages.py --games 20000 --users 100000 --compare benchmarks/results/stages.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+PREDICT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, PREDICT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from game_recommendation_system import GameRecommendationSystem
+from content_similarity_engine import ContentSimilarityEngine
+from synthetic_data import SyntheticDataGenerator
+
+REPORT_SCHEMA = 1
+
+# Ratio above which --compare flags a stage (timings are noisy below ~10%)
+REGRESSION_THRESHOLD = 1.2
+
+# Memory is sampled from the RSS (tracemalloc would slow the pure-Python stages many times over)
+RSS_SAMPLE_SECONDS = 0.005
+RSS_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb():
+    """Resident set size now (MB) - Linux /proc, None elsewhere"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * RSS_PAGE_SIZE / 1e6
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemorySampler:
+    """Peak RSS while a stage runs (background thread sampling every RSS_SAMPLE_SECONDS)"""
+
+    def __init__(self):
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._sample()
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and rss > self.peak_mb:
+            self.peak_mb = rss
+
+    def result(self):
+        if self.start_mb is None:
+            return {}
+        return {'rss_peak_mb': round(self.peak_mb, 1), 'rss_growth_mb': round(self.peak_mb - self.start_mb, 1)}
+
+
+class StageRecorder:
+    """Wall time and memory peak per stage"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, **extra):
+        """One-shot stage (build steps): total seconds"""
+        with MemorySampler() as memory, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            yield
+            seconds = time.perf_counter() - start
+        self.stages[name] = {'seconds': round(seconds, 4), **memory.result(), **extra}
+        print(f"  {name:<36} {seconds * 1000:>11.1f} ms")
+
+    def latency(self, name, fn, args_list, **extra):
+        """Repeated stage (requests): median / p95 per call"""
+        timings = []
+        with MemorySampler() as memory, contextlib.redirect_stdout(io.StringIO()):
+            for args in args_list:
+                start = time.perf_counter()
+                fn(*args)
+                timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000
+        self.stages[name] = {
+            'calls': len(timings),
+            'median_ms': round(float(np.median(timings)), 3),
+            'p95_ms': round(float(np.percentile(timings, 95)), 3),
+            'max_ms': round(float(timings.max()), 3),
+            **memory.result(),
+            **extra,
+        }
+        result = self.stages[name]
+        print(f"  {name:<36} {result['median_ms']:>11.3f} ms median  {result['p95_ms']:>9.3f} ms p95  ({len(timings)} calls)")
+
+
+def load_reference_data(recommender):
+    """keyword library + CPU/GPU tables, as the service loads them"""
+    with open(os.path.join(PREDICT_DIR, 'library.json'), 'r', encoding='utf-8') as f:
+        recommender.keyword_library = json.load(f).get('keywords', {})
+    with open(os.path.join(PREDICT_DIR, 'game_recommendation_system', 'cpu.json'), 'r', encoding='utf-8') as f:
+        recommender.cpu_data = json.load(f)
+    with open(os.path.join(PREDICT_DIR, 'game_recommendation_system', 'gpu.json'), 'r', encoding='utf-8') as f:
+        recommender.gpu_data = json.load(f)
+
+
+def pick_keywords(recommender, count):
+    """Keywords from the library (the queries users actually type)"""
+    keywords = sorted(recommender.keyword_library)[:count]
+    return keywords or ['action']
+
+
+def bench_pipeline(recorder, games, users, args):
+    """Model build stages + per-user scoring"""
+    rng = np.random.default_rng(args.seed)
+    active = [user['id'] for user in users if user['favorite_games'] or user['purchased_games']]
+    sample = [int(user_id) for user_id in rng.choice(active, min(args.requests, len(active)), replace=False)]
+
+    recommender = GameRecommendationSystem()
+    recommender.games_data = list(games)
+    recommender.users_data = list(users)
+    load_reference_data(recommender)
+
+    with recorder.stage('preprocess_data'):
+        recommender.preprocess_data()
+    recorder.stages['preprocess_data']['interactions'] = int(recommender.user_item_matrix.nnz)
+    with recorder.stage('train_svd_model'):
+        recommender.train_svd_model()
+    with recorder.stage('build_content_similarity'):
+        recommender.build_content_similarity()
+
+    def preferences(user_id):
+        recommender.user_preferences.clear()
+        recommender.analyze_user_preferences(user_id)
+
+    recorder.latency('analyze_user_preferences', preferences, [(user_id,) for user_id in sample])
+
+    def hybrid(user_id, keyword=''):
+        recommender.get_hybrid_recommendations(user_id, top_n=args.top_n, keyword=keyword, enable_adaptive=True)
+
+    keywords = pick_keywords(recommender, len(sample))
+    recorder.latency('hybrid', hybrid, [(user_id,) for user_id in sample])
+    recorder.latency('hybrid_keyword', hybrid, [(user_id, keywords[i % len(keywords)]) for i, user_id in enumerate(sample)])
+
+    batch_ids = [int(user_id) for user_id in rng.choice(active, min(args.batch_users, len(active)), replace=False)]
+    with recorder.stage('batch_recommendations', users=len(batch_ids)):
+        recommender.get_batch_recommendations(batch_ids, top_n=args.top_n)
+    batch = recorder.stages['batch_recommendations']
+    batch['per_user_ms'] = round(batch['seconds'] * 1000 / max(len(batch_ids), 1), 3)
+    return sample
+
+
+def bench_similar_games(recorder, games, args):
+    """Neighbour table build + similar-games queries"""
+    engine = ContentSimilarityEngine()
+    with recorder.stage('similarity_engine_build'):
+        engine.load_games(games)
+    rng = np.random.default_rng(args.seed)
+    game_ids = [int(game_id) for game_id in rng.choice([game['id'] for game in games], args.requests)]
+    recorder.latency('similar_games', lambda game_id: engine.get_similar_games(game_id, top_n=8), [(g,) for g in game_ids])
+
+
+def bench_endpoints(recorder, games, users, sample, args):
+    """Service endpoints in-process (Flask test client, data store mode)"""
+    import unified_ai_service as service
+
+    client = service.app.test_client()
+
+    def post(url, body):
+        response = client.post(url, json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} → {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return response.get_json()
+
+    with recorder.stage('endpoint_sync_games'):
+        post('/api/data/games', {'games': games, 'replace': True})
+    with recorder.stage('endpoint_sync_users'):
+        version = post('/api/data/users', {'users': users, 'replace': True})['version']
+
+    body = {'data_version': version, 'top_n': args.top_n}
+    with recorder.stage('endpoint_recommend_cold'):
+        post('/api/recommend', dict(body, user_id=sample[0]))
+    recorder.latency('endpoint_recommend_warm', lambda user_id: post('/api/recommend', dict(body, user_id=user_id)),
+                     [(user_id,) for user_id in sample])
+
+    def paginate(user_id):
+        page = post('/api/recommend', {'data_version': version, 'user_id': user_id, 'offset': 0, 'limit': args.top_n})
+        post('/api/recommend', {'cursor': page['next_cursor'], 'data_version': version})
+
+    recorder.latency('endpoint_recommend_paginated', paginate, [(user_id,) for user_id in sample])
+
+    rng = np.random.default_rng(args.seed)
+    game_ids = [int(game_id) for game_id in rng.choice([game['id'] for game in games], args.requests)]
+    recorder.latency('endpoint_similar_games', lambda game_id: post('/api/similar-games', {'data_version': version, 'game_id': game_id}),
+                     [(game_id,) for game_id in game_ids])
+    with recorder.stage('endpoint_batch', users=len(sample)):
+        post('/api/recommend/batch', dict(body, user_ids=sample))
+
+
+def environment():
+    """What the numbers depend on (to compare runs across machines / commits)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PREDICT_DIR, capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    import scipy
+    import sklearn
+    return {
+        'git_commit': commit or None,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare_reports(current, baseline):
+    """Print current / baseline ratios (> REGRESSION_THRESHOLD flagged)"""
+    print(f"\nCompared with {baseline.get('created_at')} ({(baseline['environment'].get('git_commit') or '?')[:10]})")
+    if baseline.get('dataset') != current.get('dataset'):
+        print(f"  ⚠️ different dataset: {baseline.get('dataset')} vs {current.get('dataset')}")
+    print(f"  {'stage':<36} {'old':>11} {'new':>11} {'ratio':>7}")
+    for name, stage in current['stages'].items():
+        old = baseline['stages'].get(name)
+        if not old:
+            continue
+        metric = 'median_ms' if 'median_ms' in stage else 'seconds'
+        if metric not in old or not old[metric]:
+            continue
+        ratio = stage[metric] / old[metric]
+        flag = '  ← slower' if ratio > REGRESSION_THRESHOLD else ''
+        unit = 'ms' if metric == 'median_ms' else 's'
+        print(f"  {name:<36} {old[metric]:>9.3f}{unit:>2} {stage[metric]:>9.3f}{unit:>2} {ratio:>7.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stage-level benchmark on synthetic data')
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=30, help='Users / games sampled for latency stages')
+    parser.add_argument('--batch-users', type=int, default=1000)
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--skip-endpoints', action='store_true')
+    parser.add_argument('--out', help='Write the JSON report here')
+    parser.add_argument('--compare', help='Earlier JSON report to compare with')
+    args = parser.parse_args()
+
+    # Service code opens library.json / cpu.json relative to predict/
+    os.chdir(PREDICT_DIR)
+    recorder = StageRecorder()
+
+    print(f"Dataset: {args.games} games, {args.users} users (seed {args.seed})")
+    generator = SyntheticDataGenerator(args.games, args.users, args.seed)
+    with recorder.stage('generate_dataset'):
+        games = generator.generate_games()
+        users = generator.generate_users()
+
+    sample = bench_pipeline(recorder, games, users, args)
+    bench_similar_games(recorder, games, args)
+    if not args.skip_endpoints:
+        bench_endpoints(recorder, games, users, sample, args)
+
+    report = {
+        'schema': REPORT_SCHEMA,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'dataset': {'games': args.games, 'users': args.users, 'seed': args.seed},
+        'settings': {'requests': args.requests, 'batch_users': args.batch_users, 'top_n': args.top_n},
+        'stages': recorder.stages,
+    }
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_reports(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+"""
+Synthetic dataset generator in the game.json schema
+Realistic games / users / interactions at any scale (e.g. 10k-200k games, 1M users)
+- Categorical values, numeric ranges, names and descriptions follow the seed catalog (game.json)
+- Game popularity is Zipf-like and each user prefers a few genres → long-tail, clustered interactions
+  like a real store (most activity on popular games of the user's genres)
+- Users are generated in chunks and can be streamed to disk without holding them all in memory
+- Same seed → same dataset
+
+Usage (from predict/):
+    python benchmarks/synthetic_data.py --games 50000 --users 200000 --out data/synthetic_50k.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'game.json')
+
+# Popularity of the game at popularity rank r ∝ 1 / (r + 1) ** ZIPF_EXPONENT
+ZIPF_EXPONENT = 1.05
+
+# Share of a user's games picked from their preferred genres (rest: whole catalog by popularity)
+GENRE_AFFINITY = 0.7
+PREFERRED_GENRES = (1, 3)    # min / max preferred genres per user
+
+# Users without any interaction (cold start)
+COLD_START_SHARE = 0.03
+
+# Users generated per chunk
+USER_CHUNK_SIZE = 10000
+
+# Fallback vocabulary when the seed catalog is missing
+FALLBACK_PROFILE = {
+    'genre': ['Action', 'Adventure', 'RPG', 'Shooter', 'Puzzle', 'Casual', 'Racing', 'Sports', 'Strategy', 'Simulation'],
+    'platform': ['PC', 'PS5', 'PS4', 'Xbox', 'Mobile', 'Console'],
+    'language': ['English', 'Vietnamese', 'Japanese', 'Korean', 'French', 'German'],
+    'publisher': [f'Publisher {i}' for i in range(40)],
+    'mode': ['Online', 'Offline'],
+    'age_rating': ['3+', '7+', '12+', '16+', '18+'],
+    'cpu': ['Intel i3-10100', 'Intel Core i5-8400', 'AMD Ryzen 5 3600', 'Intel i7', 'Intel i9'],
+    'gpu': ['GTX 1060', 'GTX 1660', 'RTX 3060', 'RTX 3070', 'RTX 4080'],
+    'ram': ['4GB', '6GB', '8GB', '16GB', '32GB'],
+}
+
+
+def _weights(counter):
+    """(values, probabilities) of a Counter, most common first"""
+    values = [value for value, _ in counter.most_common()]
+    counts = np.array([counter[value] for value in values], dtype=np.float64)
+    return values, counts / counts.sum()
+
+
+class SeedProfile:
+    """Value distributions taken from the seed catalog (or the fallback vocabulary)"""
+
+    def __init__(self, path=SEED_PATH):
+        games, users = [], []
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            games, users = data.get('games', []), data.get('users', [])
+
+        def counter(values, fallback):
+            counts = Counter(value for value in values if value not in (None, ''))
+            return counts or Counter(fallback)
+
+        self.categorical = {}
+        self.list_lengths = {}
+        for field in ('genre', 'platform', 'language'):
+            self.categorical[field] = _weights(counter((v for g in games for v in g.get(field, [])), FALLBACK_PROFILE[field]))
+            self.list_lengths[field] = _weights(counter((len(g.get(field, [])) for g in games if g.get(field)), [1, 2, 3]))
+        for field in ('publisher', 'mode', 'age_rating'):
+            self.categorical[field] = _weights(counter((g.get(field) for g in games), FALLBACK_PROFILE[field]))
+        for spec in ('min_spec', 'rec_spec'):
+            for part in ('cpu', 'gpu', 'ram'):
+                values = (g.get(spec, {}).get(part) for g in games)
+                self.categorical[f'{spec}.{part}'] = _weights(counter(values, FALLBACK_PROFILE[part]))
+
+        self.prices = _weights(counter((g.get('price') for g in games), [0, 100000, 300000, 500000, 1200000]))
+        self.multiplayer_share = np.mean([bool(g.get('multiplayer')) for g in games]) if games else 0.4
+        self.years = (2005, 2024)
+        if games:
+            years = [int(str(g.get('release_date', '2020'))[:4]) for g in games if g.get('release_date')]
+            self.years = (min(years), max(years))
+        self.downloads = (max(1000, min((g.get('downloads', 0) for g in games), default=1000)),
+                          max((g.get('downloads', 0) for g in games), default=100_000_000))
+
+        self.name_words = sorted({w for g in games for w in str(g.get('name', '')).split() if w.isalpha()}) or \
+            ['Legends', 'Empire', 'Shadow', 'Quest', 'Racer', 'Tactics', 'Dungeon', 'Galaxy']
+        self.descriptions = [g['description'] for g in games if g.get('description')] or \
+            ['An action-packed adventure with deep strategy and immersive worlds.']
+
+        # Users: interaction counts per active user, view counts, ratings, ages
+        active = [u for u in users if u.get('favorite_games') or u.get('purchased_games') or u.get('view_history')]
+        self.favorite_counts = [len(u.get('favorite_games', [])) for u in active] or [4, 5, 6, 7, 8]
+        self.purchase_counts = [len(u.get('purchased_games', {})) for u in active] or [7, 8, 9, 10]
+        self.view_counts = [len(u.get('view_history', {})) for u in active] or [10, 12, 15, 20]
+        self.view_repeats = _weights(counter((v for u in users for v in u.get('view_history', {}).values()), [1, 3, 5, 8]))
+        self.ratings = _weights(counter((v for u in users for v in u.get('purchased_games', {}).values()), [3, 4, 5]))
+        self.ages = (min((u['age'] for u in users if u.get('age')), default=16),
+                     max((u['age'] for u in users if u.get('age')), default=45))
+        self.genders = _weights(counter((u.get('gender') for u in users), ['male', 'female']))
+
+
+def _weighted_subsets(rng, n_rows, values, probabilities, lengths):
+    """Per row: `lengths[row]` distinct values drawn by weight (Gumbel top-k, vectorised)"""
+    keys = np.log(probabilities)[None, :] + rng.gumbel(size=(n_rows, len(values)))
+    order = np.argsort(-keys, axis=1)
+    return [[values[i] for i in order[row, :lengths[row]]] for row in range(n_rows)]
+
+
+class SyntheticDataGenerator:
+    """Games and users in the game.json schema"""
+
+    def __init__(self, n_games, n_users, seed=42, profile=None):
+        self.n_games = n_games
+        self.n_users = n_users
+        self.seed = seed
+        self.profile = profile or SeedProfile()
+        self.games = None
+        self._genre_games = None     # {genre: game ids}
+        self._genre_cum = None       # {genre: cumulative popularity of those games}
+
+    # ------------------------------------------------------------------ games
+
+    def generate_games(self):
+        """The catalog (cached - users are sampled from it)"""
+        if self.games is not None:
+            return self.games
+
+        rng = np.random.default_rng(self.seed)
+        profile = self.profile
+        n = self.n_games
+
+        def draw(field, size=n):
+            values, probabilities = profile.categorical[field]
+            return [values[i] for i in rng.choice(len(values), size=size, p=probabilities)]
+
+        def draw_lists(field):
+            lengths_values, lengths_p = profile.list_lengths[field]
+            values, probabilities = profile.categorical[field]
+            lengths = np.minimum(rng.choice(lengths_values, size=n, p=lengths_p), len(values))
+            return _weighted_subsets(rng, n, values, probabilities, lengths)
+
+        genres, platforms, languages = draw_lists('genre'), draw_lists('platform'), draw_lists('language')
+        publishers, modes, age_ratings = draw('publisher'), draw('mode'), draw('age_rating')
+        specs = {key: draw(key) for key in profile.categorical if '_spec.' in key}
+
+        price_values, price_p = profile.prices
+        prices = rng.choice(price_values, size=n, p=price_p)
+
+        # Popularity ranks → Zipf weights; downloads follow popularity (log-scale noise)
+        self.popularity = 1.0 / (rng.permutation(n) + 1.0) ** ZIPF_EXPONENT
+        low, high = np.log(profile.downloads[0]), np.log(profile.downloads[1])
+        log_popularity = np.log(self.popularity)
+        scaled = (log_popularity - log_popularity.min()) / max(np.ptp(log_popularity), 1e-12)
+        downloads = np.exp(np.clip(low + scaled * (high - low) + rng.normal(0, 0.5, n), low, high)).astype(np.int64)
+
+        ratings = np.round(rng.uniform(2.5, 5.0, n), 1)
+        years = rng.integers(profile.years[0], profile.years[1] + 1, n)
+        months = rng.integers(1, 13, n)
+        days = rng.integers(1, 29, n)
+        multiplayer = rng.random(n) < profile.multiplayer_share
+        capacity = rng.integers(0, 201, n)
+        name_words = rng.choice(len(profile.name_words), size=(n, 2))
+        descriptions = rng.choice(len(profile.descriptions), size=n)
+
+        games = []
+        for i in range(n):
+            game_id = i + 1
+            first, second = profile.name_words[name_words[i, 0]], profile.name_words[name_words[i, 1]]
+            games.append({
+                'id': game_id,
+                'name': f'{first} {second} {game_id}',
+                'description': profile.descriptions[descriptions[i]],
+                'price': int(prices[i]),
+                'release_date': f'{years[i]}-{months[i]:02d}-{days[i]:02d}T17:00:00.000Z',
+                'image': f'https://example.com/images/{game_id}.jpg',
+                'downloads': int(downloads[i]),
+                'mode': modes[i],
+                'multiplayer': bool(multiplayer[i]),
+                'capacity': int(capacity[i]),
+                'age_rating': age_ratings[i],
+                'link_download': f'https://gamestore.com/download/{game_id}',
+                'rating': float(ratings[i]),
+                'publisher': publishers[i],
+                'genre': genres[i],
+                'platform': platforms[i],
+                'language': languages[i],
+                'min_spec': {part: specs[f'min_spec.{part}'][i] for part in ('cpu', 'gpu', 'ram')},
+                'rec_spec': {part: specs[f'rec_spec.{part}'][i] for part in ('cpu', 'gpu', 'ram')},
+            })
+
+        # Sampling tables: games of each genre with cumulative popularity
+        by_genre = {}
+        for i, game in enumerate(games):
+            for genre in game['genre']:
+                by_genre.setdefault(genre, []).append(i)
+        self._genre_games = {genre: np.array(rows) for genre, rows in by_genre.items()}
+        self._genre_cum = {genre: np.cumsum(self.popularity[rows]) for genre, rows in self._genre_games.items()}
+        self._all_games = np.arange(n)
+        self._all_cum = np.cumsum(self.popularity)
+
+        self.games = games
+        return games
+
+    # ------------------------------------------------------------------ users
+
+    def _sample_games(self, rng, preferred, k):
+        """k distinct game rows: GENRE_AFFINITY from the preferred genres, rest from the whole catalog"""
+        n_affine = rng.binomial(k * 2, GENRE_AFFINITY)
+        picks = []
+        for genre in preferred:
+            rows, cum = self._genre_games.get(genre), self._genre_cum.get(genre)
+            if rows is None:
+                continue
+            share = n_affine // len(preferred) + 1
+            picks.append(rows[np.searchsorted(cum, rng.random(share) * cum[-1], side='right').clip(0, len(rows) - 1)])
+        picks.append(np.searchsorted(self._all_cum, rng.random(k * 2 - n_affine) * self._all_cum[-1], side='right').clip(0, self.n_games - 1))
+
+        candidates = np.concatenate(picks)
+        rng.shuffle(candidates)
+        _, first = np.unique(candidates, return_index=True)
+        return candidates[np.sort(first)][:k]
+
+    def iter_user_chunks(self, chunk_size=USER_CHUNK_SIZE):
+        """Users in chunks (lists of user dicts)"""
+        self.generate_games()
+        profile = self.profile
+        genre_values, genre_p = profile.categorical['genre']
+        view_values, view_p = profile.view_repeats
+        rating_values, rating_p = profile.ratings
+        gender_values, gender_p = profile.genders
+
+        for start in range(0, self.n_users, chunk_size):
+            rng = np.random.default_rng([self.seed, start])
+            size = min(chunk_size, self.n_users - start)
+            n_preferred = rng.integers(PREFERRED_GENRES[0], PREFERRED_GENRES[1] + 1, size)
+            preferred = _weighted_subsets(rng, size, genre_values, genre_p, n_preferred)
+            cold = rng.random(size) < COLD_START_SHARE
+            n_fav = rng.choice(profile.favorite_counts, size)
+            n_pur = rng.choice(profile.purchase_counts, size)
+            n_view = rng.choice(profile.view_counts, size)
+            ages = rng.integers(profile.ages[0], profile.ages[1] + 1, size)
+            genders = rng.choice(len(gender_values), size, p=gender_p)
+
+            chunk = []
+            for j in range(size):
+                user_id = start + j + 1
+                user = {
+                    'id': user_id,
+                    'name': f'user_{user_id}',
+                    'email': f'user_{user_id}@example.com',
+                    'age': int(ages[j]),
+                    'gender': gender_values[genders[j]],
+                    'favorite_games': [],
+                    'purchased_games': {},
+                    'view_history': {},
+                    'interactions': [],
+                }
+                if not cold[j]:
+                    rows = self._sample_games(rng, preferred[j], int(n_pur[j] + n_fav[j] + n_view[j]))
+                    ids = (rows + 1).tolist()
+                    purchased = ids[:n_pur[j]]
+                    # Favourites overlap purchases (wishlist → buy), views include some purchases
+                    favorites = [ids[i] for i in sorted(rng.choice(min(len(ids), n_pur[j] + n_fav[j]), min(n_fav[j], len(ids)), replace=False))]
+                    viewed = ids[n_pur[j] + n_fav[j]:] + purchased[::2]
+                    ratings = rng.choice(rating_values, len(purchased), p=rating_p)
+                    repeats = rng.choice(view_values, len(viewed), p=view_p)
+
+                    user['favorite_games'] = favorites
+                    user['purchased_games'] = {str(g): int(r) for g, r in zip(purchased, ratings)}
+                    user['view_history'] = {str(g): int(v) for g, v in zip(viewed, repeats)}
+                    user['interactions'] = (
+                        [{'game_id': g, 'type': 'favorite'} for g in favorites] +
+                        [{'game_id': g, 'type': 'review', 'rating': int(r)} for g, r in zip(purchased, ratings)]
+                    )
+                chunk.append(user)
+            yield chunk
+
+    def generate_users(self):
+        return [user for chunk in self.iter_user_chunks() for user in chunk]
+
+
+def generate_dataset(n_games, n_users, seed=42, profile=None):
+    """(games, users) in memory - same records json.load would give for the written file"""
+    generator = SyntheticDataGenerator(n_games, n_users, seed, profile)
+    return generator.generate_games(), generator.generate_users()
+
+
+def write_dataset(path, n_games, n_users, seed=42, profile=None):
+    """Stream a {"games": [...], "users": [...]} file (users are never all in memory)"""
+    generator = SyntheticDataGenerator(n_games, n_users, seed, profile)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    n_interactions = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"games": [')
+        for i, game in enumerate(generator.generate_games()):
+            f.write((',\n' if i else '\n') + json.dumps(game, ensure_ascii=False))
+        f.write('\n], "users": [')
+        first = True
+        for chunk in generator.iter_user_chunks():
+            for user in chunk:
+                n_interactions += len(user['favorite_games']) + len(user['purchased_games']) + len(user['view_history'])
+                f.write(('\n' if first else ',\n') + json.dumps(user, ensure_ascii=False))
+                first = False
+        f.write('\n]}\n')
+    return n_interactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic dataset in the game.json schema')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--seed-catalog', default=SEED_PATH, help='Catalog whose distributions are imitated')
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_interactions = write_dataset(args.out, args.games, args.users, args.seed, SeedProfile(args.seed_catalog))
+    size_mb = os.path.getsize(args.out) / 1e6
+    print(f"Wrote {args.games} games, {args.users} users, {n_interactions} interactions "
+          f"to {args.out} ({size_mb:.1f} MB) in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
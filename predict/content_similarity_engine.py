@@ -6,28 +6,59 @@ Does NOT require user data - only game attributes
 
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import StandardScaler
 
+from similarity_index import SimilarityIndex, DEFAULT_TOP_K
+from logging_config import get_logger
+
+logger = get_logger('similarity')
+
 
 class ContentSimilarityEngine:
     """Engine for computing content-based similarity between games"""
     
-    def __init__(self):
+    def __init__(self, top_k=DEFAULT_TOP_K, exact=False):
         self.games_data = None
-        self.similarity_matrix = None
+        self.game_indices = {}  # {game_id: [row indices]} - O(1) id lookup
+        self.similarity_index = None
+        self.similarity_matrix = None  # Only kept when exact=True (debugging)
+        self.top_k = top_k
+        self.exact = exact
     
     def load_games(self, games):
         """Load games data and build similarity matrix"""
         self.games_data = games
+        self.game_indices = {}
+        for i, game in enumerate(games):
+            self.game_indices.setdefault(game['id'], []).append(i)
         self.build_similarity_matrix()
     
+    def to_arrays(self):
+        """(arrays, meta) of the neighbour table for a shared snapshot (rows in games_data order)"""
+        return self.similarity_index.to_arrays()
+    
+    @classmethod
+    def from_arrays(cls, games, arrays, meta):
+        """Engine over `games` (same order as when saved) restored from to_arrays() output"""
+        engine = cls(top_k=meta['top_k'], exact=meta.get('exact', False))
+        engine.games_data = games
+        for i, game in enumerate(games):
+            engine.game_indices.setdefault(game['id'], []).append(i)
+        engine.similarity_index = SimilarityIndex.from_arrays(arrays, meta)
+        engine.similarity_matrix = engine.similarity_index.exact_matrix
+        return engine
+    
+    def get_game(self, game_id):
+        """Game record by id (None if not loaded)"""
+        indices = self.game_indices.get(game_id)
+        return self.games_data[indices[0]] if indices else None
+    
     def build_similarity_matrix(self):
-        """Build content similarity matrix using TF-IDF and game attributes"""
+        """Build content similarity index (top-K neighbours) using TF-IDF and game attributes"""
         if not self.games_data:
             raise ValueError("No games data loaded")
         
-        print(f"🔍 Building content similarity matrix for {len(self.games_data)} games...")
+        logger.info("Building content similarity index for %d games...", len(self.games_data))
         
         # Extract text and numeric features
         text_features = []
@@ -119,13 +150,13 @@ class ContentSimilarityEngine:
         # Weight: Text (1x), Numeric (0.5x)
         combined_matrix = hstack([text_matrix, numeric_sparse * 0.5])
         
-        # Calculate cosine similarity
-        self.similarity_matrix = cosine_similarity(combined_matrix)
+        # Top-K cosine similarity index (no dense N×N matrix unless exact=True)
+        self.similarity_index = SimilarityIndex(combined_matrix, top_k=self.top_k, exact=self.exact)
+        self.similarity_matrix = self.similarity_index.exact_matrix
         
-        print(f"✅ Similarity matrix built: {self.similarity_matrix.shape}")
-        print(f"   Text features: {text_matrix.shape[1]} dimensions")
-        print(f"   Numeric features: {numeric_matrix.shape[1]} dimensions")
-        print(f"   Similarity range: {self.similarity_matrix.min():.3f} - {self.similarity_matrix.max():.3f}")
+        logger.info("Similarity index built: %d games, top-%d neighbours (%d text + %d numeric features)",
+                    self.similarity_index.n_items, self.similarity_index.top_k,
+                    text_matrix.shape[1], numeric_matrix.shape[1])
     
     def get_similar_games(self, game_id, top_n=8, exclude_ids=None):
         """
@@ -139,39 +170,27 @@ class ContentSimilarityEngine:
         Returns:
             List of similar games with similarity scores
         """
-        if self.similarity_matrix is None:
-            raise ValueError("Similarity matrix not built. Call build_similarity_matrix() first.")
+        if self.similarity_index is None:
+            raise ValueError("Similarity index not built. Call build_similarity_matrix() first.")
         
         # Find game index
-        game_idx = next((i for i, g in enumerate(self.games_data) if g['id'] == game_id), None)
-        if game_idx is None:
+        if game_id not in self.game_indices:
             raise ValueError(f"Game {game_id} not found")
+        game_idx = self.game_indices[game_id][0]
         
-        # Get similarity scores for this game
-        similarities = self.similarity_matrix[game_idx]
-        
-        # Create list of (game_id, similarity) pairs
-        similar_games = []
+        # Skip self (and duplicates of the same id) and excluded games
         exclude_set = set(exclude_ids) if exclude_ids else set()
+        exclude_idx = set()
+        for other_id in exclude_set | {game_id}:
+            exclude_idx.update(self.game_indices.get(other_id, []))
         
-        for i, sim_score in enumerate(similarities):
-            other_game = self.games_data[i]
-            other_id = other_game['id']
-            
-            # Skip self and excluded games
-            if other_id == game_id or other_id in exclude_set:
-                continue
-            
-            similar_games.append({
-                'game': other_game,
-                'similarity_score': float(sim_score)
-            })
-        
-        # Sort by similarity (descending)
-        similar_games.sort(key=lambda x: x['similarity_score'], reverse=True)
+        # Served from the top-K neighbour list (exact row scan only if exclusions empty it)
+        neighbors = self.similarity_index.neighbors(game_idx, top_n=top_n, exclude=exclude_idx)
         
-        # Return top N
-        return similar_games[:top_n]
+        return [
+            {'game': self.games_data[i], 'similarity_score': score}
+            for i, score in neighbors
+        ]
 
 
 def get_similar_games_simple(games, target_game_id, top_n=8, exclude_ids=None):
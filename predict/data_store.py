@@ -0,0 +1,201 @@
+"""
+Data Store
+Catalog and user state held by the unified service (delta sync instead of full payloads)
+- Games / users are upserted or deleted by id, interaction fields are patched per user
+- Every effective change bumps `version` (no-op upserts keep it) - games_version / users_version
+  only move when their side changes
+- `epoch` identifies this store instance → callers resync everything after a service restart
+- snapshot() returns the lists used to build models (records keep their first insertion order)
+"""
+
+import threading
+import uuid
+
+from game_recommendation_system import INTERACTION_FIELDS
+
+
+class DataVersionError(Exception):
+    """Caller's base version does not match the store (it missed updates → resync)"""
+
+    def __init__(self, expected, current):
+        super().__init__(f"base_version {expected} does not match store version {current}")
+        self.expected = expected
+        self.current = current
+
+
+class DataSnapshot:
+    """Consistent view of the store at one version"""
+
+    def __init__(self, epoch, version, games_version, users_version, games, users):
+        self.epoch = epoch
+        self.version = version
+        self.games_version = games_version
+        self.users_version = users_version
+        self.games = games
+        self.users = users
+        self._users_by_id = None
+
+    def user(self, user_id):
+        """User record by id at this version (index built on first use)"""
+        if self._users_by_id is None:
+            self._users_by_id = {user['id']: user for user in self.users}
+        return self._users_by_id.get(user_id)
+
+    @property
+    def fingerprint(self):
+        """Model key for this snapshot (no need to hash the payload)"""
+        return f"store:{self.epoch}:{self.version}"
+
+
+class DataStore:
+    """Versioned games / users state for the unified service"""
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        self.games_version = 0
+        self.users_version = 0
+        self._games = {}   # {game_id: game} (insertion order = catalog order)
+        self._users = {}   # {user_id: user}
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    # ------------------------------------------------------------------ reads
+
+    def info(self):
+        """Version counters and sizes"""
+        return {
+            'epoch': self.epoch,
+            'version': self.version,
+            'games_version': self.games_version,
+            'users_version': self.users_version,
+            'games': len(self._games),
+            'users': len(self._users),
+        }
+
+    def snapshot(self):
+        """DataSnapshot of the current version (lists are rebuilt only after a change)"""
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != self.version:
+                self._snapshot = DataSnapshot(
+                    self.epoch, self.version, self.games_version, self.users_version,
+                    list(self._games.values()), list(self._users.values())
+                )
+            return self._snapshot
+
+    # ----------------------------------------------------------------- writes
+
+    def upsert_games(self, games, replace=False, base_version=None):
+        """Insert / update games by id (replace=True: the list becomes the whole catalog)"""
+        with self._lock:
+            self._check_base_version(base_version)
+            changed = self._upsert(self._games, games, replace)
+            if changed:
+                self.games_version = self._bump()
+            return changed
+
+    def delete_games(self, game_ids, base_version=None):
+        """Remove games by id (unknown ids are ignored)"""
+        with self._lock:
+            self._check_base_version(base_version)
+            changed = self._delete(self._games, game_ids)
+            if changed:
+                self.games_version = self._bump()
+            return changed
+
+    def upsert_users(self, users, replace=False, base_version=None):
+        """Insert / update users by id (replace=True: the list becomes the whole user base)"""
+        with self._lock:
+            self._check_base_version(base_version)
+            changed = self._upsert(self._users, users, replace)
+            if changed:
+                self.users_version = self._bump()
+            return changed
+
+    def delete_users(self, user_ids, base_version=None):
+        """Remove users by id (unknown ids are ignored)"""
+        with self._lock:
+            self._check_base_version(base_version)
+            changed = self._delete(self._users, user_ids)
+            if changed:
+                self.users_version = self._bump()
+            return changed
+
+    def patch_interactions(self, patches, base_version=None):
+        """
+        Replace interaction fields of existing users
+        patches: [{"user_id": 1, "favorite_games": [...], "purchased_games": {...}, "interactions": [...]}, ...]
+        Only INTERACTION_FIELDS are taken; other keys and unknown users are ignored
+
+        Returns:
+            Number of users whose interactions changed
+        """
+        with self._lock:
+            self._check_base_version(base_version)
+            changed = 0
+            for patch in patches:
+                user = self._users.get(patch.get('user_id'))
+                if user is None:
+                    continue
+                fields = {field: patch[field] for field in INTERACTION_FIELDS if field in patch}
+                if any(user.get(field) != value for field, value in fields.items()):
+                    # New record object → snapshots already handed out stay unchanged
+                    self._users[user['id']] = dict(user, **fields)
+                    changed += 1
+            if changed:
+                self.users_version = self._bump()
+            return changed
+
+    def restore(self, epoch, version, games, users):
+        """
+        Reload the state of an earlier store instance at one version (model snapshot at startup)
+        Callers synced up to that version keep working without a resync; games_version and
+        users_version restart at `version` (only their later moves matter)
+        """
+        with self._lock:
+            self.epoch = epoch
+            self.version = self.games_version = self.users_version = version
+            self._games = {}
+            self._users = {}
+            self._upsert(self._games, games, replace=False)
+            self._upsert(self._users, users, replace=False)
+            self._snapshot = None
+
+    # ---------------------------------------------------------------- helpers
+
+    def _check_base_version(self, base_version):
+        if base_version is not None and base_version != self.version:
+            raise DataVersionError(base_version, self.version)
+
+    def _bump(self):
+        self.version += 1
+        return self.version
+
+    @staticmethod
+    def _upsert(records, items, replace):
+        """Upsert items into records → number of records added, changed or dropped"""
+        incoming = {}
+        for item in items:
+            if not isinstance(item, dict) or 'id' not in item:
+                raise ValueError("every record needs an 'id'")
+            incoming[item['id']] = item
+
+        changed = 0
+        if replace:
+            for record_id in [record_id for record_id in records if record_id not in incoming]:
+                del records[record_id]
+                changed += 1
+
+        for record_id, item in incoming.items():
+            if records.get(record_id) != item:
+                records[record_id] = item
+                changed += 1
+        return changed
+
+    @staticmethod
+    def _delete(records, record_ids):
+        changed = 0
+        for record_id in record_ids:
+            if records.pop(record_id, None) is not None:
+                changed += 1
+        return changed
@@ -0,0 +1,202 @@
+"""
+Game Feature Store
+Columnar view of the game catalog shared by all scoring components
+- Built once per catalog version (one row per games_data record, same order)
+- Numeric fields → NumPy arrays (release_date parsed once into release_year)
+- Single-valued categoricals (publisher, age_rating, mode) → integer codes (-1 = missing)
+- Multi-valued categoricals (genre, platform, language) → ragged codes (original order)
+  + CSR multi-hot count matrix (rows × vocabulary)
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+NUMERIC_FIELDS = ('price', 'rating', 'downloads', 'capacity')
+CATEGORICAL_FIELDS = ('publisher', 'age_rating', 'mode')
+MULTI_VALUED_FIELDS = ('genre', 'platform', 'language')
+
+# Release date used when a game has no 'release_date' key
+DEFAULT_RELEASE_DATE = '2020-01-01'
+
+
+def _as_number(value):
+    """Numeric field value as float (non-numeric → 0.0)"""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    return 0.0
+
+
+def _parse_year(release_date):
+    """(year, known) from a 'YYYY-MM-DD' string - known is False when missing or malformed"""
+    try:
+        if release_date:
+            return int(release_date.split('-')[0]), True
+    except Exception:
+        pass
+    return 0, False
+
+
+def _parse_ram_gb(ram):
+    """RAM in GB from a spec string like '8GB' (0 when malformed)"""
+    try:
+        return int(ram.replace('GB', ''))
+    except Exception:
+        return 0
+
+
+def _as_list(value):
+    """Multi-valued field as a list (a single string counts as one value)"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return []
+
+
+class GameFeatureStore:
+    """Columnar game catalog (rows follow the games list passed in)"""
+
+    def __init__(self, games):
+        """
+        Args:
+            games: List of game records (games_data order)
+        """
+        games = list(games)
+        self.n_games = len(games)
+        self.ids = np.array([game['id'] for game in games])
+
+        # id → first row with that id (same as games_by_id keeping the first record)
+        self.row_by_id = {}
+        for row, game in enumerate(games):
+            self.row_by_id.setdefault(game['id'], row)
+
+        for field in NUMERIC_FIELDS:
+            setattr(self, field, np.array([_as_number(game.get(field, 0)) for game in games], dtype=np.float64))
+
+        years = [_parse_year(game.get('release_date', DEFAULT_RELEASE_DATE)) for game in games]
+        self.release_year = np.array([year for year, _ in years], dtype=np.int64)
+        self.release_year_known = np.array([known for _, known in years], dtype=bool)
+
+        self.multiplayer = np.array([bool(game.get('multiplayer', False)) for game in games], dtype=bool)
+
+        # Minimum spec (raw CPU/GPU names, parsed RAM)
+        min_specs = [game.get('min_spec') or {} for game in games]
+        self.min_cpu = [spec.get('cpu', '') for spec in min_specs]
+        self.min_gpu = [spec.get('gpu', '') for spec in min_specs]
+        self.min_ram_gb = np.array([_parse_ram_gb(spec.get('ram', '0GB')) for spec in min_specs], dtype=np.float64)
+
+        self.vocab = {}        # {field: [label, ...]}
+        self.vocab_index = {}  # {field: {label: code}}
+        self.codes = {}        # {field: int32 codes} for single-valued fields
+        self.multi_codes = {}  # {field: (indptr, codes)} for multi-valued fields
+        self.multi_hot = {}    # {field: CSR rows × vocabulary (occurrence counts)}
+
+        for field in CATEGORICAL_FIELDS:
+            index = self.vocab_index.setdefault(field, {})
+            codes = np.full(self.n_games, -1, dtype=np.int32)
+            for row, game in enumerate(games):
+                value = game.get(field, '')
+                if value:
+                    codes[row] = index.setdefault(value, len(index))
+            self.codes[field] = codes
+            self.vocab[field] = list(index)
+
+        for field in MULTI_VALUED_FIELDS:
+            index = self.vocab_index.setdefault(field, {})
+            indptr = [0]
+            codes = []
+            for game in games:
+                for value in _as_list(game.get(field, [])):
+                    codes.append(index.setdefault(value, len(index)))
+                indptr.append(len(codes))
+            indptr = np.array(indptr, dtype=np.int64)
+            codes = np.array(codes, dtype=np.int32)
+            self.multi_codes[field] = (indptr, codes)
+            self.vocab[field] = list(index)
+
+            # Duplicates are summed → counts (0/1 multi-hot for clean data)
+            # (copies: sum_duplicates sorts indices in place and must not reorder the ragged codes)
+            matrix = csr_matrix(
+                (np.ones(len(codes)), codes.copy(), indptr.copy()),
+                shape=(self.n_games, len(index))
+            )
+            matrix.sum_duplicates()
+            self.multi_hot[field] = matrix
+
+    def to_arrays(self):
+        """(arrays, meta) for a model snapshot"""
+        arrays = {
+            'ids': self.ids,
+            'release_year': self.release_year,
+            'release_year_known': self.release_year_known,
+            'multiplayer': self.multiplayer,
+            'min_ram_gb': self.min_ram_gb,
+        }
+        for field in NUMERIC_FIELDS:
+            arrays[field] = getattr(self, field)
+        for field, codes in self.codes.items():
+            arrays[f'codes.{field}'] = codes
+        for field, (indptr, codes) in self.multi_codes.items():
+            arrays[f'multi_indptr.{field}'] = indptr
+            arrays[f'multi_codes.{field}'] = codes
+            arrays[f'multi_hot.{field}'] = self.multi_hot[field]
+        meta = {'vocab': self.vocab, 'min_cpu': self.min_cpu, 'min_gpu': self.min_gpu}
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        """Feature store restored from to_arrays() output (arrays may be read-only memory maps)"""
+        store = cls.__new__(cls)
+        store.ids = arrays['ids']
+        store.n_games = len(store.ids)
+        store.row_by_id = {}
+        for row, game_id in enumerate(store.ids.tolist()):
+            store.row_by_id.setdefault(game_id, row)
+        for field in NUMERIC_FIELDS:
+            setattr(store, field, arrays[field])
+        store.release_year = arrays['release_year']
+        store.release_year_known = arrays['release_year_known']
+        store.multiplayer = arrays['multiplayer']
+        store.min_cpu = meta['min_cpu']
+        store.min_gpu = meta['min_gpu']
+        store.min_ram_gb = arrays['min_ram_gb']
+        store.vocab = meta['vocab']
+        store.vocab_index = {field: {label: code for code, label in enumerate(labels)} for field, labels in store.vocab.items()}
+        store.codes = {field: arrays[f'codes.{field}'] for field in CATEGORICAL_FIELDS}
+        store.multi_codes = {
+            field: (arrays[f'multi_indptr.{field}'], arrays[f'multi_codes.{field}']) for field in MULTI_VALUED_FIELDS
+        }
+        store.multi_hot = {field: arrays[f'multi_hot.{field}'] for field in MULTI_VALUED_FIELDS}
+        return store
+
+    def row(self, game_id):
+        """Row of a game id (None if not in the catalog)"""
+        return self.row_by_id.get(game_id)
+
+    def release_years(self, default):
+        """Release year per row, with `default` where the date is missing or malformed"""
+        return np.where(self.release_year_known, self.release_year, default)
+
+    def label(self, field, row):
+        """Label of a single-valued field for a row (None if missing)"""
+        code = self.codes[field][row]
+        return self.vocab[field][code] if code >= 0 else None
+
+    def labels(self, field, row):
+        """Labels of a multi-valued field for a row (original order, duplicates kept)"""
+        indptr, codes = self.multi_codes[field]
+        vocab = self.vocab[field]
+        return [vocab[code] for code in codes[indptr[row]:indptr[row + 1]]]
+
+    def memory_bytes(self):
+        """Approximate memory held by the arrays"""
+        total = self.ids.nbytes + self.release_year.nbytes + self.release_year_known.nbytes
+        total += self.multiplayer.nbytes + self.min_ram_gb.nbytes
+        total += sum(getattr(self, field).nbytes for field in NUMERIC_FIELDS)
+        total += sum(codes.nbytes for codes in self.codes.values())
+        for indptr, codes in self.multi_codes.values():
+            total += indptr.nbytes + codes.nbytes
+        for matrix in self.multi_hot.values():
+            total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        return total
@@ -1,15 +1,26 @@
+import copy
 import json
 import numpy as np
 import pandas as pd
-from scipy.sparse.linalg import svds
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import svds, LinearOperator
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import StandardScaler
 import warnings
 import sys
 import io
 import sqlite3
+import threading
+from collections import ChainMap, OrderedDict
 from datetime import datetime, timedelta
+from similarity_index import SimilarityIndex
+from keyword_index import KeywordIndex, KeywordMatcher, TEXT_FIELD_WEIGHTS
+from game_feature_store import GameFeatureStore
+from preference_boost import PreferenceBoostEngine
+from metrics import stage_timer
+from logging_config import get_logger, debug_enabled, configure_logging
+
+logger = get_logger('recommender')
 
 # Fix encoding for Windows console
 if sys.platform == 'win32':
@@ -24,7 +35,7 @@ try:
     MATPLOTLIB_AVAILABLE = True
 except ImportError:
     MATPLOTLIB_AVAILABLE = False
-    print("Warning: matplotlib not available. Charts will be skipped.")
+    logger.warning("matplotlib not available. Charts will be skipped.")
 
 # ===== GLOBAL WEIGHT CONFIGURATIONS =====
     # Các biến toàn cục để dễ quản lý và thay đổi trọng số
@@ -73,25 +84,93 @@ WEIGHTS_COLD_START_WITH_KEYWORD = {
     'keyword': 0.60  # Keyword vẫn quan trọng nhất khi tìm kiếm
 }
 
+# ===== SVD CONFIGURATION =====
+SVD_RANK = 2                      # Số chiều latent factors (k)
+SVD_WARM_START_MAX_CHANGED = 0.1  # Warm start khi <= 10% users thay đổi
+
+# ===== CONTENT SIMILARITY CONFIGURATION =====
+CONTENT_SIMILARITY_TOP_K = 50     # Số neighbours lưu cho mỗi game (bộ nhớ O(N·K))
+CONTENT_SIMILARITY_EXACT = False  # True = giữ ma trận N×N đầy đủ (chỉ dùng để debug)
+
+# Các file load_data() đọc - fingerprint của snapshot model (--snapshot)
+DATA_FILES = (
+    'game.json',
+    'game_recommendation_system/cpu.json',
+    'game_recommendation_system/gpu.json',
+    'library.json',
+)
+
+# Batch recommendations: số users mỗi khối khi tính SVD / content / demographic bằng phép nhân ma trận
+USER_BATCH_BLOCK_SIZE = 256
+
+# Các field tương tác của user - thay đổi bất kỳ field nào → tính lại preferences (cache analyze_user_preferences)
+INTERACTION_FIELDS = (
+    'interactions', 'favorite_games', 'purchased_games', 'view_history',
+    'favorite_games_timestamps', 'purchased_games_timestamps'
+)
+
+# Số profile preferences (user_id, recent_days) giữ trong cache - ít dùng gần đây nhất bị bỏ trước
+PREFERENCE_CACHE_SIZE = 10000
+
 # Kiểm tra tổng trọng số = 1.0
 assert sum(WEIGHTS_NO_KEYWORD.values()) == 1.0, "Tổng trọng số không có keyword phải = 1.0"
 assert sum(WEIGHTS_WITH_KEYWORD.values()) == 1.0, "Tổng trọng số có keyword phải = 1.0"
 assert sum(WEIGHTS_COLD_START_NO_KEYWORD.values()) == 1.0, "Tổng trọng số cold start không có keyword phải = 1.0"
 assert sum(WEIGHTS_COLD_START_WITH_KEYWORD.values()) == 1.0, "Tổng trọng số cold start có keyword phải = 1.0"
 
+class UserPreferenceCache:
+    """LRU giới hạn các profile preferences {(user_id, recent_days): {interactions, expires_at, preferences}}"""
+    
+    def __init__(self, max_entries=PREFERENCE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class GameRecommendationSystem:
     def __init__(self):
         self.games_data = None
         self.users_data = None
         self.cpu_data = None
         self.gpu_data = None
-        self.user_item_matrix = None
+        self.games_by_id = {}  # {game_id: game record} - O(1) lookup
+        self.users_by_id = {}  # {user_id: user record} - O(1) lookup
+        self.feature_store = None  # GameFeatureStore (cột NumPy theo games_data, dùng chung cho các scorer)
+        self.boost_engine = None  # PreferenceBoostEngine (boost factor cho toàn bộ catalog bằng NumPy)
+        self.user_item_matrix = None  # scipy.sparse CSR (users × games)
+        self.user_id_to_index = {}
+        self.game_id_to_index = {}
         self.svd_model = None
-        self.content_similarity_matrix = None
+        self.content_similarity_matrix = None  # Chỉ có khi CONTENT_SIMILARITY_EXACT = True
+        self.similarity_index = None  # SimilarityIndex (top-K neighbours + exact queries)
+        self.demographic_model = None  # Nhóm users theo (gender, age) + vector điểm game của từng nhóm
+        self.keyword_index = None  # KeywordIndex (inverted index cho keyword search)
+        self.keyword_matcher = None  # KeywordMatcher (keyword_library biên dịch sẵn cho expand_query)
         self.games_df = None
         self.users_df = None
         # Adaptive preferences
-        self.user_preferences = {}  # Cache user preferences
+        self.user_preferences = UserPreferenceCache()  # Cache user preferences (LRU, PREFERENCE_CACHE_SIZE profiles)
         # MySQL Integrated Data (set via initialization or setter)
         self.use_sqlite = False  # Always False as we now use MySQL data directly
         
@@ -116,123 +195,259 @@ class GameRecommendationSystem:
             with open('library.json', 'r', encoding='utf-8') as f:
                 library_data = json.load(f)
                 self.keyword_library = library_data['keywords']
+                self.keyword_matcher = KeywordMatcher(self.keyword_library)
                 
-            print("✓ Using integrated MySQL data path")
+            logger.info("Using integrated MySQL data path")
             self.use_sqlite = False
             
-            print("Load du lieu thanh cong!")
+            logger.info("Load du lieu thanh cong!")
             return True
         except Exception as e:
-            print(f"Loi khi load du lieu: {e}")
+            logger.error("Loi khi load du lieu: %s", e)
             return False
     
     def preprocess_data(self):
         """Tiền xử lý dữ liệu"""
         # 🔒 FIX: Sắp xếp dữ liệu đầu vào theo ID để đảm bảo thứ tự nhất quán
         # Giúp đồng bộ Matrix giữa các lần chạy khác nhau và giữa các môi trường (API vs Script)
-        self.games_data.sort(key=lambda x: int(x['id']))
-        self.users_data.sort(key=lambda x: int(x['id']))
+        # sorted() tạo list mới: list truyền vào (vd. DataSnapshot dùng chung giữa các thread) không bị sửa tại chỗ
+        self.games_data = sorted(self.games_data, key=lambda x: int(x['id']))
+        self.users_data = sorted(self.users_data, key=lambda x: int(x['id']))
+        
+        # ⚡ Bảng tra cứu O(1) theo ID (thay cho next(...) duyệt tuyến tính)
+        self.build_lookup_tables()
+        
+        # ⚡ Kho đặc trưng dạng cột (parse release_date, mã hóa genre/platform/publisher... 1 lần)
+        self.feature_store = GameFeatureStore(self.games_data)
+        self.boost_engine = PreferenceBoostEngine(self.feature_store)
 
         # Convert to DataFrame
         self.games_df = pd.DataFrame(self.games_data)
         self.users_df = pd.DataFrame(self.users_data)
         
         # Tạo rating matrix từ favorite_games, purchased_games, và view_history (implicit feedback)
-        # Giả sử: favorite = 5, purchased = 3, view = 0.5 (mỗi lần xem), có thể cộng dồn
-        user_game_ratings = []
+        # Giả sử: favorite = 3, purchased = rating, view = 0.5 (mỗi lần xem), có thể cộng dồn
+        # ⚡ Sparse: chỉ duyệt các tương tác thực tế thay vì users × games
+        self.user_item_matrix, self.user_id_to_index, self.game_id_to_index = self.build_user_item_matrix()
+        self.user_ids = list(self.user_id_to_index.keys())
+        self.game_ids = list(self.game_id_to_index.keys())
+        
+        # ⚡ Mô hình demographic dựng sẵn 1 lần cho mỗi phiên bản dữ liệu
+        self.build_demographic_model()
         
+        # ⚡ Inverted index cho keyword search (dựng 1 lần cho mỗi phiên bản catalog)
+        self.keyword_index = KeywordIndex(self.games_by_id.values(), self.feature_store)
+        
+        logger.info("Tien xu ly du lieu thanh cong! User-Item Matrix shape: %s (%d interactions)",
+                    self.user_item_matrix.shape, self.user_item_matrix.nnz)
+    
+    def build_lookup_tables(self):
+        """Xây dựng bảng tra cứu id → record cho games và users (giữ bản ghi đầu tiên nếu trùng ID)"""
+        self.games_by_id = {}
+        for game in self.games_data:
+            self.games_by_id.setdefault(game['id'], game)
+        self.users_by_id = {}
         for user in self.users_data:
-            user_id = user['id']
-            favorites = user.get('favorite_games', [])
-            purchased = user.get('purchased_games', {})  # Now a dictionary: {game_id: rating}
-            view_history = user.get('view_history', [])
-            
-            for game in self.games_data:
-                game_id = game['id']
-                str_game_id = str(game_id)
-                rating = 0.0
-                
-                # Tính điểm cộng dồn cho trường hợp trùng lặp
-                # FIX: Handle cả int và string cho game_id để tránh miss data
-                if game_id in favorites or str_game_id in [str(x) for x in favorites]:
-                    rating += 3.0  # Favorite games
-                    
-                if str_game_id in purchased:
-                    rating += purchased[str_game_id]
-                elif game_id in purchased:
-                    rating += purchased[game_id]
-                
-                # Thêm điểm từ view history (0.5 điểm mỗi lần xem)
-                if str_game_id in view_history:
-                    view_count = view_history[str_game_id]
-                elif game_id in view_history:
-                    view_count = view_history[game_id]
-                else:
-                    view_count = 0
-                    
-                rating += view_count * 0.5  # 0.5 điểm mỗi lần xem
-                
-                # Nếu vừa favorite vừa purchased vừa xem nhiều lần = 3.0 + rating + (số lần xem * 0.5)
-                
-                user_game_ratings.append({
-                    'user_id': user_id,
-                    'game_id': game_id,
-                    'rating': rating
-                })
+            self.users_by_id.setdefault(user['id'], user)
+    
+    def build_user_item_matrix(self):
+        """
+        Xây dựng user-item rating matrix dạng sparse (CSR) từ các tương tác thực tế
         
-        # Tạo user-item matrix
-        ratings_df = pd.DataFrame(user_game_ratings)
+        Chỉ duyệt favorite_games, purchased_games và view_history của từng user,
+        nên chi phí tỉ lệ với số tương tác chứ không phải users × games.
+        (Trường 'interactions' là tập con 7 ngày của chính dữ liệu này, dùng cho
+        adaptive boosting, nên không cộng thêm vào matrix để tránh tính trùng.)
         
-        # Loại bỏ duplicate entries nếu có
-        ratings_df = ratings_df.drop_duplicates(subset=['user_id', 'game_id'], keep='last')
+        Returns:
+            (csr_matrix users × games, {user_id: row_index}, {game_id: col_index})
+        """
+        # Thứ tự hàng/cột theo ID (giống pivot trước đây)
+        user_id_to_index = {}
+        for user in self.users_data:
+            user_id_to_index.setdefault(user['id'], len(user_id_to_index))
+        game_id_to_index = {}
+        for game in self.games_data:
+            game_id_to_index.setdefault(game['id'], len(game_id_to_index))
         
-        self.user_item_matrix = ratings_df.pivot(index='user_id', columns='game_id', values='rating').fillna(0)
+        # FIX: Handle cả int và string cho game_id để tránh miss data
+        str_game_index = {}
+        for game_id, col in game_id_to_index.items():
+            str_game_index.setdefault(str(game_id), col)
         
-        print("Tien xu ly du lieu thanh cong!")
-        print(f"User-Item Matrix shape: {self.user_item_matrix.shape}")
+        # {row: {col: rating}} - user trùng ID thì lấy bản ghi cuối (như drop_duplicates keep='last')
+        rows_ratings = {}
+        for user in self.users_data:
+            favorites = user.get('favorite_games', [])
+            purchased = user.get('purchased_games', {})  # Now a dictionary: {game_id: rating}
+            view_history = user.get('view_history', {})
+            
+            user_ratings = {}
+            
+            # Favorite games: +3.0 (một lần cho mỗi game)
+            for col in {str_game_index.get(str(game_id)) for game_id in favorites}:
+                if col is not None:
+                    user_ratings[col] = user_ratings.get(col, 0.0) + 3.0
+            
+            # Purchased games: + rating (key dạng string được ưu tiên)
+            for game_id, rating in purchased.items():
+                if not isinstance(game_id, str) and str(game_id) in purchased:
+                    continue
+                col = str_game_index.get(str(game_id))
+                if col is not None:
+                    user_ratings[col] = user_ratings.get(col, 0.0) + rating
+            
+            # View history: 0.5 điểm mỗi lần xem
+            for game_id, view_count in view_history.items():
+                if not isinstance(game_id, str) and str(game_id) in view_history:
+                    continue
+                col = str_game_index.get(str(game_id))
+                if col is not None:
+                    user_ratings[col] = user_ratings.get(col, 0.0) + view_count * 0.5
+            
+            rows_ratings[user_id_to_index[user['id']]] = user_ratings
+        
+        row_idx, col_idx, values = [], [], []
+        for row, user_ratings in rows_ratings.items():
+            for col, rating in user_ratings.items():
+                if rating != 0:
+                    row_idx.append(row)
+                    col_idx.append(col)
+                    values.append(rating)
+        
+        matrix = coo_matrix(
+            (np.array(values, dtype=np.float64), (np.array(row_idx, dtype=np.int64), np.array(col_idx, dtype=np.int64))),
+            shape=(len(user_id_to_index), len(game_id_to_index))
+        ).tocsr()
+        
+        return matrix, user_id_to_index, game_id_to_index
     
-    def train_svd_model(self, k=2):
-        """Huấn luyện mô hình SVD"""
+    def train_svd_model(self, k=None, warm_start=None):
+        """
+        Huấn luyện mô hình SVD trên sparse matrix
+        
+        - Mean-centering (trừ mean của mỗi user) được áp dụng ngầm qua LinearOperator,
+          không tạo ma trận dense users × games
+        - Chỉ lưu các factor (U, sigma, Vt, mean); điểm dự đoán tính theo từng user
+          khi cần (predict_user_ratings) → bộ nhớ O((U+G)·k) thay vì O(U·G)
+        
+        Args:
+            k: Số chiều SVD (mặc định: SVD_RANK)
+            warm_start: GameRecommendationSystem đã train trước đó. Nếu catalog không đổi
+                        và chỉ một phần nhỏ users thay đổi (<= SVD_WARM_START_MAX_CHANGED),
+                        factors cũ được dùng làm vector khởi tạo cho ARPACK
+        """
         try:
             # 🔒 FIX: Cố định random seed để kết quả SVD nhất quán tuyệt đối giữa các lần chạy
             # Giúp đồng bộ điểm số giữa Python script (offline) và API Service (online)
             np.random.seed(42) 
+            
+            if k is None:
+                k = SVD_RANK
+            
+            ratings = self.user_item_matrix
+            n_users, n_games = ratings.shape
+            if k >= min(n_users, n_games):
+                k = max(1, min(n_users, n_games) - 1)
+                logger.info("SVD rank giam xuong k=%d (matrix %dx%d)", k, n_users, n_games)
 
-            # Chuẩn hóa dữ liệu (trừ mean của mỗi user)
-            user_ratings_mean = np.mean(self.user_item_matrix.values, axis=1)
-            ratings_demeaned = self.user_item_matrix.values - user_ratings_mean.reshape(-1, 1)
+            # Chuẩn hóa dữ liệu (trừ mean của mỗi user) - ngầm định, không densify
+            user_ratings_mean = np.asarray(ratings.sum(axis=1)).ravel() / n_games
+            ratings_t = ratings.T.tocsr()
+            
+            def matvec(x):
+                x = np.asarray(x).ravel()
+                return ratings @ x - user_ratings_mean * x.sum()
+            
+            def rmatvec(y):
+                y = np.asarray(y).ravel()
+                return ratings_t @ y - np.full(n_games, user_ratings_mean @ y)
             
-            # Áp dụng SVD
-            U, sigma, Vt = svds(ratings_demeaned, k=k)
-            sigma = np.diag(sigma)
+            def matmat(X):
+                return ratings @ X - np.outer(user_ratings_mean, X.sum(axis=0))
             
-            # Tái tạo ma trận rating
-            predicted_ratings = np.dot(np.dot(U, sigma), Vt) + user_ratings_mean.reshape(-1, 1)
+            def rmatmat(Y):
+                return ratings_t @ Y - np.outer(np.ones(n_games), user_ratings_mean @ Y)
             
-            # Lưu kết quả
+            ratings_demeaned = LinearOperator(
+                shape=(n_users, n_games), dtype=np.float64,
+                matvec=matvec, rmatvec=rmatvec, matmat=matmat, rmatmat=rmatmat
+            )
+            
+            # Áp dụng SVD (warm start nếu chỉ vài users thay đổi)
+            v0 = self._svd_warm_start_vector(warm_start, k) if warm_start is not None else None
+            U, sigma, Vt = svds(ratings_demeaned, k=k, v0=v0)
+            
+            # Lưu kết quả (chỉ factors, không lưu predicted_ratings dense)
             self.svd_model = {
                 'U': U,
                 'sigma': sigma,
                 'Vt': Vt,
+                'user_factors': U * sigma,  # U·Σ, dùng để tính dự đoán theo từng user
                 'user_ratings_mean': user_ratings_mean,
-                'predicted_ratings': predicted_ratings
+                'k': k,
+                'warm_started': v0 is not None
             }
             
-            print(f"Huan luyen SVD model voi k={k} thanh cong!")
+            logger.info("Huan luyen SVD model voi k=%d thanh cong! (%s)", k, "warm start" if v0 is not None else "cold start")
             return True
         except Exception as e:
-            print(f"Loi khi huan luyen SVD: {e}")
+            logger.exception("Loi khi huan luyen SVD: %s", e)
             return False
     
+    def _svd_warm_start_vector(self, previous, k):
+        """
+        Tạo vector khởi tạo ARPACK từ factors của model trước
+        Trả về None nếu không thể warm start (catalog đổi, quá nhiều users đổi, k khác...)
+        """
+        prev_model = getattr(previous, 'svd_model', None)
+        prev_matrix = getattr(previous, 'user_item_matrix', None)
+        if not prev_model or prev_matrix is None or prev_model.get('k') != k:
+            return None
+        
+        # Catalog phải giữ nguyên thứ tự cột
+        if list(previous.game_id_to_index.keys()) != list(self.game_id_to_index.keys()):
+            return None
+        
+        n_users, n_games = self.user_item_matrix.shape
+        # prev_rows[row] = hàng của cùng user trong model trước (-1 nếu user mới)
+        prev_rows = np.full(n_users, -1, dtype=np.int64)
+        rows = np.fromiter(self.user_id_to_index.values(), dtype=np.int64, count=len(self.user_id_to_index))
+        prev_rows[rows] = [previous.user_id_to_index.get(user_id, -1) for user_id in self.user_id_to_index]
+        kept_rows = np.flatnonzero(prev_rows >= 0)
+        
+        # Đếm số users thay đổi (mới hoặc khác hàng rating): so sánh cả ma trận sau khi căn hàng
+        diff = (self.user_item_matrix.tocsr()[kept_rows] != prev_matrix.tocsr()[prev_rows[kept_rows]]).tocsr()
+        changed_users = (n_users - len(kept_rows)) + int(np.count_nonzero(np.diff(diff.indptr)))
+        if changed_users > SVD_WARM_START_MAX_CHANGED * n_users:
+            return None
+        
+        # svds lặp trên không gian nhỏ hơn: users (left vectors) nếu users < games, ngược lại games
+        if n_users >= n_games:
+            v0 = prev_model['Vt'].T @ prev_model['sigma']
+        else:
+            v0 = np.zeros(n_users)
+            prev_user_factors = prev_model['U'] @ prev_model['sigma']
+            v0[kept_rows] = prev_user_factors[prev_rows[kept_rows]]
+        
+        if not np.any(v0):
+            return None
+        return v0
+    
+    def predict_user_ratings(self, user_id):
+        """Tính predicted ratings (U·Σ·Vt + mean) cho MỘT user theo thứ tự game_ids"""
+        if self.svd_model is None:
+            return None
+        row = self.user_id_to_index.get(user_id)
+        if row is None:
+            return None
+        return self.svd_model['user_factors'][row] @ self.svd_model['Vt'] + self.svd_model['user_ratings_mean'][row]
+    
     def build_content_similarity(self):
         """Xây dựng ma trận tương đồng content-based với nhiều thuộc tính chi tiết"""
         try:
-            from sklearn.preprocessing import StandardScaler
-            import numpy as np
-            
             # Tạo features chi tiết và đa dạng
             text_features = []
-            numeric_features = []
             
             for game in self.games_data:
                 # === TEXT FEATURES ===
@@ -271,64 +486,12 @@ class GameRecommendationSystem:
                 text_feature = f"{genre_weighted} {publisher} {age_rating} {platform_str} {mode} {multiplayer} {language_str} {description_str}"
                 text_features.append(text_feature)
                 
-                # === NUMERIC FEATURES ===
-                # Rating (chuẩn hóa về 0-1)
-                rating = game.get('rating', 0)
-                rating_normalized = rating / 5.0 if rating > 0 else 0
-                
-                # Price (chuẩn hóa về log scale)
-                price = game.get('price', 0)
-                price_normalized = np.log10(max(price, 1)) / 7.0  # Chuẩn hóa về 0-1
-                
-                # Downloads (chuẩn hóa về log scale)
-                downloads = game.get('downloads', 0)
-                downloads_normalized = np.log10(max(downloads, 1)) / 9.0  # Chuẩn hóa về 0-1
-                
-                # Capacity (GB)
-                capacity = game.get('capacity', 0)
-                capacity_normalized = min(capacity / 100.0, 1.0)  # Chuẩn hóa về 0-1
-                
-                # Release date (chuẩn hóa)
-                release_date = game.get('release_date', '2020-01-01')
-                try:
-                    release_year = int(release_date.split('-')[0]) if release_date else 2020
-                except:
-                    release_year = 2020
-                year_normalized = (release_year - 1990) / 35.0  # Chuẩn hóa về 0-1
-                
-                # CPU Score từ min_spec
-                min_spec = game.get('min_spec', {})
-                cpu_name = min_spec.get('cpu', '')
-                cpu_score = self.get_cpu_score(cpu_name)
-                cpu_normalized = min(cpu_score / 60000.0, 1.0)  # Chuẩn hóa về 0-1 (max ~60k)
-                
-                # GPU Score từ min_spec
-                gpu_name = min_spec.get('gpu', '')
-                gpu_score = self.get_gpu_score(gpu_name)
-                gpu_normalized = min(gpu_score / 40000.0, 1.0)  # Chuẩn hóa về 0-1 (max ~40k)
-                
-                # RAM (GB)
-                ram_str = min_spec.get('ram', '0GB')
-                try:
-                    ram_gb = int(ram_str.replace('GB', ''))
-                    ram_normalized = min(ram_gb / 32.0, 1.0)  # Chuẩn hóa về 0-1
-                except:
-                    ram_normalized = 0
-                
-                # Kết hợp numeric features
-                numeric_feature = [
-                    rating_normalized, price_normalized, downloads_normalized,
-                    capacity_normalized, year_normalized, cpu_normalized,
-                    gpu_normalized, ram_normalized
-                ]
-                numeric_features.append(numeric_feature)
-            
             # Tính TF-IDF cho text features
             tfidf = TfidfVectorizer(stop_words='english', lowercase=True, min_df=1, max_features=1000)
             text_matrix = tfidf.fit_transform(text_features)
             
             # Chuẩn hóa numeric features
-            numeric_array = np.array(numeric_features)
+            numeric_array = self.build_numeric_content_features()
             scaler = StandardScaler()
             numeric_matrix = scaler.fit_transform(numeric_array)
             
@@ -339,23 +502,115 @@ class GameRecommendationSystem:
             # Kết hợp với trọng số: Text (1x), Numeric (0.5x)
             combined_matrix = hstack([text_matrix, numeric_sparse * 0.5])
             
-            # Tính cosine similarity
-            similarity_matrix = cosine_similarity(combined_matrix)
-            
-            # Lưu ma trận similarity
-            self.content_similarity_matrix = similarity_matrix
-            
-            print("Xay dung content similarity matrix chi tiet thanh cong!")
-            print(f"Text features: {text_matrix.shape[1]} dimensions")
-            print(f"Numeric features: {numeric_matrix.shape[1]} dimensions")
-            print(f"Total features: {combined_matrix.shape[1]} dimensions")
-            print("Content similarity calculated with detailed features")
-            print(f"Similarity range: {similarity_matrix.min():.3f} - {similarity_matrix.max():.3f}")
+            # Xây dựng similarity index (top-K neighbours, không lưu ma trận N×N)
+            self.similarity_index = SimilarityIndex(
+                combined_matrix,
+                top_k=CONTENT_SIMILARITY_TOP_K,
+                exact=CONTENT_SIMILARITY_EXACT
+            )
+            self.content_similarity_matrix = self.similarity_index.exact_matrix
+            
+            logger.info(
+                "Xay dung content similarity index chi tiet thanh cong! Features: %d text + %d numeric = %d, "
+                "neighbours: top-%d per game (%.0f KB)",
+                text_matrix.shape[1], numeric_matrix.shape[1], combined_matrix.shape[1],
+                self.similarity_index.top_k, self.similarity_index.memory_bytes() / 1024
+            )
             return True
         except Exception as e:
-            print(f"Loi khi xay dung content similarity: {e}")
+            logger.exception("Loi khi xay dung content similarity: %s", e)
             return False
     
+    def build_numeric_content_features(self):
+        """
+        Numeric features cho content similarity (mỗi dòng games_data 1 vector, tính theo cột từ feature store)
+        rating, price, downloads, capacity, release year, CPU/GPU score và RAM của min_spec - chuẩn hóa về 0-1
+        """
+        if self.feature_store is None:
+            self.feature_store = GameFeatureStore(self.games_data)
+        features = self.feature_store
+        
+        # Rating (chuẩn hóa về 0-1)
+        rating_normalized = np.where(features.rating > 0, features.rating / 5.0, 0)
+        
+        # Price, Downloads (chuẩn hóa về log scale)
+        price_normalized = np.log10(np.maximum(features.price, 1)) / 7.0
+        downloads_normalized = np.log10(np.maximum(features.downloads, 1)) / 9.0
+        
+        # Capacity (GB)
+        capacity_normalized = np.minimum(features.capacity / 100.0, 1.0)
+        
+        # Release date (thiếu/sai định dạng → 2020)
+        year_normalized = (features.release_years(2020) - 1990) / 35.0
+        
+        # CPU/GPU Score từ min_spec (tra cứu 1 lần cho mỗi tên CPU/GPU khác nhau)
+        cpu_scores = {}
+        for name in set(features.min_cpu):
+            cpu_scores[name] = min(self.get_cpu_score(name) / 60000.0, 1.0)  # max ~60k
+        gpu_scores = {}
+        for name in set(features.min_gpu):
+            gpu_scores[name] = min(self.get_gpu_score(name) / 40000.0, 1.0)  # max ~40k
+        cpu_normalized = np.array([cpu_scores[name] for name in features.min_cpu], dtype=np.float64)
+        gpu_normalized = np.array([gpu_scores[name] for name in features.min_gpu], dtype=np.float64)
+        
+        # RAM (GB)
+        ram_normalized = np.minimum(features.min_ram_gb / 32.0, 1.0)
+        
+        return np.column_stack([
+            rating_normalized, price_normalized, downloads_normalized,
+            capacity_normalized, year_normalized, cpu_normalized,
+            gpu_normalized, ram_normalized
+        ]).astype(np.float64)
+    
+    def get_game_index(self, game_id):
+        """Index (hàng/cột matrix) của game theo ID - chấp nhận cả int và string"""
+        idx = self.game_id_to_index.get(game_id)
+        if idx is None and not isinstance(game_id, int):
+            try:
+                idx = self.game_id_to_index.get(int(game_id))
+            except (ValueError, TypeError):
+                idx = None
+        return idx
+    
+    def get_content_profile_scores(self, user_data):
+        """
+        Content score của TẤT CẢ games cho một user trong một phép tính
+        
+        Weight vector trên các games đã tương tác: favorite +1, purchased +1, view +view_count
+        (giống danh sách có lặp lại trước đây). Content score = trung bình similarity có trọng số
+        = (S · w) / Σw, tính qua similarity index (không cần ma trận N×N).
+        
+        Returns:
+            np.array content scores theo thứ tự game index, hoặc None nếu không có tương tác hợp lệ
+        """
+        if self.similarity_index is None or not user_data:
+            return None
+        
+        weights = self.get_content_profile_weights(user_data)
+        total_weight = weights.sum()
+        if total_weight == 0:
+            return None
+        
+        return self.similarity_index.profile_scores(weights) / total_weight
+    
+    def get_content_profile_weights(self, user_data):
+        """Weight vector (theo game index) trên các games user đã tương tác: favorite +1, purchased +1, view +view_count"""
+        weights = np.zeros(self.similarity_index.n_items)
+        
+        def add_weight(game_id, weight):
+            idx = self.get_game_index(game_id)
+            if idx is not None and weight > 0:
+                weights[idx] += weight
+        
+        for game_id in user_data.get('favorite_games', []):
+            add_weight(game_id, 1)
+        for game_id in user_data.get('purchased_games', {}).keys():
+            add_weight(game_id, 1)
+        for game_id, view_count in user_data.get('view_history', {}).items():
+            add_weight(game_id, view_count)
+        
+        return weights
+    
     def get_cpu_score(self, cpu_name):
         """Lấy điểm benchmark CPU"""
         if not self.cpu_data:
@@ -383,46 +638,24 @@ class GameRecommendationSystem:
         Chuyển đổi query tiếng Việt thành keyword chính (English key)
         VD: "ẩn nấp" → "Stealth"
         VD: "hành động" → "Action"
+        
+        Khớp CỤM TỪ (chuỗi con trong synonyms) hoặc TẤT CẢ các từ đơn của từng phrase (tách theo dấu phẩy)
+        ⚡ Dùng KeywordMatcher biên dịch sẵn từ keyword_library + LRU cache query đã mở rộng
         """
         if not query or not hasattr(self, 'keyword_library'):
             return query
         
-        query = query.lower().strip()
-        matched_keys = set()
-        
-        # Tách query theo dấu phẩy (ví dụ: "hành động, kịch tính" → ["hành động", "kịch tính"])
-        query_phrases = [phrase.strip() for phrase in query.split(',')]
-        
-        # Tìm kiếm key chính từ value (synonyms)
-        for english_key, vietnamese_synonyms in self.keyword_library.items():
-            vietnamese_synonyms_lower = vietnamese_synonyms.lower()
-            
-            # Kiểm tra từng phrase trong query
-            for phrase in query_phrases:
-                # Match cả CỤM TỪ và TỪ ĐỚN
-                # Ví dụ: "ẩn nấp" match trong "ẩn nấp stealth sneaking"
-                phrase_words = phrase.split()
-                
-                # Case 1: Match cụm từ hoàn chỉnh (ưu tiên)
-                if phrase in vietnamese_synonyms_lower:
-                    matched_keys.add(english_key)
-                    break
-                
-                # Case 2: Match từng từ đơn (fallback)
-                # Chỉ match nếu TẤT CẢ các từ trong phrase đều có trong synonyms
-                elif all(word in vietnamese_synonyms_lower.split() for word in phrase_words):
-                    matched_keys.add(english_key)
-                    break
-        
-        # Nếu tìm thấy key → trả về key, nếu không → trả về query gốc
-        if matched_keys:
-            return ' '.join(matched_keys)
-        else:
-            return query
+        return self.get_keyword_matcher().expand(query.lower().strip())
+    
+    def get_keyword_matcher(self):
+        """KeywordMatcher của keyword_library hiện tại (biên dịch lại khi library được gán mới)"""
+        if self.keyword_matcher is None or self.keyword_matcher.library is not self.keyword_library:
+            self.keyword_matcher = KeywordMatcher(self.keyword_library)
+        return self.keyword_matcher
     
     def can_run_game(self, user_cpu, user_gpu, user_ram, game_id):
         """Kiểm tra xem user có thể chạy game không"""
-        game = next((g for g in self.games_data if g['id'] == game_id), None)
+        game = self.games_by_id.get(game_id)
         if not game:
             return False, "Game không tồn tại"
         
@@ -468,21 +701,22 @@ class GameRecommendationSystem:
         
         return can_run, performance_level
     
-    def get_svd_recommendations(self, user_id, top_n=5):
-        """Gợi ý dựa trên SVD"""
+    def get_svd_recommendations(self, user_id, top_n=5, component_scores=None):
+        """Gợi ý dựa trên SVD (component_scores: điểm đã tính sẵn theo khối - xem compute_component_scores)"""
         if self.svd_model is None:
             return []
         
         try:
-            user_idx = user_id - 1  # Convert to 0-based index
-            if user_idx >= len(self.svd_model['predicted_ratings']):
+            # Lấy predicted ratings cho user (tính từ factors)
+            if component_scores is not None and 'svd' in component_scores:
+                user_predictions = component_scores['svd']
+            else:
+                user_predictions = self.predict_user_ratings(user_id)
+            if user_predictions is None:
                 return []
             
-            # Lấy predicted ratings cho user
-            user_predictions = self.svd_model['predicted_ratings'][user_idx]
-            
             # Lấy games đã tương tác (để loại bỏ)
-            user_data = next((u for u in self.users_data if u['id'] == user_id), None)
+            user_data = self.users_by_id.get(user_id)
             if user_data:
                 view_history = user_data.get('view_history', {})
                 purchased_games = user_data.get('purchased_games', {})
@@ -492,100 +726,76 @@ class GameRecommendationSystem:
             else:
                 interacted_games = set()
             
-            # Tạo danh sách recommendations
+            # ⚡ Sắp xếp theo predicted rating (stable → cùng thứ tự như sort từng dict),
+            # chỉ tạo dict cho top_n games chưa tương tác
             recommendations = []
-            for game_idx, predicted_rating in enumerate(user_predictions):
-                game_id = game_idx + 1  # Convert back to 1-based
-                if game_id not in interacted_games:
-                    game = next((g for g in self.games_data if g['id'] == game_id), None)
-                    if game:
-                        recommendations.append({
-                            'game_id': game_id,
-                            'game_name': game['name'],
-                            'predicted_rating': predicted_rating,
-                            'actual_rating': game.get('rating', 0),
-                            'genre': game.get('genre', []),
-                            'price': game.get('price', 0),
-                            'downloads': game.get('downloads', 0)
-                        })
+            for game_idx in np.argsort(-np.asarray(user_predictions), kind='stable'):
+                if len(recommendations) >= top_n:
+                    break
+                game_id = self.game_ids[game_idx]
+                if game_id in interacted_games:
+                    continue
+                game = self.games_by_id.get(game_id)
+                if game:
+                    recommendations.append({
+                        'game_id': game_id,
+                        'game_name': game['name'],
+                        'predicted_rating': user_predictions[game_idx],
+                        'actual_rating': game.get('rating', 0),
+                        'genre': game.get('genre', []),
+                        'price': game.get('price', 0),
+                        'downloads': game.get('downloads', 0)
+                    })
             
-            # Sắp xếp theo predicted rating
-            recommendations.sort(key=lambda x: x['predicted_rating'], reverse=True)
-            return recommendations[:top_n]
+            return recommendations
             
         except Exception as e:
-            print(f"Loi SVD recommendations: {e}")
+            logger.exception("Loi SVD recommendations: %s", e)
             return []
     
-    def get_content_recommendations(self, user_id, top_n=5):
-        """Gợi ý dựa trên content similarity"""
-        if self.content_similarity_matrix is None:
+    def get_content_recommendations(self, user_id, top_n=5, component_scores=None):
+        """Gợi ý dựa trên content similarity (component_scores: điểm đã tính sẵn theo khối)"""
+        if self.similarity_index is None:
             return []
         
         try:
             # Lấy thông tin user
-            user_data = next((u for u in self.users_data if u['id'] == user_id), None)
+            user_data = self.users_by_id.get(user_id)
             if not user_data:
                 return []
             
-            # Lấy tất cả games đã tương tác (GIỮ TRÙNG LẶP để tăng trọng số)
+            # Games đã tương tác (để loại bỏ khỏi gợi ý)
             favorite_games = user_data.get('favorite_games', [])
-            purchased_games_dict = user_data.get('purchased_games', {})
-            view_history = user_data.get('view_history', {})
+            purchased_games = [int(game_id) for game_id in user_data.get('purchased_games', {}).keys()]
+            viewed_games = [int(game_id) for game_id, view_count in user_data.get('view_history', {}).items() if view_count > 0]
             
-            # Convert purchased_games dict to list of game_ids (convert to int)
-            purchased_games = [int(game_id) for game_id in purchased_games_dict.keys()]
-            
-            # Tạo danh sách games với trọng số từ view history (convert to int)
-            view_games_weighted = []
-            for game_id, view_count in view_history.items():
-                # Lặp lại game_id theo số lần xem để tăng trọng số
-                view_games_weighted.extend([int(game_id)] * view_count)
-            
-            # KHÔNG dùng set() để giữ trùng lặp - games vừa thích vừa mua vừa xem sẽ xuất hiện nhiều lần
-            interacted_games = favorite_games + purchased_games + view_games_weighted
-            
-            if not interacted_games:
+            unique_interacted = set(favorite_games + purchased_games + viewed_games)
+            if not unique_interacted:
                 return []
             
-            # Lấy unique games để loại bỏ khỏi gợi ý
-            unique_interacted = set(interacted_games)
-            
-            # Tính điểm similarity trung bình có trọng số cho mỗi game
-            game_scores = {}
-            
-            for game_id in range(1, len(self.games_data) + 1):
-                if game_id in unique_interacted:
-                    continue
-                
-                similarity_scores = []
-                for interacted_game_id in interacted_games:  # Dùng list có trùng lặp
-                    # Đảm bảo interacted_game_id là int và trong phạm vi hợp lệ
-                    try:
-                        game_id_int = int(interacted_game_id)
-                        if 1 <= game_id_int <= len(self.games_data):
-                            sim_score = self.content_similarity_matrix[game_id_int - 1][game_id - 1]
-                            similarity_scores.append(sim_score)
-                    except (ValueError, TypeError):
-                        # Bỏ qua nếu không thể convert thành int
-                        continue
-                
-                if similarity_scores:
-                    # Tính content score tự nhiên dựa trên similarity thực tế
-                    avg_similarity = np.mean(similarity_scores)
-                    game_scores[game_id] = avg_similarity
-                else:
-                    # Nếu không có similarity scores, content score = 0 (tự nhiên)
-                    game_scores[game_id] = 0.0
+            # ⚡ Content score cho tất cả games trong một phép tính (weighted profile × similarity)
+            if component_scores is not None and 'content' in component_scores:
+                profile_scores = component_scores['content']
+            else:
+                profile_scores = self.get_content_profile_scores(user_data)
+            if profile_scores is None:
+                # Không có similarity hợp lệ → content score = 0 (tự nhiên)
+                profile_scores = np.zeros(len(self.game_ids))
             
             # Không điều chỉnh ở đây, sẽ điều chỉnh trong get_hybrid_recommendations
             
-            # Sắp xếp và lấy top recommendations
-            sorted_games = sorted(game_scores.items(), key=lambda x: x[1], reverse=True)
+            # ⚡ Sắp xếp (stable) và lấy top recommendations chưa tương tác
+            top_games = []
+            for idx in np.argsort(-np.asarray(profile_scores), kind='stable'):
+                if len(top_games) >= top_n:
+                    break
+                game_id = self.game_ids[idx]
+                if game_id not in unique_interacted:
+                    top_games.append((game_id, profile_scores[idx]))
             
             recommendations = []
-            for game_id, score in sorted_games[:top_n]:
-                game = next((g for g in self.games_data if g['id'] == game_id), None)
+            for game_id, score in top_games:
+                game = self.games_by_id.get(game_id)
                 if game:
                     recommendations.append({
                         'game_id': game_id,
@@ -600,7 +810,7 @@ class GameRecommendationSystem:
             return recommendations
             
         except Exception as e:
-            print(f"Loi Content recommendations: {e}")
+            logger.exception("Loi Content recommendations: %s", e)
             return []
     
     def calculate_demographic_similarity(self, user1, user2):
@@ -638,11 +848,114 @@ class GameRecommendationSystem:
         
         return demographic_similarity
     
-    def get_demographic_recommendations(self, user_id, top_n=5):
-        """Gợi ý dựa trên người dùng có demographic tương tự"""
+    def build_demographic_model(self):
+        """
+        Dựng sẵn mô hình demographic (thay cho vòng lặp games × users mỗi request)
+        - Gom users có age/gender vào nhóm (gender, age) - users thiếu age/gender có similarity = 0 nên bỏ qua
+        - Mỗi user có vector điểm game: favorite = 3.0, ưu tiên hơn purchased (rating) và view (0.5 × lượt xem)
+        - Mỗi nhóm giữ tổng vector điểm + số users → điểm của target = tổng có trọng số theo similarity của nhóm
+        Cột j ứng với game_id = j + 1 (ứng viên là game_id 1..số games như trước)
+        """
+        n_games = len(self.games_data)
+        bucket_index = {}
+        bucket_users = []
+        row_bucket = []
+        rows_by_user = {}
+        rows, cols, values = [], [], []
+        
+        for user in self.users_data:
+            age = user.get('age')
+            gender = user.get('gender')
+            if age is None or gender is None:
+                continue
+            
+            # Điểm theo thứ tự ưu tiên favorite > purchased > view
+            # Chỉ key dạng số mới khớp game_id (key chuỗi từ JSON không khớp, giữ nguyên hành vi cũ)
+            ratings = {}
+            for game_id, view_count in user.get('view_history', {}).items():
+                ratings[game_id] = view_count * 0.5
+            for game_id, rating in user.get('purchased_games', {}).items():
+                ratings[game_id] = rating
+            for game_id in user.get('favorite_games', []):
+                ratings[game_id] = 3.0
+            
+            row = len(row_bucket)
+            for game_id, rating in ratings.items():
+                if isinstance(game_id, (int, np.integer)) and 1 <= game_id <= n_games and rating != 0:
+                    rows.append(row)
+                    cols.append(int(game_id) - 1)
+                    values.append(rating)
+            
+            key = (gender, age)
+            if key not in bucket_index:
+                bucket_index[key] = len(bucket_users)
+                bucket_users.append(user)
+            row_bucket.append(bucket_index[key])
+            rows_by_user.setdefault(user['id'], []).append(row)
+        
+        n_rows = len(row_bucket)
+        user_ratings = coo_matrix(
+            (np.asarray(values, dtype=np.float64), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+            shape=(n_rows, n_games)
+        ).tocsr()
+        
+        # Ma trận gán user → nhóm, tổng điểm mỗi nhóm = membership @ user_ratings
+        row_bucket = np.asarray(row_bucket, dtype=np.int64)
+        membership = coo_matrix(
+            (np.ones(n_rows), (row_bucket, np.arange(n_rows))),
+            shape=(len(bucket_users), n_rows)
+        ).tocsr()
+        
+        self.demographic_model = {
+            'bucket_users': bucket_users,  # User đại diện của mỗi nhóm (gender, age)
+            'bucket_sizes': np.bincount(row_bucket, minlength=len(bucket_users)).astype(np.float64),
+            'bucket_ratings': (membership @ user_ratings).tocsr(),
+            'user_ratings': user_ratings,
+            'row_bucket': row_bucket,
+            'rows_by_user': rows_by_user,
+            'n_games': n_games
+        }
+    
+    def get_demographic_scores(self, target_user):
+        """
+        Điểm demographic cho game_id 1..số games (vector), hoặc None nếu không có user tương tự
+        = Σ nhóm similarity × tổng điểm nhóm / Σ nhóm similarity × số users (bỏ chính target)
+        """
+        model = self.demographic_model
+        if model is None or not model['bucket_users']:
+            return None
+        
+        bucket_similarity = self.get_bucket_similarity(target_user)
+        weighted_ratings = model['bucket_ratings'].T @ bucket_similarity
+        return self._finish_demographic_scores(target_user, bucket_similarity, weighted_ratings)
+    
+    def get_bucket_similarity(self, target_user):
+        """Độ tương đồng demographic của target với từng nhóm (gender, age) của mô hình"""
+        return np.array([
+            self.calculate_demographic_similarity(target_user, bucket_user)
+            for bucket_user in self.demographic_model['bucket_users']
+        ], dtype=np.float64)
+    
+    def _finish_demographic_scores(self, target_user, bucket_similarity, weighted_ratings):
+        """Bỏ đóng góp của chính target rồi chia cho tổng trọng số (None nếu tổng trọng số = 0)"""
+        model = self.demographic_model
+        total_weight = float(bucket_similarity @ model['bucket_sizes'])
+        
+        # Bỏ đóng góp của chính target (mọi bản ghi có cùng ID)
+        for row in model['rows_by_user'].get(target_user['id'], []):
+            own_similarity = bucket_similarity[model['row_bucket'][row]]
+            weighted_ratings -= own_similarity * model['user_ratings'][row].toarray().ravel()
+            total_weight -= own_similarity
+        
+        if total_weight <= 0:
+            return None
+        return weighted_ratings / total_weight
+    
+    def get_demographic_recommendations(self, user_id, top_n=5, component_scores=None):
+        """Gợi ý dựa trên người dùng có demographic tương tự (component_scores: điểm đã tính sẵn theo khối)"""
         try:
             # Lấy thông tin user hiện tại
-            target_user = next((u for u in self.users_data if u['id'] == user_id), None)
+            target_user = self.users_by_id.get(user_id)
             if not target_user:
                 return []
             
@@ -659,59 +972,28 @@ class GameRecommendationSystem:
                                   list(purchased_games_dict.keys()) +
                                   list(view_history.keys()))
             
-            # Tìm những user có demographic tương tự và tính trọng số
-            similar_users = []
-            for other_user in self.users_data:
-                if other_user['id'] == user_id:
-                    continue
-                
-                # Tính độ tương đồng demographic
-                demo_sim = self.calculate_demographic_similarity(target_user, other_user)
-                similar_users.append((other_user, demo_sim))
-            
-            # Tính điểm cho mỗi game dựa trên sở thích của similar users
-            game_scores = {}
+            # ⚡ Điểm của tất cả games từ mô hình dựng sẵn (không duyệt lại toàn bộ users)
+            if component_scores is not None and 'demographic' in component_scores:
+                scores = component_scores['demographic']
+            else:
+                scores = self.get_demographic_scores(target_user)
+            if scores is None:
+                return []
             
-            # Duyệt qua tất cả games chưa tương tác
-            for game_id in range(1, len(self.games_data) + 1):
-                if game_id in target_interacted:
-                    continue
-                
-                weighted_score = 0.0
-                total_weight = 0.0
-                
-                # Tính điểm từ các similar users
-                for other_user, demo_sim in similar_users:
-                    other_favorites = other_user.get('favorite_games', [])
-                    other_purchased_dict = other_user.get('purchased_games', {})
-                    other_purchased = list(other_purchased_dict.keys())
-                    other_view_history = other_user.get('view_history', {})
-                    
-                    rating = 0.0
-                    
-                    if game_id in other_favorites:
-                        rating = 3.0  # User tương tự thích game này
-                    elif game_id in other_purchased:
-                        rating = other_purchased_dict.get(game_id, 3.0)  # Use actual rating from review
-                    elif game_id in other_view_history:
-                        # User tương tự đã xem game này - tính điểm dựa trên số lần xem
-                        view_count = other_view_history[game_id]
-                        rating = view_count * 0.5  # 0.5 điểm mỗi lần xem
-                    
-                    # Cộng điểm có trọng số
-                    weighted_score += rating * demo_sim
-                    total_weight += demo_sim
-                
-                # Tính điểm trung bình có trọng số
-                if total_weight > 0:
-                    game_scores[game_id] = weighted_score / total_weight
+            game_ids = np.arange(1, len(scores) + 1)
+            candidates = np.ones(len(scores), dtype=bool)
+            for game_id in target_interacted:
+                if isinstance(game_id, (int, np.integer)) and 1 <= game_id <= len(scores):
+                    candidates[game_id - 1] = False
+            game_ids = game_ids[candidates]
+            scores = scores[candidates]
             
-            # Sắp xếp theo điểm
-            sorted_games = sorted(game_scores.items(), key=lambda x: x[1], reverse=True)
+            # Sắp xếp theo điểm (cùng điểm → game_id nhỏ trước)
+            order = np.lexsort((game_ids, -scores))[:top_n]
             
             recommendations = []
-            for game_id, score in sorted_games[:top_n]:
-                game = next((g for g in self.games_data if g['id'] == game_id), None)
+            for game_id, score in zip(game_ids[order].tolist(), scores[order].tolist()):
+                game = self.games_by_id.get(game_id)
                 if game:
                     recommendations.append({
                         'game_id': game_id,
@@ -726,14 +1008,11 @@ class GameRecommendationSystem:
             return recommendations
             
         except Exception as e:
-            print(f"Loi Demographic recommendations: {e}")
+            logger.exception("Loi Demographic recommendations: %s", e)
             return []
     
-    def get_keyword_score(self, game, keyword, debug=False):
-        """Tính điểm keyword cho một game"""
-        if not keyword or keyword.strip() == "":
-            return 0.0
-        
+    def get_keyword_search_terms(self, keyword):
+        """Các từ khóa cần tìm: keyword gốc + keyword đã mở rộng bằng library (không trùng lặp)"""
         # Mở rộng keyword bằng library
         expanded_keyword = self.expand_query(keyword)
         
@@ -742,27 +1021,37 @@ class GameRecommendationSystem:
         combined_query = f"{expanded_keyword.lower()} {keyword.lower()}"
         
         # Tách thành các từ khóa riêng lẻ và loại bỏ trùng lặp
-        keywords_to_search = list(set(combined_query.split()))
+        return list(set(combined_query.split()))
+    
+    def get_keyword_scores(self, keyword):
+        """
+        Điểm keyword của tất cả games qua inverted index (cùng quy tắc với get_keyword_score)
+        Chỉ duyệt postings của các từ khóa → chi phí theo số game khớp, không theo kích thước catalog
+        
+        Returns:
+            Dict {game_id: score 0-1} - game không có trong dict có điểm 0
+        """
+        if not keyword or keyword.strip() == "":
+            return {}
+        if self.keyword_index is None:
+            self.keyword_index = KeywordIndex(self.games_by_id.values(), self.feature_store)
+        return self.keyword_index.scores(keyword, self.get_keyword_search_terms(keyword))
+    
+    def get_keyword_score(self, game, keyword, debug=False):
+        """Tính điểm keyword cho một game"""
+        if not keyword or keyword.strip() == "":
+            return 0.0
+        
+        keywords_to_search = self.get_keyword_search_terms(keyword)
         
         if debug:
-            print(f"\n=== DEBUG KEYWORD SCORE: {game['name']} ===")
-            print(f"Original keyword: {keyword}")
-            print(f"Expanded length: {len(expanded_keyword)} chars")
-            print(f"Keywords count: {len(keywords_to_search)}")
+            logger.debug("=== DEBUG KEYWORD SCORE: %s === keyword=%r, expanded length: %d chars, keywords: %d",
+                         game['name'], keyword, len(self.expand_query(keyword)), len(keywords_to_search))
         
         score = 0.0
         
-        # Tìm trong tất cả các field của game
-        searchable_fields = {
-            'name': 3.0,           # Tên game quan trọng nhất
-            'description': 2.0,    # Mô tả quan trọng thứ 2
-            'genre': 2.5,          # Genre quan trọng
-            'publisher': 1.5,      # Publisher
-            'platform': 1.5,      # Platform
-            'language': 1.5,       # Language quan trọng
-            'mode': 1.0,           # Mode
-            'age_rating': 1.0,     # Age rating
-        }
+        # Tìm trong tất cả các field của game (trọng số dùng chung với KeywordIndex)
+        searchable_fields = TEXT_FIELD_WEIGHTS
         
         # Tìm trong text fields
         for field, weight in searchable_fields.items():
@@ -782,9 +1071,9 @@ class GameRecommendationSystem:
             
             if debug:
                 if matched_keyword:
-                    print(f"  {field} (+{weight}): '{field_value}' contains '{matched_keyword}'")
+                    logger.debug("  %s (+%s): '%s' contains '%s'", field, weight, field_value, matched_keyword)
                 else:
-                    print(f"  {field} (0): '{field_value}' - no match")
+                    logger.debug("  %s (0): '%s' - no match", field, field_value)
         
         # Tìm trong specs (CPU, GPU, RAM) - bỏ storage vì đã có capacity
         min_spec = game.get('min_spec', {})
@@ -807,9 +1096,9 @@ class GameRecommendationSystem:
             
             if debug:
                 if matched_keyword:
-                    print(f"  {spec_field} (+1.5): '{min_val}' or '{rec_val}' contains '{matched_keyword}'")
+                    logger.debug("  %s (+1.5): '%s' or '%s' contains '%s'", spec_field, min_val, rec_val, matched_keyword)
                 else:
-                    print(f"  {spec_field} (0): '{min_val}' / '{rec_val}' - no match")
+                    logger.debug("  %s (0): '%s' / '%s' - no match", spec_field, min_val, rec_val)
         
         # Tìm trong price (nếu keyword gốc là số)
         price_matched = False
@@ -865,24 +1154,21 @@ class GameRecommendationSystem:
         
         if debug:
             if price_matched:
-                print(f"  price (+1.0): {game.get('price', 0)} matches {keyword}")
+                logger.debug("  price (+1.0): %s matches %s", game.get('price', 0), keyword)
             else:
-                print(f"  price (0): {game.get('price', 0)} - no match")
+                logger.debug("  price (0): %s - no match", game.get('price', 0))
             
             if release_year_matched:
-                print(f"  release_date (+2.0): {release_year} matches {keyword}")
+                logger.debug("  release_date (+2.0): %s matches %s", release_year, keyword)
             else:
-                print(f"  release_date (0): {release_year} - no match")
+                logger.debug("  release_date (0): %s - no match", release_year)
             
             if multiplayer_matched:
-                print(f"  multiplayer (+1.0): {game.get('multiplayer', False)} matches {keyword}")
+                logger.debug("  multiplayer (+1.0): %s matches %s", game.get('multiplayer', False), keyword)
             else:
-                print(f"  multiplayer (0): {game.get('multiplayer', False)} - no match")
+                logger.debug("  multiplayer (0): %s - no match", game.get('multiplayer', False))
             
-            print(f"\nTotal raw score: {score}")
-            final_score = min(score / 15.0, 1.0)
-            print(f"Final score: {score} / 15.0 = {final_score:.3f}")
-            print("=" * 50)
+            logger.debug("Total raw score: %s → final score: %s / 15.0 = %.3f", score, score, min(score / 15.0, 1.0))
         
         # Chuẩn hóa score về 0-1 (max possible score ≈ 15.0)
         # 3.0 + 2.0 + 2.5 + 1.5 + 1.5 + 1.5 + 1.0 + 1.0 + (3 specs * 1.5) + 1.0 + 2.0 (release_date) + 1.0 (multiplayer) = 15.0
@@ -899,16 +1185,59 @@ class GameRecommendationSystem:
                         Ví dụ: recent_days=7 → chỉ phân tích 7 ngày vừa qua
         
         Trả về dictionary chứa preferences: publisher, genre, price_range, etc.
-        """
-        # ❌ DISABLED CACHE - Always recalculate
-        # cache_key = f"{user_id}_{recent_days}" if recent_days else str(user_id)
-        # if cache_key in self.user_preferences:
-        #     return self.user_preferences[cache_key]
         
-        user_data = next((u for u in self.users_data if u['id'] == user_id), None)
+        ⚡ Cache theo (user_id, recent_days) + tương tác của user:
+        chỉ tính lại khi tương tác của user thay đổi (hoặc khi một tương tác có timestamp rời khỏi cửa sổ recent_days)
+        """
+        user_data = self.users_by_id.get(user_id)
         if not user_data:
             return None
         
+        cache_key = (user_id, recent_days)
+        cached = self.user_preferences.get(cache_key)
+        # So sánh tuple các field (không dùng hash → không trùng nhầm); field vẫn là cùng object
+        # (record chưa đổi) thì so sánh O(1) nhờ kiểm tra identity của Python
+        interactions = self.get_interaction_fields(user_data)
+        if cached and cached['interactions'] == interactions and (
+                cached['expires_at'] is None or datetime.now() < cached['expires_at']):
+            return cached['preferences']
+        
+        preferences, expires_at = self._compute_user_preferences(user_data, recent_days)
+        self.user_preferences.put(cache_key, {
+            'interactions': interactions,
+            'expires_at': expires_at,
+            'preferences': preferences
+        })
+        return preferences
+    
+    def get_interaction_fields(self, user_data):
+        """Các field tương tác của user (favorite/purchased/view/interactions và timestamps)"""
+        return tuple(user_data.get(field) for field in INTERACTION_FIELDS)
+    
+    def with_user_record(self, user_data):
+        """
+        Bản sao nông của model chấm điểm user theo record mới hơn (vd. record trong data store khi model
+        đang chờ train lại) - catalog, ma trận SVD, các user khác và cache dùng chung với model
+        """
+        # Tạo sẵn các thành phần lazy trên model → bản sao không phải tự tạo lại
+        self.get_keyword_matcher()
+        if self.boost_engine is None:
+            self.boost_engine = PreferenceBoostEngine(self.feature_store)
+        
+        view = copy.copy(self)
+        view.users_by_id = ChainMap({user_data['id']: user_data}, self.users_by_id)
+        return view
+    
+    def _compute_user_preferences(self, user_data, recent_days):
+        """
+        Tính preferences của user (không cache)
+        
+        Returns:
+            (preferences, expires_at) - expires_at: thời điểm tương tác sớm nhất trong cửa sổ recent_days hết hạn
+            (None nếu kết quả không phụ thuộc thời gian)
+        """
+        expires_at = None
+        
         # 🆕 PRIORITY: Use consolidated interactions (pre-filtered by Backend/Script)
         interactions = user_data.get('interactions', [])
         
@@ -944,6 +1273,7 @@ class GameRecommendationSystem:
                 cutoff_date = datetime.now() - timedelta(days=recent_days)
                 
                 # Filter favorite_games
+                kept_timestamps = []
                 favorite_games_timestamps = user_data.get('favorite_games_timestamps', {})
                 if favorite_games_timestamps:
                     favorite_games = [
@@ -951,6 +1281,7 @@ class GameRecommendationSystem:
                         if str(game_id) in favorite_games_timestamps and 
                         datetime.fromisoformat(favorite_games_timestamps[str(game_id)]) >= cutoff_date
                     ]
+                    kept_timestamps += [datetime.fromisoformat(favorite_games_timestamps[str(game_id)]) for game_id in favorite_games]
                 
                 # Filter purchased_games
                 purchased_games_timestamps = user_data.get('purchased_games_timestamps', {})
@@ -960,6 +1291,11 @@ class GameRecommendationSystem:
                         if g_id in purchased_games_timestamps and
                         datetime.fromisoformat(purchased_games_timestamps[g_id]) >= cutoff_date
                     }
+                    kept_timestamps += [datetime.fromisoformat(purchased_games_timestamps[g_id]) for g_id in purchased_games_dict]
+                
+                # Kết quả đổi khi tương tác cũ nhất còn trong cửa sổ bị loại ra
+                if kept_timestamps:
+                    expires_at = min(kept_timestamps) + timedelta(days=recent_days)
         
         # Tạo weighted interactions: favorite=5, purchased=3, view=view_count*0.5
         weighted_interactions = {}
@@ -993,40 +1329,40 @@ class GameRecommendationSystem:
         
         total_weight = sum(weighted_interactions.values())
         
+        # ⚡ Đọc thuộc tính game từ feature store (cột đã mã hóa) thay vì duyệt dict của từng game
+        features = self.feature_store
+        
         for game_id, weight in weighted_interactions.items():
             try:
-                game_id_int = int(game_id)
-                game = next((g for g in self.games_data if g['id'] == game_id_int), None)
-                if not game:
+                row = features.row(int(game_id))
+                if row is None:
                     continue
                 
                 # Publisher preferences
-                publisher = game.get('publisher', '')
+                publisher = features.label('publisher', row)
                 if publisher:
                     publisher_scores[publisher] = publisher_scores.get(publisher, 0) + weight
                 
                 # Genre preferences
-                genres = game.get('genre', [])
-                for genre in genres:
+                for genre in features.labels('genre', row):
                     genre_scores[genre] = genre_scores.get(genre, 0) + weight
                 
                 # Price range - LƯU CẢ PRICE VÀ WEIGHT
-                price = game.get('price', 0)
+                price = features.price[row].item()
                 price_ranges.append((price, weight))
                 
                 # Age rating
-                age_rating = game.get('age_rating', '')
+                age_rating = features.label('age_rating', row)
                 if age_rating:
                     age_ratings[age_rating] = age_ratings.get(age_rating, 0) + weight
                 
                 # Mode
-                mode = game.get('mode', '')
+                mode = features.label('mode', row)
                 if mode:
                     modes[mode] = modes.get(mode, 0) + weight
                 
                 # Platform
-                platforms_list = game.get('platform', [])
-                for platform in platforms_list:
+                for platform in features.labels('platform', row):
                     platforms[platform] = platforms.get(platform, 0) + weight
                     
             except (ValueError, TypeError):
@@ -1080,10 +1416,7 @@ class GameRecommendationSystem:
             'total_interactions': len(weighted_interactions)
         }
         
-        # ❌ DISABLED CACHE - Don't save
-        # self.user_preferences[cache_key] = preferences
-        
-        return preferences
+        return preferences, expires_at
     
     def _calculate_boost_factor_breakdown(self, game, user_preferences):
         """
@@ -1309,18 +1642,32 @@ class GameRecommendationSystem:
         boost_factor = breakdown.get('total', 1.0)
         
         if debug:
-            print(f"\n=== BOOST DEBUG: {game['name']} ===")
-            print(f"Publisher boost: ×{breakdown['publisher']:.2f}")
-            print(f"Genre boost: ×{breakdown['genre']:.2f}")
-            print(f"Price boost: ×{breakdown['price']:.2f}")
-            print(f"Age rating boost: ×{breakdown['age_rating']:.2f}")
-            print(f"Mode boost: ×{breakdown['mode']:.2f}")
-            print(f"Platform boost: ×{breakdown['platform']:.2f}")
-            print(f"─" * 40)
-            print(f"Total boost factor: ×{boost_factor:.2f}")
+            logger.debug(
+                "=== BOOST DEBUG: %s === publisher ×%.2f, genre ×%.2f, price ×%.2f, age rating ×%.2f, "
+                "mode ×%.2f, platform ×%.2f → total ×%.2f",
+                game['name'], breakdown['publisher'], breakdown['genre'], breakdown['price'],
+                breakdown['age_rating'], breakdown['mode'], breakdown['platform'], boost_factor
+            )
         
         return boost_factor
     
+    def calculate_preference_boosts(self, game_ids, user_preferences):
+        """
+        Boost factor cho nhiều games cùng lúc (vectorized, kết quả giống hệt calculate_preference_boost)
+        
+        Returns:
+            Dict {game_id: boost_factor} cho các game có trong catalog
+        """
+        game_ids = [game_id for game_id in game_ids if game_id in self.games_by_id]
+        if not user_preferences:
+            return {game_id: 1.0 for game_id in game_ids}
+        
+        if self.boost_engine is None:
+            self.boost_engine = PreferenceBoostEngine(self.feature_store)
+        rows = [self.feature_store.row(game_id) for game_id in game_ids]
+        boosts = self.boost_engine.boost_factors(user_preferences, rows)
+        return dict(zip(game_ids, boosts.tolist()))
+    
     def adjust_weights_based_on_behavior(self, user_id, recommendations_before_boost):
         """
         Điều chỉnh trọng số dựa trên hành vi:
@@ -1329,7 +1676,7 @@ class GameRecommendationSystem:
         
         Trả về adjusted weights
         """
-        user_data = next((u for u in self.users_data if u['id'] == user_id), None)
+        user_data = self.users_by_id.get(user_id)
         if not user_data:
             return None
         
@@ -1362,11 +1709,12 @@ class GameRecommendationSystem:
         
         preference_strength = (publisher_strength + genre_strength) / 2
         
-        print(f"\n📊 User Behavior Analysis (ID: {user_id}):")
-        print(f"  - Games outside top 10: {len(games_outside_top10)}/{len(all_interacted)} ({ratio_outside_top10:.1%})")
-        print(f"  - Publisher preference strength: {publisher_strength:.2f}")
-        print(f"  - Genre preference strength: {genre_strength:.2f}")
-        print(f"  - Overall preference strength: {preference_strength:.2f}")
+        logger.debug(
+            "User Behavior Analysis (ID: %s): games outside top 10: %d/%d (%.1f%%), preference strength: "
+            "publisher %.2f, genre %.2f, overall %.2f",
+            user_id, len(games_outside_top10), len(all_interacted), ratio_outside_top10 * 100,
+            publisher_strength, genre_strength, preference_strength
+        )
         
         # Quyết định điều chỉnh weights - GRADIENT thay vì threshold
         adjusted_weights = None
@@ -1401,9 +1749,11 @@ class GameRecommendationSystem:
             new_content_weight = 0.15 + content_increase
             new_demographic_weight = 0.10 + demographic_increase
             
-            print(f"  → User tends to explore beyond recommendations")
-            print(f"  → Keyword reduction: {keyword_reduction_percent:.1f}% ({keyword_reduction:.3f})")
-            print(f"  → Adjusting: keyword {0.60:.2f}→{new_keyword_weight:.2f}, content {0.15:.2f}→{new_content_weight:.2f}, demo {0.10:.2f}→{new_demographic_weight:.2f}")
+            logger.debug(
+                "  → User tends to explore beyond recommendations: keyword reduction %.1f%% (%.3f), "
+                "keyword 0.60→%.2f, content 0.15→%.2f, demo 0.10→%.2f",
+                keyword_reduction_percent, keyword_reduction, new_keyword_weight, new_content_weight, new_demographic_weight
+            )
             
             adjusted_weights = {
                 'svd': 0.15,
@@ -1415,8 +1765,7 @@ class GameRecommendationSystem:
         # Case 2: User có preference strength cao (>= 0.4)
         # → Tăng content weight vì preferences patterns mạnh (chỉ khi không có Case 1)
         elif preference_strength >= 0.4:
-            print(f"  → User has strong preferences (publisher/genre)")
-            print(f"  → Adjusting: boost content weight for better matching")
+            logger.debug("  → User has strong preferences (publisher/genre): boost content weight for better matching")
             
             adjusted_weights = {
                 'svd': 0.10,          # giảm SVD
@@ -1427,7 +1776,7 @@ class GameRecommendationSystem:
         
         return adjusted_weights
     
-    def get_hybrid_recommendations(self, user_id, top_n=10, keyword="", enable_adaptive=True, recent_days=7):
+    def get_hybrid_recommendations(self, user_id, top_n=10, keyword="", enable_adaptive=True, recent_days=7, component_scores=None):
         """
         Gợi ý kết hợp SVD + Content-based + Demographic + Keyword
         
@@ -1438,11 +1787,70 @@ class GameRecommendationSystem:
             enable_adaptive: Bật adaptive preference boosting
             recent_days: Phân tích preferences từ N ngày gần đây (Mặc định: 7 ngày)
                         Ví dụ: recent_days=7 → chỉ dùng data 7 ngày vừa qua
+            component_scores: Điểm SVD / content / demographic đã tính sẵn cho user (compute_component_scores)
+        """
+        # ⏱️ Đo thời gian từng giai đoạn (ai_stage_duration_seconds{path="hybrid"}, no-op khi tắt metrics)
+        timer = stage_timer('hybrid')
+        
+        filtered_games, is_cold_start = self._score_hybrid(
+            user_id, top_n, keyword, enable_adaptive, recent_days, component_scores, timer
+        )
+        
+        # Sắp xếp theo hybrid score (sau khi đã boost)
+        sorted_recommendations = sorted(filtered_games.values(), 
+                                      key=lambda x: x['hybrid_score'], 
+                                      reverse=True)
+        
+        # ⭐ KHÔNG filter games - chỉ sắp xếp theo hybrid score
+        # Games có keyword match sẽ có keyword_score > 0 → hybrid_score cao hơn → tự động lên đầu
+        if keyword and keyword.strip() and debug_enabled(logger):
+            matching_count = sum(1 for rec in sorted_recommendations if rec['keyword_score'] > 0)
+            logger.debug("Keyword: '%s' - %d games match (sorted to top)", keyword, matching_count)
+        
+        # Thêm link_download, image, và cold_start flag vào kết quả cuối cùng
+        final_recommendations = sorted_recommendations[:top_n]
+        for rec in final_recommendations:
+            game = self.games_by_id.get(rec['game_id'])
+            if game:
+                rec['link_download'] = game.get('link_download', '')
+                rec['image'] = game.get('image', '')
+                rec['cold_start'] = is_cold_start  # Flag để frontend biết đây là cold start
+        timer.lap('sort')
+        
+        return final_recommendations
+    
+    def get_hybrid_scores(self, user_id, top_n=None, keyword="", enable_adaptive=True, recent_days=7):
+        """
+        Hybrid score (sau boost) của mọi game còn lại sau khi lọc, CHƯA sắp xếp - dùng cho phân trang:
+        chỉ trang được yêu cầu mới cần chọn / sắp xếp (xem session_cache.RankedList)
+        
+        Args:
+            top_n: Số games mỗi phương pháp trả về (Mặc định: toàn bộ catalog)
+            keyword, enable_adaptive, recent_days: Như get_hybrid_recommendations
+        
+        Returns:
+            (game_ids, scores) - mảng NumPy theo thứ tự get_hybrid_recommendations dùng trước khi sắp xếp
+            (sắp xếp ổn định giảm dần theo scores → đúng thứ tự của get_hybrid_recommendations)
         """
+        timer = stage_timer('hybrid')
+        filtered_games, _ = self._score_hybrid(
+            user_id, top_n or len(self.games_data), keyword, enable_adaptive, recent_days, None, timer
+        )
+        game_ids = np.array(list(filtered_games.keys()))
+        scores = np.fromiter((game['hybrid_score'] for game in filtered_games.values()),
+                             dtype=np.float64, count=len(filtered_games))
+        return game_ids, scores
+    
+    def _score_hybrid(self, user_id, top_n, keyword, enable_adaptive, recent_days, component_scores, timer):
+        """
+        Điểm hybrid (đã boost) của các game sau khi lọc favorite / purchased
         
+        Returns:
+            (filtered_games, is_cold_start) - filtered_games: {game_id: game data có hybrid_score}
+        """
         # ⭐ COLD START: Kiểm tra xem user có lịch sử tương tác không
         is_cold_start = False
-        user_data = next((u for u in self.users_data if u['id'] == user_id), None)
+        user_data = self.users_by_id.get(user_id)
         if user_data:
             favorite_games = user_data.get('favorite_games', [])
             purchased_games = list(user_data.get('purchased_games', {}).keys())
@@ -1451,13 +1859,15 @@ class GameRecommendationSystem:
             # Nếu user CHƯA có bất kỳ lịch sử nào → COLD START
             if not favorite_games and not purchased_games and not view_history:
                 is_cold_start = True
-                print(f"\n❄️ COLD START: User {user_id} chưa có lịch sử tương tác")
-                print(f"   → Tính SVD + Demographic + Keyword, bỏ qua Content (set = 0)")
+                logger.debug("COLD START: User %s chưa có lịch sử tương tác → Tính SVD + Demographic + Keyword, bỏ qua Content (set = 0)", user_id)
         
         # Lấy recommendations từ cả ba phương pháp
-        svd_recs = self.get_svd_recommendations(user_id, top_n)
-        content_recs = self.get_content_recommendations(user_id, top_n)
-        demographic_recs = self.get_demographic_recommendations(user_id, top_n)
+        svd_recs = self.get_svd_recommendations(user_id, top_n, component_scores)
+        timer.lap('svd')
+        content_recs = self.get_content_recommendations(user_id, top_n, component_scores)
+        timer.lap('content')
+        demographic_recs = self.get_demographic_recommendations(user_id, top_n, component_scores)
+        timer.lap('demographic')
         
         # Kết hợp và tính điểm hybrid
         all_games = {}
@@ -1535,51 +1945,28 @@ class GameRecommendationSystem:
         
         # Tính content score cho các games chưa có content score (SKIP nếu cold start)
         if not is_cold_start:
-            for game_id in all_games:
-                if all_games[game_id]['content_score'] == 0:
-                    # Tính content score dựa trên similarity với games user đã tương tác
-                    user_data = next((u for u in self.users_data if u['id'] == user_id), None)
-                    if user_data and self.content_similarity_matrix is not None:
-                        # Lấy games user đã tương tác
-                        favorite_games = user_data.get('favorite_games', [])
-                        purchased_games_dict = user_data.get('purchased_games', {})
-                        purchased_games = list(purchased_games_dict.keys())
-                        view_history = user_data.get('view_history', {})
-                        
-                        # Tạo danh sách games với trọng số từ view history
-                        view_games_weighted = []
-                        for gid, view_count in view_history.items():
-                            view_games_weighted.extend([gid] * view_count)
-                        
-                        interacted_games = favorite_games + purchased_games + view_games_weighted
-                        
-                        if interacted_games:
-                            # Tính similarity với games user đã tương tác
-                            similarities = []
-                            game_idx = game_id - 1
-                            if 0 <= game_idx < len(self.content_similarity_matrix):
-                                for interacted_game_id in interacted_games:
-                                    try:
-                                        interacted_idx = int(interacted_game_id) - 1
-                                        if 0 <= interacted_idx < len(self.content_similarity_matrix):
-                                            sim_score = self.content_similarity_matrix[game_idx][interacted_idx]
-                                            similarities.append(sim_score)
-                                    except (ValueError, TypeError):
-                                        continue
-                            
-                            if similarities:
-                                content_score = np.mean(similarities)
-                                all_games[game_id]['content_score'] = content_score
+            # ⚡ Content score cho tất cả games một lần (weighted profile × similarity)
+            if component_scores is not None and 'content' in component_scores:
+                profile_scores = component_scores['content']
+            else:
+                profile_scores = self.get_content_profile_scores(user_data)
+            if profile_scores is not None:
+                for game_id in all_games:
+                    if all_games[game_id]['content_score'] == 0:
+                        game_idx = self.get_game_index(game_id)
+                        if game_idx is not None:
+                            all_games[game_id]['content_score'] = profile_scores[game_idx]
         else:
             # Cold start: content_score = 0 cho tất cả games
-            print("   ⚠️  Skipping content score calculation (cold start user)")
+            logger.debug("Skipping content score calculation (cold start user)")
+        timer.lap('merge')
         
-        # Tính keyword score cho tất cả games
+        # Tính keyword score cho tất cả games (⚡ 1 truy vấn inverted index thay vì quét từng game)
+        keyword_scores = self.get_keyword_scores(keyword)
         for game_id in all_games:
-            game = next((g for g in self.games_data if g['id'] == game_id), None)
-            if game:
-                keyword_score = self.get_keyword_score(game, keyword)
-                all_games[game_id]['keyword_score'] = keyword_score
+            if game_id in self.games_by_id:
+                all_games[game_id]['keyword_score'] = keyword_scores.get(game_id, 0.0)
+        timer.lap('keyword')
         
         # Tìm content score âm lớn nhất để điều chỉnh
         content_scores = [all_games[game_id]['content_score'] for game_id in all_games]
@@ -1587,8 +1974,9 @@ class GameRecommendationSystem:
         content_adjustment = 0
         if min_content_score < 0:
             content_adjustment = abs(min_content_score)
-            print(f"Adjusting content scores: adding {content_adjustment:.3f} to make all positive")
-            print(f"Before adjustment: min={min_content_score:.3f}, max={max(content_scores):.3f}")
+            if debug_enabled(logger):
+                logger.debug("Adjusting content scores: adding %.3f to make all positive (before: min=%.3f, max=%.3f)",
+                             content_adjustment, min_content_score, max(content_scores))
         
         # Tính min-max normalization cho SVD scores (giữ nguyên thứ tự)
         svd_scores = [all_games[game_id]['svd_score'] for game_id in all_games if all_games[game_id]['svd_score'] != 0]
@@ -1604,7 +1992,7 @@ class GameRecommendationSystem:
         if demographic_scores:
             demo_max = max(demographic_scores)
             demo_divisor = 5.0 if demo_max < 5.0 else demo_max
-            print(f"Demographic scores: max={demo_max:.3f}, divisor={demo_divisor:.3f}")
+            logger.debug("Demographic scores: max=%.3f, divisor=%.3f", demo_max, demo_divisor)
         else:
             demo_max = 0
             demo_divisor = 5.0
@@ -1613,10 +2001,9 @@ class GameRecommendationSystem:
         if is_cold_start:
             if keyword and keyword.strip():
                 weights = WEIGHTS_COLD_START_WITH_KEYWORD
-                print(f"   📊 Using COLD START weights (with keyword): SVD={weights['svd']:.0%}, Content={weights['content']:.0%}, Demographic={weights['demographic']:.0%}, Keyword={weights['keyword']:.0%}")
             else:
                 weights = WEIGHTS_COLD_START_NO_KEYWORD
-                print(f"   📊 Using COLD START weights (no keyword): SVD={weights['svd']:.0%}, Content={weights['content']:.0%}, Demographic={weights['demographic']:.0%}")
+            logger.debug("Using COLD START weights (%s keyword): %s", "with" if keyword and keyword.strip() else "no", weights)
         else:
             if keyword and keyword.strip():
                 weights = WEIGHTS_WITH_KEYWORD
@@ -1631,9 +2018,11 @@ class GameRecommendationSystem:
             
             # Áp dụng adjusted weights nếu có
             if adjusted_weights and keyword and keyword.strip():
-                print(f"✅ Applying adjusted weights based on user behavior")
+                logger.debug("Applying adjusted weights based on user behavior: %s", adjusted_weights)
                 weights = adjusted_weights
         
+        timer.lap('weights')
+        
         svd_weight = weights['svd']
         content_weight = weights['content']
         demographic_weight = weights['demographic']
@@ -1676,12 +2065,13 @@ class GameRecommendationSystem:
             all_games[game_id]['hybrid_score'] = hybrid_score
             all_games[game_id]['boost_factor'] = 1.0  # Initialize boost factor
         
-        # Debug: Kiểm tra content scores sau điều chỉnh
-        adjusted_content_scores = [all_games[game_id]['content_score'] for game_id in all_games]
-        print(f"After adjustment: min={min(adjusted_content_scores):.3f}, max={max(adjusted_content_scores):.3f}")
+        # Debug: Kiểm tra content scores sau điều chỉnh (chỉ tính khi log DEBUG được ghi)
+        if debug_enabled(logger):
+            adjusted_content_scores = [all_games[game_id]['content_score'] for game_id in all_games]
+            logger.debug("After adjustment: min=%.3f, max=%.3f", min(adjusted_content_scores), max(adjusted_content_scores))
         
         # Lọc games đã thích và mua (KHÔNG lọc games đã xem)
-        user_data = next((u for u in self.users_data if u['id'] == user_id), None)
+        user_data = self.users_by_id.get(user_id)
         if user_data:
             # Chỉ loại bỏ games đã thích và mua, KHÔNG loại bỏ games đã xem
             favorite_games = set(user_data.get('favorite_games', []))
@@ -1693,6 +2083,7 @@ class GameRecommendationSystem:
                             if game_id not in excluded_games}
         else:
             filtered_games = all_games
+        timer.lap('score')
         
         # ⭐ ADAPTIVE BOOSTING SYSTEM ⭐ (SKIP nếu cold start)
         if enable_adaptive and not is_cold_start:
@@ -1700,56 +2091,135 @@ class GameRecommendationSystem:
             user_preferences = self.analyze_user_preferences(user_id, recent_days=recent_days)
             
             if user_preferences:
-                print(f"\n🎯 Adaptive Preference Boosting Enabled")
-                if recent_days:
-                    print(f"   Time Window: Last {recent_days} days ⏰")
-                else:
-                    print(f"   Time Window: All time history")
-                print(f"   Top Publishers: {list(user_preferences['publishers'].keys())[:3]}")
-                print(f"   Top Genres: {list(user_preferences['genres'].keys())[:3]}")
-                print(f"   Price Range: {user_preferences['price_avg']:,.0f} VND (±{user_preferences['price_std']:,.0f})")
-                
-                # Áp dụng boost cho từng game
-                for game_id in filtered_games:
-                    game = next((g for g in self.games_data if g['id'] == game_id), None)
-                    if game:
-                        # Tính boost factor
-                        boost_factor = self.calculate_preference_boost(game, user_preferences, debug=False)
-                        
-                        # Lưu boost factor vào game data
-                        filtered_games[game_id]['boost_factor'] = boost_factor
-                        
-                        # Áp dụng boost vào hybrid score
-                        original_score = filtered_games[game_id]['hybrid_score']
-                        boosted_score = original_score * boost_factor
-                        filtered_games[game_id]['hybrid_score'] = boosted_score
-                        filtered_games[game_id]['original_score'] = original_score  # Lưu score gốc để debug
-                
-                # Tính số games được boost
-                boosted_games_count = sum(1 for game_data in filtered_games.values() if game_data.get('boost_factor', 1.0) > 1.0)
-                print(f"   ✓ Boosted {boosted_games_count}/{len(filtered_games)} games based on preferences")
-        
-        # Sắp xếp theo hybrid score (sau khi đã boost)
-        sorted_recommendations = sorted(filtered_games.values(), 
-                                      key=lambda x: x['hybrid_score'], 
-                                      reverse=True)
+                if debug_enabled(logger):
+                    logger.debug(
+                        "Adaptive Preference Boosting Enabled - time window: %s, top publishers: %s, top genres: %s, "
+                        "price range: %s VND (±%s)",
+                        f"last {recent_days} days" if recent_days else "all time history",
+                        list(user_preferences['publishers'].keys())[:3], list(user_preferences['genres'].keys())[:3],
+                        f"{user_preferences['price_avg']:,.0f}", f"{user_preferences['price_std']:,.0f}"
+                    )
+                
+                # ⚡ Tính boost factor cho tất cả games trong 1 lần (NumPy) rồi áp dụng cho từng game
+                boost_factors = self.calculate_preference_boosts(filtered_games.keys(), user_preferences)
+                for game_id, boost_factor in boost_factors.items():
+                    # Lưu boost factor vào game data
+                    filtered_games[game_id]['boost_factor'] = boost_factor
+                    
+                    # Áp dụng boost vào hybrid score
+                    original_score = filtered_games[game_id]['hybrid_score']
+                    boosted_score = original_score * boost_factor
+                    filtered_games[game_id]['hybrid_score'] = boosted_score
+                    filtered_games[game_id]['original_score'] = original_score  # Lưu score gốc để debug
+                
+                # Tính số games được boost (chỉ khi log DEBUG được ghi)
+                if debug_enabled(logger):
+                    boosted_games_count = sum(1 for game_data in filtered_games.values() if game_data.get('boost_factor', 1.0) > 1.0)
+                    logger.debug("Boosted %d/%d games based on preferences", boosted_games_count, len(filtered_games))
+        timer.lap('boost')
+        return filtered_games, is_cold_start
+    
+    def get_batch_recommendations(self, user_ids, top_n=10, keyword="", enable_adaptive=True, recent_days=7, keywords=None):
+        """
+        Gợi ý hybrid cho nhiều users trong một lần (nightly jobs, email/push campaigns)
+        SVD / content / demographic được tính theo khối users bằng phép nhân ma trận,
+        mỗi user vẫn có exclusions, keyword và adaptive boost riêng như get_hybrid_recommendations
         
-        # ⭐ KHÔNG filter games - chỉ sắp xếp theo hybrid score
-        # Games có keyword match sẽ có keyword_score > 0 → hybrid_score cao hơn → tự động lên đầu
-        if keyword and keyword.strip():
-            matching_count = sum(1 for rec in sorted_recommendations if rec['keyword_score'] > 0)
-            print(f"\n🔍 Keyword: '{keyword}' - {matching_count} games match (sorted to top)")
+        Args:
+            user_ids: Danh sách user ID
+            top_n, keyword, enable_adaptive, recent_days: Như get_hybrid_recommendations
+            keywords: Dict {user_id: keyword} - keyword riêng cho từng user (mặc định: keyword)
         
-        # Thêm link_download, image, và cold_start flag vào kết quả cuối cùng
-        final_recommendations = sorted_recommendations[:top_n]
-        for rec in final_recommendations:
-            game = next((g for g in self.games_data if g['id'] == rec['game_id']), None)
-            if game:
-                rec['link_download'] = game.get('link_download', '')
-                rec['image'] = game.get('image', '')
-                rec['cold_start'] = is_cold_start  # Flag để frontend biết đây là cold start
+        Returns:
+            Dict {user_id: recommendations}
+        """
+        keywords = keywords or {}
+        user_ids = list(dict.fromkeys(user_ids))
+        results = {}
+        
+        timer = stage_timer('batch')
+        for start in range(0, len(user_ids), USER_BATCH_BLOCK_SIZE):
+            block = user_ids[start:start + USER_BATCH_BLOCK_SIZE]
+            block_scores = self.compute_component_scores(block)
+            timer.lap('component_scores')
+            for user_id in block:
+                results[user_id] = self.get_hybrid_recommendations(
+                    user_id,
+                    top_n=top_n,
+                    keyword=keywords.get(user_id, keyword),
+                    enable_adaptive=enable_adaptive,
+                    recent_days=recent_days,
+                    component_scores=block_scores[user_id]
+                )
+            timer.lap('rank')
+        
+        return results
+    
+    def compute_component_scores(self, user_ids):
+        """
+        Điểm SVD / content / demographic (vector theo game) cho một khối users bằng phép nhân ma trận
         
-        return final_recommendations
+        Returns:
+            Dict {user_id: {'svd': ..., 'content': ..., 'demographic': ...}}
+            Thiếu key → component đó sẽ được tính riêng cho user (get_*_recommendations)
+        """
+        scores = {user_id: {} for user_id in user_ids}
+        
+        # SVD: U·Σ của cả khối × Vt
+        if self.svd_model is not None:
+            rows = [(user_id, self.user_id_to_index.get(user_id)) for user_id in user_ids]
+            rows = [(user_id, row) for user_id, row in rows if row is not None]
+            for user_id in user_ids:
+                scores[user_id]['svd'] = None
+            if rows:
+                indices = [row for _, row in rows]
+                predictions = self.svd_model['user_factors'][indices] @ self.svd_model['Vt'] + self.svd_model['user_ratings_mean'][indices][:, None]
+                for i, (user_id, _) in enumerate(rows):
+                    scores[user_id]['svd'] = predictions[i]
+        
+        # Content: similarity × ma trận weight (games × users)
+        if self.similarity_index is not None:
+            profiles = []
+            for user_id in user_ids:
+                user_data = self.users_by_id.get(user_id)
+                if not user_data:
+                    scores[user_id]['content'] = None
+                    continue
+                try:
+                    weights = self.get_content_profile_weights(user_data)
+                except Exception:
+                    continue  # Tính riêng cho user này (giữ nguyên cách xử lý lỗi)
+                total_weight = weights.sum()
+                scores[user_id]['content'] = None
+                if total_weight != 0:
+                    profiles.append((user_id, weights, total_weight))
+            if profiles:
+                weight_matrix = np.column_stack([weights for _, weights, _ in profiles])
+                profile_scores = self.similarity_index.profile_scores(weight_matrix)
+                for i, (user_id, _, total_weight) in enumerate(profiles):
+                    scores[user_id]['content'] = profile_scores[:, i] / total_weight
+        
+        # Demographic: ma trận similarity (users × nhóm) × điểm của từng nhóm
+        model = self.demographic_model
+        if model is not None and model['bucket_users']:
+            targets = []
+            for user_id in user_ids:
+                target_user = self.users_by_id.get(user_id)
+                if not target_user or target_user.get('age') is None or target_user.get('gender') is None:
+                    continue
+                try:
+                    targets.append((user_id, target_user, self.get_bucket_similarity(target_user)))
+                except Exception:
+                    continue  # get_demographic_recommendations sẽ tự xử lý lỗi cho user này
+            if targets:
+                similarity_matrix = np.column_stack([similarity for _, _, similarity in targets])
+                weighted_ratings = np.asarray(model['bucket_ratings'].T @ similarity_matrix)
+                for i, (user_id, target_user, similarity) in enumerate(targets):
+                    scores[user_id]['demographic'] = self._finish_demographic_scores(
+                        target_user, similarity, weighted_ratings[:, i].copy()
+                    )
+        
+        return scores
     
     def create_scores_chart(self, recommendations, user_data, keyword="", top_n=15):
         """Tạo biểu đồ cột xếp chồng cho điểm số"""
@@ -1946,7 +2416,7 @@ class GameRecommendationSystem:
         ax.add_patch(plt.Rectangle((target_user_idx, 0), 1, n_users, fill=False, edgecolor='red', lw=3))
         
         # Customize plot
-        target_user_data = next((u for u in self.users_data if u['id'] == user_id), None)
+        target_user_data = self.users_by_id.get(user_id)
         plt.title(f'User Similarity Heatmap - Target: {target_user_data["name"]} (ID: {user_id})\n'
                  f'Age: {target_user_data["age"]}, Gender: {target_user_data["gender"]}', 
                  fontsize=14, fontweight='bold', pad=20)
@@ -1987,7 +2457,7 @@ class GameRecommendationSystem:
         
     def print_user_similarity_analysis(self, user_id):
         """In phân tích chi tiết về user similarity"""
-        target_user = next((u for u in self.users_data if u['id'] == user_id), None)
+        target_user = self.users_by_id.get(user_id)
         if not target_user:
             return
         
@@ -2056,7 +2526,7 @@ class GameRecommendationSystem:
             import seaborn as sns
         
         # Lấy thông tin target user
-        target_user = next((u for u in self.users_data if u['id'] == user_id), None)
+        target_user = self.users_by_id.get(user_id)
         if not target_user:
             return None
         
@@ -2088,7 +2558,7 @@ class GameRecommendationSystem:
         candidate_games = []
         for game_id in range(1, len(self.games_data) + 1):
             if game_id not in unique_interacted_set:
-                game = next((g for g in self.games_data if g['id'] == game_id), None)
+                game = self.games_by_id.get(game_id)
                 if game:
                     # Tính similarity với games user đã tương tác
                     similarities = []
@@ -2096,8 +2566,8 @@ class GameRecommendationSystem:
                         try:
                             interacted_idx = int(interacted_game_id) - 1
                             game_idx = game_id - 1
-                            if 0 <= interacted_idx < len(self.content_similarity_matrix) and 0 <= game_idx < len(self.content_similarity_matrix):
-                                sim_score = self.content_similarity_matrix[game_idx][interacted_idx]
+                            if 0 <= interacted_idx < self.similarity_index.n_items and 0 <= game_idx < self.similarity_index.n_items:
+                                sim_score = self.similarity_index.similarity(game_idx, interacted_idx)
                                 similarities.append(sim_score)
                         except (ValueError, TypeError):
                             continue
@@ -2121,7 +2591,7 @@ class GameRecommendationSystem:
         # Lấy thông tin chi tiết của games user đã tương tác
         user_game_details = []
         for game_id in set(interacted_games):
-            game = next((g for g in self.games_data if g['id'] == game_id), None)
+            game = self.games_by_id.get(game_id)
             if game:
                 interaction_type = []
                 if game_id in favorite_games:
@@ -2151,7 +2621,7 @@ class GameRecommendationSystem:
         # Tính similarity cho từng cặp (sử dụng dữ liệu trực tiếp từ similarity matrix)
         for i, rec in enumerate(top_recommendations):
             for j, user_game in enumerate(user_game_details):
-                sim_score = self.content_similarity_matrix[rec['game_id'] - 1][user_game['game_id'] - 1]
+                sim_score = self.similarity_index.similarity(rec['game_id'] - 1, user_game['game_id'] - 1)
                 similarity_matrix[i][j] = sim_score
         
         # Tạo labels cho trục
@@ -2280,7 +2750,7 @@ class GameRecommendationSystem:
             game_id = rec['game_id']
             
             # Get game details to calculate boost breakdown
-            game = next((g for g in self.games_data if g['id'] == game_id), None)
+            game = self.games_by_id.get(game_id)
             if not game:
                 continue
             
@@ -2480,7 +2950,7 @@ class GameRecommendationSystem:
                         color='white', bbox=dict(boxstyle='circle,pad=0.3', facecolor=colors[i], alpha=0.8))
         
         # User info and title
-        user_data = next((u for u in self.users_data if u['id'] == user_id), None)
+        user_data = self.users_by_id.get(user_id)
         fig.suptitle(f'7-Day Adaptive Boosting Impact Analysis - {user_data["name"] if user_data else f"User {user_id}"}\n'
                     f'How Recent Interactions (7 Days) Boost Game Scores',
                     fontsize=14, fontweight='bold', y=0.98)
@@ -2559,7 +3029,7 @@ class GameRecommendationSystem:
             return None
         
         # Lấy thông tin target user
-        target_user = next((u for u in self.users_data if u['id'] == user_id), None)
+        target_user = self.users_by_id.get(user_id)
         if not target_user:
             return None
         
@@ -2607,7 +3077,7 @@ class GameRecommendationSystem:
         connection_matrix = np.zeros((len(top_users), len(demo_games)))
         
         for i, user_sim in enumerate(top_users):
-            other_user = next((u for u in self.users_data if u['id'] == user_sim['user_id']), None)
+            other_user = self.users_by_id.get(user_sim['user_id'])
             if other_user:
                 user_games = set(other_user.get('favorite_games', []) + list(other_user.get('purchased_games', {}).keys()))
                 for j, game in enumerate(demo_games):
@@ -2631,7 +3101,7 @@ class GameRecommendationSystem:
         # Scatter plot: User similarity vs Game demographic score
         scatter_data = []
         for user_sim in top_users:
-            other_user = next((u for u in self.users_data if u['id'] == user_sim['user_id']), None)
+            other_user = self.users_by_id.get(user_sim['user_id'])
             if other_user:
                 user_games = set(other_user.get('favorite_games', []) + list(other_user.get('purchased_games', {}).keys()))
                 for game in demo_games:
@@ -2851,7 +3321,7 @@ class GameRecommendationSystem:
         # Thêm thông tin đầy đủ của từng game (bao gồm cả score)
         for rec in recommendations:
             # Tìm thông tin đầy đủ của game từ database
-            game_full_info = next((g for g in self.games_data if g['id'] == rec['game_id']), None)
+            game_full_info = self.games_by_id.get(rec['game_id'])
             
             game_info = {
                 "id": rec['game_id'],
@@ -2980,7 +3450,7 @@ def show_all_recommendations(recommender):
     
     # Hien thi goi y cho tat ca users
     for user_id in [1, 2, 3]:
-        user_data = next((u for u in recommender.users_data if u['id'] == user_id), None)
+        user_data = recommender.users_by_id.get(user_id)
         if not user_data:
             continue
             
@@ -3041,9 +3511,13 @@ def show_all_recommendations_with_query(recommender, query="", generate_charts=0
         print(f"Adaptive Boosting: DISABLED")
     print("="*60)
     
+    # ⚡ SVD / content / demographic cho ca khoi users trong mot lan
+    user_ids = [1, 2, 3]
+    block_scores = recommender.compute_component_scores(user_ids)
+    
     # Hien thi goi y cho tat ca users
-    for user_id in [1, 2, 3]:
-        user_data = next((u for u in recommender.users_data if u['id'] == user_id), None)
+    for user_id in user_ids:
+        user_data = recommender.users_by_id.get(user_id)
         if not user_data:
             continue
             
@@ -3080,7 +3554,8 @@ def show_all_recommendations_with_query(recommender, query="", generate_charts=0
             top_n=available_games,
             keyword=query,
             enable_adaptive=enable_adaptive,
-            recent_days=recent_days
+            recent_days=recent_days,
+            component_scores=block_scores[user_id]
         )
         
         # Hien thi ket qua
@@ -3093,7 +3568,7 @@ def show_all_recommendations_with_query(recommender, query="", generate_charts=0
 
 def show_recommendations_for_user(recommender, user_id, query="", generate_charts=0, enable_adaptive=True, recent_days=None):
     """Hien thi goi y cho 1 user cu the"""
-    user_data = next((u for u in recommender.users_data if u['id'] == user_id), None)
+    user_data = recommender.users_by_id.get(user_id)
     if not user_data:
         print(f"Khong tim thay user ID: {user_id}")
         return
@@ -3224,25 +3699,49 @@ def main():
     parser.add_argument('--chart', type=int, default=0, choices=[0, 1], help='Generate charts (0=No, 1=Yes). Default: 0')
     parser.add_argument('--adaptive', type=int, default=1, choices=[0, 1], help='Enable adaptive preference boosting (0=No, 1=Yes). Default: 1')
     parser.add_argument('--days', type=int, default=None, help='Analyze preferences from last N days (None=all time). Example: --days 7')
+    parser.add_argument('--verbose', action='store_true', help='Log chi tiết từng bước tính điểm (DEBUG)')
+    parser.add_argument('--snapshot', type=str, default=None,
+                        help='Thư mục snapshot model: load nếu khớp dữ liệu hiện tại, nếu không thì train rồi lưu vào đó')
     args = parser.parse_args()
     
-    print("Khoi tao Game Recommendation System...")
-    
-    # Tao instance
-    recommender = GameRecommendationSystem()
-    
-    # Load va preprocess data
-    if not recommender.load_data():
-        return
+    # Log ra console dạng message thuần (giống print trước đây); --verbose / AI_LOG_LEVEL=DEBUG để xem chi tiết
+    configure_logging(level='DEBUG' if args.verbose else None, fmt='plain', stream=sys.stdout)
     
-    recommender.preprocess_data()
+    print("Khoi tao Game Recommendation System...")
     
-    # Train models
-    print("Huan luyen SVD model...")
-    recommender.train_svd_model(k=2)
+    # Snapshot khớp fingerprint của các file dữ liệu → dùng lại model đã train (không train lại)
+    recommender = None
+    if args.snapshot:
+        from model_snapshot import load_model_snapshot, save_model_snapshot, file_fingerprint, SnapshotError
+        fingerprint = file_fingerprint(*DATA_FILES)
+        try:
+            recommender, _ = load_model_snapshot(args.snapshot, fingerprint)
+            print(f"Load snapshot model tu {args.snapshot}")
+        except FileNotFoundError:
+            pass
+        except SnapshotError as e:
+            print(f"Bo qua snapshot ({e}) - train lai")
     
-    print("Xay dung Content-based model...")
-    recommender.build_content_similarity()
+    if recommender is None:
+        # Tao instance
+        recommender = GameRecommendationSystem()
+        
+        # Load va preprocess data
+        if not recommender.load_data():
+            return
+        
+        recommender.preprocess_data()
+        
+        # Train models
+        print("Huan luyen SVD model...")
+        recommender.train_svd_model()
+        
+        print("Xay dung Content-based model...")
+        recommender.build_content_similarity()
+        
+        if args.snapshot:
+            save_model_snapshot(recommender, args.snapshot, fingerprint)
+            print(f"Da luu snapshot model vao {args.snapshot}")
     
     print("He thong da san sang!")
     
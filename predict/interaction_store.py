@@ -0,0 +1,342 @@
+"""
+Interaction Store
+SQLite storage of the web app (interactions, feedback, behavior patterns, training log)
+- Reads use a thread-safe pool of long-lived connections (no connect / close per call)
+- WAL journal: readers never block the writer and commits need no fsync of the main file
+  (synchronous=NORMAL)
+- Writes go through one writer thread: concurrent writes are committed together in one
+  transaction (group commit) → insert throughput grows with the number of concurrent requests
+  instead of every request contending for the database lock; callers return once committed
+- Statements are module constants → compiled once per connection (sqlite3 statement cache)
+- init_schema() creates every table the app uses, with covering indexes for per-user,
+  time-window queries
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import timezone
+
+# Connections kept for reads
+POOL_SIZE = 8
+
+# Seconds a connection waits on a locked database before failing
+BUSY_TIMEOUT_SECONDS = 10.0
+
+# Compiled statements kept per connection
+STATEMENT_CACHE_SIZE = 64
+
+# Most writes committed in one transaction
+MAX_WRITE_BATCH = 256
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS user_interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    game_id INTEGER,
+    interaction_type TEXT,
+    rating REAL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    game_id INTEGER,
+    feedback_type TEXT,
+    score REAL,
+    comment TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS learning_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    feature_name TEXT,
+    feature_value REAL,
+    weight REAL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_behavior_patterns (
+    user_id INTEGER PRIMARY KEY,
+    preferred_genres TEXT,
+    avg_price_range TEXT,
+    prefers_new_games INTEGER,
+    engagement_score REAL,
+    last_analyzed DATETIME,
+    pattern_data TEXT
+);
+
+CREATE TABLE IF NOT EXISTS ai_training_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    training_type TEXT,
+    interactions_count INTEGER,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    notes TEXT
+);
+
+-- Per-user history, newest first, answered from the index alone
+CREATE INDEX IF NOT EXISTS idx_user_interactions_user_time
+    ON user_interactions (user_id, timestamp, game_id, interaction_type, rating);
+
+CREATE INDEX IF NOT EXISTS idx_user_feedback_user_time ON user_feedback (user_id, timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_learning_data_user_time ON learning_data (user_id, timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_ai_training_log_time ON ai_training_log (timestamp);
+'''
+
+INSERT_INTERACTION = '''
+    INSERT INTO user_interactions (user_id, game_id, interaction_type, rating)
+    VALUES (?, ?, ?, ?)
+'''
+
+SELECT_INTERACTIONS = '''
+    SELECT game_id, interaction_type, rating, timestamp
+    FROM user_interactions
+    WHERE user_id = ?
+    ORDER BY timestamp DESC
+'''
+
+SELECT_INTERACTIONS_SINCE = '''
+    SELECT game_id, interaction_type, rating, timestamp
+    FROM user_interactions
+    WHERE user_id = ? AND timestamp >= ?
+    ORDER BY timestamp DESC
+'''
+
+INSERT_FEEDBACK = '''
+    INSERT INTO user_feedback (user_id, game_id, feedback_type, score, comment)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+UPSERT_BEHAVIOR_PATTERNS = '''
+    INSERT OR REPLACE INTO user_behavior_patterns
+    (user_id, preferred_genres, avg_price_range, prefers_new_games,
+     engagement_score, last_analyzed, pattern_data)
+    VALUES (?, ?, ?, ?, ?, datetime('now'), ?)
+'''
+
+INSERT_TRAINING_LOG = '''
+    INSERT INTO ai_training_log (user_id, training_type, interactions_count, timestamp, notes)
+    VALUES (?, ?, ?, datetime('now'), ?)
+'''
+
+SELECT_LAST_TRAINING = '''
+    SELECT timestamp, interactions_count, notes
+    FROM ai_training_log
+    ORDER BY timestamp DESC
+    LIMIT 1
+'''
+
+
+def sql_timestamp(moment):
+    """CURRENT_TIMESTAMP format (UTC 'YYYY-MM-DD HH:MM:SS') of a datetime (naive = UTC)"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class _PendingWrite:
+    """One write waiting for the writer thread"""
+
+    __slots__ = ('sql', 'params', 'done', 'lastrowid', 'error')
+
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.params = params
+        self.done = threading.Event()
+        self.lastrowid = None
+        self.error = None
+
+
+class InteractionStore:
+    """Pooled, WAL-mode SQLite database of the web app"""
+
+    def __init__(self, path, pool_size=POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._writes = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.write_batches = 0
+        self.writes = 0
+
+    # ----------------------------------------------------------- connections
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Pooled connection for reads (waits for a free one when pool_size are in use)"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                can_open = self._opened < self.pool_size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._pool_lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+
+    def init_schema(self):
+        """Create the tables and indexes (existing databases only get what they miss)"""
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def close(self):
+        """Stop the writer (after the queued writes) and close the pooled connections"""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(None)
+            writer.join()
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._pool_lock:
+            self._opened = 0
+
+    # ----------------------------------------------------------------- writes
+
+    def execute_write(self, sql, params=()):
+        """Run a write on the writer thread → lastrowid once it is committed"""
+        write = _PendingWrite(sql, params)
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='sqlite-writer', daemon=True)
+                self._writer.start()
+            self._writes.put(write)
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+        return write.lastrowid
+
+    def _write_loop(self):
+        conn = None
+        try:
+            conn = self._connect()
+            while True:
+                first = self._writes.get()
+                if first is None:
+                    return
+                batch = [first]
+                while len(batch) < MAX_WRITE_BATCH:
+                    try:
+                        write = self._writes.get_nowait()
+                    except queue.Empty:
+                        break
+                    if write is None:
+                        self._writes.put(None)   # stop after this batch
+                        break
+                    batch.append(write)
+                self._commit_batch(conn, batch)
+        except Exception as e:
+            # Writer unusable (e.g. the database cannot be opened): fail the queued writes,
+            # the next execute_write starts a new writer
+            with self._writer_lock:
+                if self._writer is threading.current_thread():
+                    self._writer = None
+                self._fail_queued(e)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _commit_batch(self, conn, batch):
+        """All writes in one transaction; if one fails, each is retried alone so only it fails"""
+        try:
+            try:
+                with conn:
+                    for write in batch:
+                        write.lastrowid = conn.execute(write.sql, write.params).lastrowid
+            except Exception:
+                # Any error (sqlite3.Error, OverflowError on a too large integer, ...) → isolate it
+                for write in batch:
+                    write.lastrowid = None
+                    try:
+                        with conn:
+                            write.lastrowid = conn.execute(write.sql, write.params).lastrowid
+                    except Exception as e:
+                        write.error = e
+            self.write_batches += 1
+            self.writes += len(batch)
+        finally:
+            for write in batch:
+                write.done.set()
+
+    def _fail_queued(self, error):
+        """Release every write still queued with `error`"""
+        while True:
+            try:
+                write = self._writes.get_nowait()
+            except queue.Empty:
+                return
+            if write is not None:
+                write.error = error
+                write.done.set()
+
+    def add_interaction(self, user_id, game_id, interaction_type, rating=None):
+        return self.execute_write(INSERT_INTERACTION, (user_id, game_id, interaction_type, rating))
+
+    def add_feedback(self, user_id, game_id, feedback_type, score=None, comment=None):
+        return self.execute_write(INSERT_FEEDBACK, (user_id, game_id, feedback_type, score, comment))
+
+    def save_behavior_patterns(self, user_id, preferred_genres, avg_price_range, prefers_new_games,
+                               engagement_score, pattern_data):
+        return self.execute_write(UPSERT_BEHAVIOR_PATTERNS, (
+            user_id, preferred_genres, avg_price_range, prefers_new_games, engagement_score, pattern_data
+        ))
+
+    def log_training(self, user_id, training_type, interactions_count, notes=None):
+        return self.execute_write(INSERT_TRAINING_LOG, (user_id, training_type, interactions_count, notes))
+
+    # ------------------------------------------------------------------ reads
+
+    def get_interactions(self, user_id, since=None):
+        """
+        [(game_id, interaction_type, rating, timestamp), ...] of a user, newest first
+        since: datetime (UTC when naive) - only interactions at or after it
+        """
+        with self.connection() as conn:
+            if since is None:
+                return conn.execute(SELECT_INTERACTIONS, (user_id,)).fetchall()
+            return conn.execute(SELECT_INTERACTIONS_SINCE, (user_id, sql_timestamp(since))).fetchall()
+
+    def stats(self):
+        """Row counts and the last training run"""
+        with self.connection() as conn:
+            return {
+                'total_interactions': conn.execute('SELECT COUNT(*) FROM user_interactions').fetchone()[0],
+                'total_users': conn.execute('SELECT COUNT(DISTINCT user_id) FROM user_interactions').fetchone()[0],
+                'users_with_behavior': conn.execute('SELECT COUNT(*) FROM user_behavior_patterns').fetchone()[0],
+                'total_retrains': conn.execute('SELECT COUNT(*) FROM ai_training_log').fetchone()[0],
+                'last_retrain': conn.execute(SELECT_LAST_TRAINING).fetchone(),
+            }
@@ -0,0 +1,348 @@
+"""
+Keyword Index
+Inverted index for keyword search - replaces scanning every game's fields on each query
+- Built once per catalog version over the searchable text fields and min/rec spec tokens
+- Postings carry the field and its weight → a query only touches postings of its terms
+- Price / release year / multiplayer signals come from GameFeatureStore columns (sorted / bucketed lookups)
+- Scores use the same rules and 0-1 normalisation as GameRecommendationSystem.get_keyword_score
+- KeywordMatcher: keyword_library compiled once for query expansion (+ LRU cache of expanded queries)
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+from game_feature_store import GameFeatureStore
+
+
+# Weight of each searchable text field (one match per field)
+TEXT_FIELD_WEIGHTS = {
+    'name': 3.0,           # Game name matters most
+    'description': 2.0,
+    'genre': 2.5,
+    'publisher': 1.5,
+    'platform': 1.5,
+    'language': 1.5,
+    'mode': 1.0,
+    'age_rating': 1.0,
+}
+
+# Spec fields searched in both min_spec and rec_spec (one match per field)
+SPEC_FIELDS = ('cpu', 'gpu', 'ram')
+SPEC_WEIGHT = 1.5
+
+# Field codes of packed postings (snapshots)
+POSTING_FIELDS = tuple(TEXT_FIELD_WEIGHTS) + SPEC_FIELDS
+
+PRICE_WEIGHT = 1.0
+PRICE_TOLERANCE = 0.2        # Keyword within 20% of the price
+YEAR_EXACT_WEIGHT = 2.0
+YEAR_NEAR_WEIGHT = 1.0
+YEAR_NEAR_RANGE = 2          # ± years counted as "near"
+MULTIPLAYER_WEIGHT = 1.0
+
+# Raw score that maps to 1.0
+MAX_KEYWORD_SCORE = 15.0
+
+# Shorter search terms are ignored
+MIN_TERM_LENGTH = 2
+
+YEAR_PATTERN = re.compile(r'\b(?:19|20)\d{2}\b')
+
+# Expanded queries remembered per KeywordMatcher
+EXPAND_CACHE_SIZE = 1024
+
+# Joins synonym strings into one searchable text (never part of a query phrase)
+_SYNONYM_SEPARATOR = '\x00'
+
+
+def field_tokens(value):
+    """Lower-cased whitespace tokens of a field value (lists are joined first)"""
+    if isinstance(value, list):
+        value = ' '.join(str(item) for item in value)
+    return str(value).lower().split()
+
+
+def parse_keyword_number(keyword):
+    """Numeric value of a keyword like "300k" / "1.2m" / "8gb", or None"""
+    try:
+        return float(keyword.lower().strip().replace('gb', '').replace('mb', '').replace('k', '000').replace('m', '000000'))
+    except ValueError:
+        return None
+
+
+def find_keyword_year(keyword):
+    """First year (1900-2099) mentioned in the keyword, or None"""
+    matches = YEAR_PATTERN.findall(keyword.lower().strip())
+    return int(matches[0]) if matches else None
+
+
+class KeywordIndex:
+    """Inverted index over the game catalog for keyword scoring"""
+
+    def __init__(self, games, features=None):
+        """
+        Args:
+            games: Iterable of game records (one per game id)
+            features: GameFeatureStore of the catalog (price / release year / multiplayer columns)
+        """
+        games = list(games)
+        if features is None:
+            features = GameFeatureStore(games)
+
+        self.postings = {}          # {term: [(game_id, field, weight), ...]}
+        self.prices = []            # Sorted [(price, game_id)] for positive numeric prices
+        self.games_by_year = {}     # {release_year: [game_id, ...]}
+        self.multiplayer_games = []
+        self.n_games = len(games)
+
+        release_years = features.release_years(0)
+        for game in games:
+            self._add_text(game)
+
+            row = features.row(game['id'])
+            if features.price[row] > 0:
+                self.prices.append((features.price[row].item(), game['id']))
+            if release_years[row] > 0:
+                self.games_by_year.setdefault(release_years[row].item(), []).append(game['id'])
+            if features.multiplayer[row]:
+                self.multiplayer_games.append(game['id'])
+
+        self.prices.sort()
+        self._price_values = [price for price, _ in self.prices]
+
+    # ==========================
+    # SNAPSHOTS
+    # ==========================
+
+    def to_arrays(self):
+        """(arrays, meta) for a model snapshot - postings packed term by term (game ids must be ints)"""
+        field_codes = {field: code for code, field in enumerate(POSTING_FIELDS)}
+        terms = list(self.postings)
+        offsets = [0]
+        game_ids = []
+        fields = []
+        for term in terms:
+            for game_id, field, _ in self.postings[term]:
+                game_ids.append(game_id)
+                fields.append(field_codes[field])
+            offsets.append(len(game_ids))
+
+        years = sorted(self.games_by_year)
+        arrays = {
+            'posting_terms': np.array(terms, dtype=str),
+            'posting_offsets': np.array(offsets, dtype=np.int64),
+            'posting_game_ids': np.array(game_ids, dtype=np.int64),
+            'posting_fields': np.array(fields, dtype=np.int8),
+            'price_values': np.array(self._price_values, dtype=np.float64),
+            'price_game_ids': np.array([game_id for _, game_id in self.prices], dtype=np.int64),
+            'years': np.array(years, dtype=np.int64),
+            'year_offsets': np.cumsum([0] + [len(self.games_by_year[year]) for year in years], dtype=np.int64),
+            'year_game_ids': np.array([game_id for year in years for game_id in self.games_by_year[year]], dtype=np.int64),
+            'multiplayer_games': np.array(self.multiplayer_games, dtype=np.int64),
+        }
+        return arrays, {'n_games': self.n_games}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        """Index restored from to_arrays() output - postings are unpacked per term on first use"""
+        index = cls.__new__(cls)
+        index.postings = PackedPostings(
+            arrays['posting_terms'], arrays['posting_offsets'], arrays['posting_game_ids'], arrays['posting_fields']
+        )
+        index._price_values = arrays['price_values'].tolist()
+        index.prices = list(zip(index._price_values, arrays['price_game_ids'].tolist()))
+        offsets = arrays['year_offsets'].tolist()
+        year_game_ids = arrays['year_game_ids'].tolist()
+        index.games_by_year = {
+            year: year_game_ids[offsets[i]:offsets[i + 1]] for i, year in enumerate(arrays['years'].tolist())
+        }
+        index.multiplayer_games = arrays['multiplayer_games'].tolist()
+        index.n_games = meta['n_games']
+        return index
+
+    def _add_text(self, game):
+        """Postings of a game's text and spec fields"""
+        game_id = game['id']
+        for field, weight in TEXT_FIELD_WEIGHTS.items():
+            for term in set(field_tokens(game.get(field, ''))):
+                self.postings.setdefault(term, []).append((game_id, field, weight))
+
+        min_spec = game.get('min_spec') or {}
+        rec_spec = game.get('rec_spec') or {}
+        for field in SPEC_FIELDS:
+            terms = set(field_tokens(min_spec.get(field, ''))) | set(field_tokens(rec_spec.get(field, '')))
+            for term in terms:
+                self.postings.setdefault(term, []).append((game_id, field, SPEC_WEIGHT))
+
+    def scores(self, keyword, terms):
+        """
+        Keyword scores for the games matching a query
+
+        Args:
+            keyword: Original query text (used for price / year / multiplayer)
+            terms: Search terms (original + expanded keywords)
+
+        Returns:
+            Dict {game_id: score in (0, 1]} - games not in the dict score 0
+        """
+        if not keyword or keyword.strip() == "":
+            return {}
+
+        # Text + spec fields: each field counts once per game
+        matched_fields = {}
+        for term in terms:
+            if len(term) < MIN_TERM_LENGTH:
+                continue
+            for game_id, field, weight in self.postings.get(term, ()):
+                matched_fields.setdefault(game_id, {})[field] = weight
+
+        raw_scores = {game_id: sum(fields.values()) for game_id, fields in matched_fields.items()}
+
+        for game_id in self._price_matches(keyword):
+            raw_scores[game_id] = raw_scores.get(game_id, 0.0) + PRICE_WEIGHT
+
+        keyword_year = find_keyword_year(keyword)
+        if keyword_year is not None:
+            for offset in range(-YEAR_NEAR_RANGE, YEAR_NEAR_RANGE + 1):
+                weight = YEAR_EXACT_WEIGHT if offset == 0 else YEAR_NEAR_WEIGHT
+                for game_id in self.games_by_year.get(keyword_year + offset, ()):
+                    raw_scores[game_id] = raw_scores.get(game_id, 0.0) + weight
+
+        if 'multiplayer' in keyword.lower():
+            for game_id in self.multiplayer_games:
+                raw_scores[game_id] = raw_scores.get(game_id, 0.0) + MULTIPLAYER_WEIGHT
+
+        return {game_id: min(score / MAX_KEYWORD_SCORE, 1.0) for game_id, score in raw_scores.items() if score > 0}
+
+    def _price_matches(self, keyword):
+        """Games whose price is within PRICE_TOLERANCE of a numeric keyword"""
+        value = parse_keyword_number(keyword)
+        if value is None or not value > 0 or value == float('inf'):
+            return []
+
+        # |price - value| / price < tolerance  ⇔  value / (1 + tol) < price < value / (1 - tol)
+        # Slightly widened range from the sorted prices, then the exact check
+        low = bisect_left(self._price_values, value / (1 + PRICE_TOLERANCE) * (1 - 1e-9))
+        high = bisect_right(self._price_values, value / (1 - PRICE_TOLERANCE) * (1 + 1e-9))
+        return [
+            game_id for price, game_id in self.prices[low:high]
+            if abs(price - value) / price < PRICE_TOLERANCE
+        ]
+
+
+class PackedPostings:
+    """
+    Read-only postings of a snapshot: term → slice of flat game id / field code arrays
+    Same get() as the {term: [(game_id, field, weight), ...]} dict of a built index
+    """
+
+    def __init__(self, terms, offsets, game_ids, fields):
+        self._row_by_term = {term: row for row, term in enumerate(terms.tolist())}
+        self._offsets = offsets
+        self._game_ids = game_ids
+        self._fields = fields
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._row_by_term)
+
+    def __contains__(self, term):
+        return term in self._row_by_term
+
+    def get(self, term, default=None):
+        postings = self._cache.get(term)
+        if postings is not None:
+            return postings
+        row = self._row_by_term.get(term)
+        if row is None:
+            return default
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        postings = []
+        for game_id, code in zip(self._game_ids[start:end].tolist(), self._fields[start:end].tolist()):
+            field = POSTING_FIELDS[code]
+            postings.append((game_id, field, TEXT_FIELD_WEIGHTS.get(field, SPEC_WEIGHT)))
+        self._cache[term] = postings
+        return postings
+
+
+class KeywordMatcher:
+    """
+    keyword_library ({english_key: "synonym synonym ..."}) compiled for query expansion
+    - Phrase match: one substring search over all synonym strings joined together
+    - Word match: token → entries map, intersected over the phrase's words
+    Same matching rules as the original per-entry scan, with an LRU cache of expanded queries
+    """
+
+    def __init__(self, library, cache_size=EXPAND_CACHE_SIZE):
+        """
+        Args:
+            library: Dict {english_key: synonyms string}
+            cache_size: Number of expanded queries to keep
+        """
+        self.library = library
+        self.keys = list((library or {}).keys())
+        self._synonyms = [str(value).lower() for value in (library or {}).values()]
+
+        self._text = _SYNONYM_SEPARATOR.join(self._synonyms)
+        self._starts = []
+        offset = 0
+        for synonyms in self._synonyms:
+            self._starts.append(offset)
+            offset += len(synonyms) + len(_SYNONYM_SEPARATOR)
+
+        self._entries_by_token = {}
+        for entry, synonyms in enumerate(self._synonyms):
+            for token in synonyms.split():
+                self._entries_by_token.setdefault(token, set()).add(entry)
+
+        self.expand = lru_cache(maxsize=cache_size)(self._expand)
+
+    def _expand(self, query):
+        """
+        English keys matched by a lower-cased, stripped query (comma separated phrases)
+        Returns the keys joined by spaces (library order), or the query itself when nothing matches
+        """
+        matched = set()
+        for phrase in query.split(','):
+            phrase = phrase.strip()
+            matched |= self._phrase_entries(phrase)
+            matched |= self._word_entries(phrase)
+
+        if matched:
+            return ' '.join(self.keys[entry] for entry in sorted(matched))
+        return query
+
+    def _phrase_entries(self, phrase):
+        """Entries whose synonym string contains the phrase"""
+        if not phrase:
+            return set(range(len(self.keys)))
+        if _SYNONYM_SEPARATOR in phrase:
+            return {entry for entry, synonyms in enumerate(self._synonyms) if phrase in synonyms}
+
+        entries = set()
+        position = self._text.find(phrase)
+        while position != -1:
+            entry = bisect_right(self._starts, position) - 1
+            entries.add(entry)
+            # Continue from the next entry's synonyms
+            if entry + 1 >= len(self._starts):
+                break
+            position = self._text.find(phrase, self._starts[entry + 1])
+        return entries
+
+    def _word_entries(self, phrase):
+        """Entries whose synonym tokens include every word of the phrase"""
+        words = phrase.split()
+        if not words:
+            return set(range(len(self.keys)))
+
+        entries = None
+        for word in set(words):
+            word_entries = self._entries_by_token.get(word)
+            if not word_entries:
+                return set()
+            entries = set(word_entries) if entries is None else entries & word_entries
+        return entries
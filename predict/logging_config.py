@@ -0,0 +1,177 @@
+"""
+Logging Config
+Level-gated, structured logging for the unified service and the recommender
+- Loggers live under "ai." (ai.service, ai.recommender, ai.similarity): default level from
+  AI_LOG_LEVEL, per-logger overrides from AI_LOG_LEVELS ("recommender=DEBUG,service=WARNING")
+- INFO keeps model builds, data changes and errors; DEBUG adds the per-request detail
+- Messages take %-style arguments → formatted only when a handler actually emits them
+- AI_LOG_FORMAT: text (timestamped lines), json (one object per line) or plain (message only, CLI)
+- AI_TRACE_SAMPLE_RATE: share of requests traced at DEBUG whatever the levels above,
+  every record of a request tagged with its request_id
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import uuid
+
+ROOT_LOGGER = 'ai'
+
+LOG_LEVEL = os.environ.get('AI_LOG_LEVEL', 'INFO').strip().upper()
+LOG_LEVELS = os.environ.get('AI_LOG_LEVELS', '')
+LOG_FORMAT = os.environ.get('AI_LOG_FORMAT', 'text').strip().lower()
+TRACE_SAMPLE_RATE = float(os.environ.get('AI_TRACE_SAMPLE_RATE', '0') or 0)
+
+TEXT_FORMAT = '%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s'
+
+# (request_id, sampled) of the request being served by this thread / task
+_request = contextvars.ContextVar('ai_request', default=None)
+
+# LevelGate of the configured handler (None until configure_logging)
+_gate = None
+
+
+def get_logger(name):
+    """Logger under the "ai." namespace (levels configured by configure_logging)"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def parse_levels(spec):
+    """{logger name: level} from "recommender=DEBUG,ai.service=WARNING" (ValueError on bad levels)"""
+    levels = {}
+    for part in spec.split(','):
+        name, _, level = part.strip().partition('=')
+        if not name or not level:
+            continue
+        name = name.strip()
+        if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + '.'):
+            name = f'{ROOT_LOGGER}.{name}'
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"unknown log level: {level}")
+        levels[name] = value
+    return levels
+
+
+class LevelGate(logging.Filter):
+    """
+    Handler filter: tags records with the request_id and applies the configured levels
+    (loggers run at DEBUG while tracing is sampled, so the gate drops the unsampled detail)
+    """
+
+    def __init__(self, default_level, levels):
+        super().__init__()
+        self.default_level = default_level
+        self.levels = levels
+
+    def threshold(self, name):
+        while name:
+            if name in self.levels:
+                return self.levels[name]
+            name = name.rpartition('.')[0]
+        return self.default_level
+
+    def filter(self, record):
+        current = _request.get()
+        record.request_id = current[0] if current else '-'
+        if current and current[1]:
+            return True
+        return record.levelno >= self.threshold(record.name)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; extra={'fields': {...}} adds structured fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'request_id', '-') != '-':
+            entry['request_id'] = record.request_id
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=None, levels=None, fmt=None, stream=None):
+    """
+    Attach the "ai" handler (replaces the one of an earlier call)
+    Arguments default to the AI_LOG_* environment variables
+    """
+    default_level = level if isinstance(level, int) else logging.getLevelName(str(level or LOG_LEVEL).upper())
+    if not isinstance(default_level, int):
+        default_level = logging.INFO
+    per_logger = parse_levels(LOG_LEVELS) if levels is None else parse_levels(levels)
+    fmt = fmt or LOG_FORMAT
+
+    global _gate
+    _gate = LevelGate(default_level, per_logger)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.addFilter(_gate)
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    elif fmt == 'plain':
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handler._ai_handler = True
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for old in [h for h in root.handlers if getattr(h, '_ai_handler', False)]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.propagate = False
+
+    # Logger levels short-circuit disabled calls before a record is built; with trace sampling
+    # every logger has to produce DEBUG records and the gate filters them per request
+    if TRACE_SAMPLE_RATE > 0:
+        root.setLevel(logging.DEBUG)
+        for name in per_logger:
+            logging.getLogger(name).setLevel(logging.NOTSET)
+    else:
+        root.setLevel(default_level)
+        for name, value in per_logger.items():
+            logging.getLogger(name).setLevel(value)
+    return handler
+
+
+def start_request_trace():
+    """
+    Begin a request in this context: new request_id, sampled with probability AI_TRACE_SAMPLE_RATE
+    Returns (request_id, sampled)
+    """
+    sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    request_id = uuid.uuid4().hex[:12]
+    _request.set((request_id, sampled))
+    return request_id, sampled
+
+
+def end_request_trace():
+    _request.set(None)
+
+
+def request_sampled():
+    """True while serving a request chosen for tracing"""
+    current = _request.get()
+    return bool(current and current[1])
+
+
+def debug_enabled(logger):
+    """
+    Whether DEBUG records of this logger are emitted now - guard for detail that costs
+    something to compute (not just to format)
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    if _gate is None or TRACE_SAMPLE_RATE <= 0:
+        return True
+    return request_sampled() or _gate.threshold(logger.name) <= logging.DEBUG
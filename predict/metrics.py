@@ -0,0 +1,184 @@
+"""
+Metrics
+Latency histograms and counters for the unified service, exposed in the Prometheus text format
+- stage_timer(path) → lap timer: timer.lap('svd') records the time since the previous lap
+  as ai_stage_duration_seconds{path, stage} (no re-indentation of the timed code)
+- Counters / histograms are plain dicts behind a lock (stdlib only, no client library)
+- Collectors turn stats objects already kept by the service (model / session / similarity
+  caches) into metrics at scrape time instead of counting twice
+- AI_METRICS_ENABLED=0 → stage_timer returns a shared no-op timer and observe/inc return at once
+"""
+
+import bisect
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.environ.get('AI_METRICS_ENABLED', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+# Seconds (sub-millisecond stages up to full model builds)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Bytes (1 KB … 64 MB, ×4)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, _format_labels(self.labelnames, labels), value) for labels, value in values.items()]
+
+
+class Histogram:
+    """Bucketed observations per label values (cumulative buckets, _sum, _count)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # {labels: [per-bucket counts (last = +Inf), sum]}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        lines = []
+        for labels, (counts, total) in series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _format_number(bound) + '"'
+                lines.append((self.name + '_bucket', _format_labels(self.labelnames, labels, le), cumulative))
+            lines.append((self.name + '_sum', _format_labels(self.labelnames, labels), total))
+            lines.append((self.name + '_count', _format_labels(self.labelnames, labels), cumulative))
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics of the process + collectors evaluated at scrape time"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        """
+        collect() → [(name, kind, help, [({label: value}, number), ...]), ...]
+        kind: 'counter' or 'gauge'
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        out = []
+        for metric in self._metrics:
+            out.append(f'# HELP {metric.name} {metric.help}')
+            out.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                out.append(f'{name}{labels} {_format_number(value)}')
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                out.append(f'# HELP {name} {help_text}')
+                out.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    label_text = _format_labels(labels.keys(), labels.values())
+                    out.append(f'{name}{label_text} {_format_number(value)}')
+        return '\n'.join(out) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'ai_stage_duration_seconds', 'Time spent in each stage of a request or model build', ('path', 'stage')
+)
+
+
+class StageTimer:
+    """Lap timer: each lap() records the time since the previous lap (or creation) under a stage name"""
+
+    __slots__ = ('path', '_last')
+
+    def __init__(self, path):
+        self.path = path
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        STAGE_SECONDS.observe(now - self._last, self.path, stage)
+        self._last = now
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def lap(self, stage):
+        pass
+
+
+NOOP_TIMER = _NoopTimer()
+
+
+def stage_timer(path):
+    """StageTimer for one run of a path (shared no-op timer when metrics are disabled)"""
+    return StageTimer(path) if METRICS_ENABLED else NOOP_TIMER
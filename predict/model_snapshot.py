@@ -0,0 +1,414 @@
+"""
+Model Snapshot
+Versioned on-disk snapshot of a trained GameRecommendationSystem → a new process serves
+without rebuilding the matrix, SVD, TF-IDF / similarity index or keyword index
+- One directory: manifest.json + one .npy per array (CSR matrices as data / indices / indptr)
+  + the games / users records and reference data (cpu / gpu / keyword library) as JSON
+- Arrays load as read-only memory maps by default → pages are read on first use and shared
+  between processes mapping the same snapshot
+- The manifest records the data fingerprint the model was built from, the model config and the
+  dtype / shape of every array; load_model_snapshot refuses a snapshot that does not match
+- save_model_snapshot writes a temporary directory and renames it into place (readers never
+  see a half-written snapshot)
+- save_similarity_snapshot / load_similarity_snapshot: the same format for the similar-games
+  neighbour table of one catalog (ContentSimilarityEngine)
+(.npz archives cannot be memory-mapped, hence plain .npy files)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+from content_similarity_engine import ContentSimilarityEngine
+from game_feature_store import GameFeatureStore
+from game_recommendation_system import (
+    GameRecommendationSystem, SVD_RANK, CONTENT_SIMILARITY_TOP_K, CONTENT_SIMILARITY_EXACT
+)
+from keyword_index import KeywordIndex, KeywordMatcher
+from preference_boost import PreferenceBoostEngine
+from similarity_index import SimilarityIndex
+
+SNAPSHOT_FORMAT = 1
+
+# manifest "kind" of a similar-games snapshot (model snapshots have none)
+SIMILARITY_KIND = 'similar_games'
+
+MANIFEST_FILE = 'manifest.json'
+ARRAYS_DIR = 'arrays'
+GAMES_FILE = 'games.json'
+USERS_FILE = 'users.json'
+REFERENCE_FILE = 'reference.json'
+
+SVD_ARRAYS = ('U', 'sigma', 'Vt', 'user_factors', 'user_ratings_mean')
+
+
+class SnapshotError(Exception):
+    """Snapshot missing, corrupt, or built from other data / config (caller rebuilds)"""
+
+
+def data_fingerprint(games, users):
+    """Content fingerprint of a games/users payload (stable across key order)"""
+    payload = json.dumps({'games': games, 'users': users}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def file_fingerprint(*paths):
+    """Fingerprint of the raw bytes of data files (CLI / web app reading game.json from disk)"""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def model_config():
+    """Settings a snapshot must share with the running code to be reusable"""
+    return {
+        'svd_rank': SVD_RANK,
+        'similarity_top_k': CONTENT_SIMILARITY_TOP_K,
+        'similarity_exact': CONTENT_SIMILARITY_EXACT,
+    }
+
+
+def read_manifest(directory):
+    """Manifest of the snapshot in a directory (FileNotFoundError if there is none)"""
+    with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ==========================
+# SAVE
+# ==========================
+
+def save_model_snapshot(recommender, directory, fingerprint):
+    """
+    Write a trained recommender to `directory` (replacing an existing snapshot)
+
+    Args:
+        recommender: GameRecommendationSystem after preprocess_data / train_svd_model / build_content_similarity
+        directory: Snapshot directory
+        fingerprint: Key of the data the model was built from (checked on load)
+
+    Returns:
+        The manifest written
+    """
+    if recommender.svd_model is None or recommender.similarity_index is None:
+        raise SnapshotError("model is not trained (SVD / similarity index missing)")
+    for name, ids in (('game', recommender.game_ids), ('user', recommender.user_ids)):
+        if not all(isinstance(item, (int, np.integer)) and not isinstance(item, bool) for item in ids):
+            raise SnapshotError(f"{name} ids must be integers to be snapshotted")
+
+    arrays, meta = _model_arrays(recommender)
+    return _write_snapshot(directory, arrays, {
+        GAMES_FILE: recommender.games_data,
+        USERS_FILE: recommender.users_data,
+        REFERENCE_FILE: {
+            'keyword_library': getattr(recommender, 'keyword_library', {}) or {},
+            'cpu_data': recommender.cpu_data or {},
+            'gpu_data': recommender.gpu_data or {},
+        },
+    }, {
+        'fingerprint': fingerprint,
+        'config': model_config(),
+        'counts': {
+            'games': len(recommender.games_data),
+            'users': len(recommender.users_data),
+            'interactions': int(recommender.user_item_matrix.nnz),
+        },
+        'meta': meta,
+    })
+
+
+def save_similarity_snapshot(engine, directory, fingerprint):
+    """
+    Write a ContentSimilarityEngine (neighbour table + its catalog) to `directory`
+
+    Args:
+        engine: ContentSimilarityEngine after load_games
+        directory: Snapshot directory
+        fingerprint: Key of the catalog the table was built from (checked on load)
+
+    Returns:
+        The manifest written
+    """
+    if engine.similarity_index is None:
+        raise SnapshotError("similarity engine has no neighbour table")
+    arrays, meta = engine.to_arrays()
+    return _write_snapshot(directory, arrays, {GAMES_FILE: engine.games_data}, {
+        'kind': SIMILARITY_KIND,
+        'fingerprint': fingerprint,
+        'counts': {'games': len(engine.games_data)},
+        'meta': meta,
+        # Catalog order of the table rows (lets a loader reuse records it already holds)
+        'game_ids': [game['id'] for game in engine.games_data],
+    })
+
+
+def _write_snapshot(directory, arrays, json_files, manifest):
+    """Stage the arrays, JSON files and manifest, then swap them in as `directory`"""
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = os.path.join(parent, f'.{os.path.basename(directory)}.tmp-{uuid.uuid4().hex[:8]}')
+    os.makedirs(os.path.join(staging, ARRAYS_DIR))
+    try:
+        entries = {name: _write_array(staging, name, value) for name, value in arrays.items()}
+        for filename, value in json_files.items():
+            _write_json(staging, filename, value)
+
+        manifest = {
+            'format': SNAPSHOT_FORMAT,
+            'created_at': time.time(),
+            **manifest,
+            'numpy': np.__version__,
+            'arrays': entries,
+        }
+        # Manifest last: a directory without one is never loaded
+        _write_json(staging, MANIFEST_FILE, manifest)
+
+        _replace_directory(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _model_arrays(recommender):
+    """({name: ndarray or CSR}, meta) of every component"""
+    arrays = {
+        'model.user_item_matrix': recommender.user_item_matrix,
+        'model.user_ids': np.asarray(recommender.user_ids, dtype=np.int64),
+        'model.game_ids': np.asarray(recommender.game_ids, dtype=np.int64),
+    }
+    svd = recommender.svd_model
+    for name in SVD_ARRAYS:
+        arrays[f'svd.{name}'] = svd[name]
+
+    # Demographic buckets: representative users by position in users_data, rows by user id
+    demographic = recommender.demographic_model
+    position = {id(user): row for row, user in enumerate(recommender.users_data)}
+    row_user_ids = np.zeros(len(demographic['row_bucket']), dtype=np.int64)
+    for user_id, rows in demographic['rows_by_user'].items():
+        row_user_ids[rows] = user_id
+    arrays.update({
+        'demographic.bucket_user_rows': np.array([position[id(user)] for user in demographic['bucket_users']], dtype=np.int64),
+        'demographic.bucket_sizes': demographic['bucket_sizes'],
+        'demographic.bucket_ratings': demographic['bucket_ratings'],
+        'demographic.user_ratings': demographic['user_ratings'],
+        'demographic.row_bucket': demographic['row_bucket'],
+        'demographic.row_user_ids': row_user_ids,
+    })
+
+    meta = {
+        'svd': {'k': svd['k'], 'warm_started': svd['warm_started']},
+        'demographic': {'n_games': demographic['n_games']},
+    }
+    for prefix, component in (('similarity', recommender.similarity_index),
+                              ('features', recommender.feature_store),
+                              ('keywords', recommender.keyword_index)):
+        component_arrays, component_meta = component.to_arrays()
+        arrays.update({f'{prefix}.{name}': value for name, value in component_arrays.items()})
+        meta[prefix] = component_meta
+    return arrays, meta
+
+
+def _write_array(directory, name, value):
+    """Save one array (or the three arrays of a CSR matrix) → manifest entry"""
+    if issparse(value):
+        value = value.tocsr()
+        return {
+            'format': 'csr',
+            'shape': list(value.shape),
+            'parts': {part: _write_array(directory, f'{name}.{part}', getattr(value, part))
+                      for part in ('data', 'indices', 'indptr')},
+        }
+    # svds returns reversed views (negative strides) - stored flipped and restored as the same view,
+    # so BLAS sees the original memory layout and loaded scores match the trained model bit for bit
+    reversed_rows = value.ndim > 0 and value.strides[0] < 0
+    if reversed_rows:
+        value = value[::-1]
+    value = np.ascontiguousarray(value)
+    filename = os.path.join(ARRAYS_DIR, f'{name}.npy')
+    np.save(os.path.join(directory, filename), value, allow_pickle=False)
+    entry = {'file': filename, 'dtype': value.dtype.str, 'shape': list(value.shape)}
+    if reversed_rows:
+        entry['reversed'] = True
+    return entry
+
+
+def _write_json(directory, filename, value):
+    with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False, default=str)
+
+
+def _replace_directory(staging, directory):
+    """Swap the staged snapshot in (the old one is renamed away first, then removed)"""
+    if not os.path.exists(directory):
+        os.rename(staging, directory)
+        return
+    retired = f'{staging}.old'
+    os.rename(directory, retired)
+    os.rename(staging, directory)
+    # Processes that mapped the old arrays keep their pages after the unlink
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+# ==========================
+# LOAD
+# ==========================
+
+def load_model_snapshot(directory, expected_fingerprint=None, mmap=True, records=None):
+    """
+    Recommender restored from a snapshot
+
+    Args:
+        directory: Snapshot directory
+        expected_fingerprint: Data fingerprint the caller is about to serve (None = accept any)
+        mmap: Map arrays read-only instead of reading them into memory
+        records: (games, users) the model was built from, when the caller already holds them -
+                 used instead of the snapshot's JSON copies (sorted by id like preprocess_data)
+
+    Returns:
+        (GameRecommendationSystem, manifest)
+
+    Raises:
+        FileNotFoundError: no snapshot in the directory
+        SnapshotError: other format / config / data, or arrays that do not match the manifest
+    """
+    manifest = _read_checked_manifest(directory, None, expected_fingerprint)
+    if manifest.get('config') != model_config():
+        raise SnapshotError(f"snapshot built with config {manifest.get('config')} (running {model_config()})")
+
+    arrays = {name: _read_array(directory, name, entry, mmap) for name, entry in manifest['arrays'].items()}
+    meta = manifest['meta']
+
+    if records is not None:
+        games = sorted(records[0], key=lambda x: int(x['id']))
+        users = sorted(records[1], key=lambda x: int(x['id']))
+        counts = manifest['counts']
+        if (len(games), len(users)) != (counts['games'], counts['users']):
+            raise SnapshotError(
+                f"{len(games)} games / {len(users)} users given, snapshot has {counts['games']} / {counts['users']}"
+            )
+    else:
+        games = _read_json(directory, GAMES_FILE)
+        users = _read_json(directory, USERS_FILE)
+    reference = _read_json(directory, REFERENCE_FILE)
+
+    recommender = GameRecommendationSystem()
+    recommender.games_data = games
+    recommender.users_data = users
+    recommender.cpu_data = reference['cpu_data']
+    recommender.gpu_data = reference['gpu_data']
+    recommender.keyword_library = reference['keyword_library']
+    recommender.keyword_matcher = KeywordMatcher(recommender.keyword_library)
+    recommender.build_lookup_tables()
+    # games_df / users_df stay None (only preprocess_data builds them, nothing reads them)
+
+    recommender.feature_store = GameFeatureStore.from_arrays(_component(arrays, 'features'), meta['features'])
+    recommender.boost_engine = PreferenceBoostEngine(recommender.feature_store)
+    recommender.keyword_index = KeywordIndex.from_arrays(_component(arrays, 'keywords'), meta['keywords'])
+    recommender.similarity_index = SimilarityIndex.from_arrays(_component(arrays, 'similarity'), meta['similarity'])
+    recommender.content_similarity_matrix = recommender.similarity_index.exact_matrix
+
+    recommender.user_item_matrix = arrays['model.user_item_matrix']
+    recommender.user_ids = arrays['model.user_ids'].tolist()
+    recommender.game_ids = arrays['model.game_ids'].tolist()
+    recommender.user_id_to_index = {user_id: row for row, user_id in enumerate(recommender.user_ids)}
+    recommender.game_id_to_index = {game_id: col for col, game_id in enumerate(recommender.game_ids)}
+
+    recommender.svd_model = {name: arrays[f'svd.{name}'] for name in SVD_ARRAYS}
+    recommender.svd_model.update(meta['svd'])
+
+    rows_by_user = {}
+    for row, user_id in enumerate(arrays['demographic.row_user_ids'].tolist()):
+        rows_by_user.setdefault(user_id, []).append(row)
+    recommender.demographic_model = {
+        'bucket_users': [users[row] for row in arrays['demographic.bucket_user_rows'].tolist()],
+        'bucket_sizes': arrays['demographic.bucket_sizes'],
+        'bucket_ratings': arrays['demographic.bucket_ratings'],
+        'user_ratings': arrays['demographic.user_ratings'],
+        'row_bucket': arrays['demographic.row_bucket'],
+        'rows_by_user': rows_by_user,
+        'n_games': meta['demographic']['n_games'],
+    }
+    return recommender, manifest
+
+
+def load_similarity_snapshot(directory, expected_fingerprint=None, mmap=True, games=None):
+    """
+    ContentSimilarityEngine restored from a save_similarity_snapshot directory
+
+    Args:
+        directory: Snapshot directory
+        expected_fingerprint: Catalog key the caller is about to serve (None = accept any)
+        mmap: Map the neighbour table read-only instead of reading it into memory
+        games: Catalog records the caller already holds - used instead of the snapshot's JSON copy
+               when their ids are the snapshot's, in the same order
+
+    Returns:
+        (ContentSimilarityEngine, manifest)
+
+    Raises:
+        FileNotFoundError: no snapshot in the directory
+        SnapshotError: other format / catalog, or arrays that do not match the manifest
+    """
+    manifest = _read_checked_manifest(directory, SIMILARITY_KIND, expected_fingerprint)
+    arrays = {name: _read_array(directory, name, entry, mmap) for name, entry in manifest['arrays'].items()}
+    if games is None or [game['id'] for game in games] != manifest['game_ids']:
+        games = _read_json(directory, GAMES_FILE)
+    return ContentSimilarityEngine.from_arrays(games, arrays, manifest['meta']), manifest
+
+
+def _read_checked_manifest(directory, kind, expected_fingerprint):
+    """Manifest of a snapshot of this kind and format, built from the expected data"""
+    manifest = read_manifest(directory)
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"snapshot format {manifest.get('format')} (expected {SNAPSHOT_FORMAT})")
+    if manifest.get('kind') != kind:
+        raise SnapshotError(f"snapshot of kind {manifest.get('kind')} (expected {kind})")
+    if expected_fingerprint is not None and manifest.get('fingerprint') != expected_fingerprint:
+        raise SnapshotError(
+            f"snapshot fingerprint {str(manifest.get('fingerprint'))[:12]} does not match the data "
+            f"({expected_fingerprint[:12]})"
+        )
+    return manifest
+
+
+def _read_array(directory, name, entry, mmap):
+    """ndarray / CSR matrix of a manifest entry (checked against the recorded dtype and shape)"""
+    if entry.get('format') == 'csr':
+        parts = {part: _read_array(directory, f'{name}.{part}', part_entry, mmap)
+                 for part, part_entry in entry['parts'].items()}
+        return csr_matrix((parts['data'], parts['indices'], parts['indptr']), shape=tuple(entry['shape']), copy=False)
+
+    try:
+        value = np.load(os.path.join(directory, entry['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"cannot read array {name}: {e}") from e
+    if value.dtype.str != entry['dtype'] or list(value.shape) != entry['shape']:
+        raise SnapshotError(
+            f"array {name} is {value.dtype.str}{list(value.shape)}, manifest says {entry['dtype']}{entry['shape']}"
+        )
+    return value[::-1] if entry.get('reversed') else value
+
+
+def _read_json(directory, filename):
+    try:
+        with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"cannot read {filename}: {e}") from e
+
+
+def _component(arrays, prefix):
+    """Arrays of one component with the "prefix." stripped"""
+    start = len(prefix) + 1
+    return {name[start:]: value for name, value in arrays.items() if name.startswith(prefix + '.')}
@@ -0,0 +1,188 @@
+"""
+Preference Boost
+Vectorized adaptive preference boosting over the whole catalog
+- Takes a user's preference profile (analyze_user_preferences) and GameFeatureStore columns
+- Produces every game's boost factor (and optionally the per-factor breakdown) in a few NumPy passes
+- Same tiered 0.6 - 1.2 factors as GameRecommendationSystem._calculate_boost_factor_breakdown,
+  multiplied in the same order → bit-identical totals
+"""
+
+import numpy as np
+
+
+# Breakdown columns (multiplied in this order for the total)
+BOOST_FACTORS = ('publisher', 'genre', 'price', 'age_rating', 'mode', 'platform')
+
+# (threshold, factor) from the highest threshold down: score >= threshold → factor
+PUBLISHER_TIERS = ((0.5, 1.2), (0.3, 1.1), (0.15, 1.0), (0.05, 0.9))
+PUBLISHER_WEAKEST = 0.8
+GENRE_TIERS = ((0.5, 1.2), (0.35, 1.15), (0.2, 1.1), (0.1, 1.0))
+GENRE_WEAKEST = 0.9
+AGE_RATING_TIERS = ((0.5, 1.2), (0.3, 1.15), (0.15, 1.1), (0.05, 1.0))
+AGE_RATING_WEAKEST = 0.9
+MODE_TIERS = ((0.6, 1.2), (0.4, 1.15), (0.2, 1.1), (0.1, 1.0))
+MODE_WEAKEST = 0.9
+PLATFORM_TIERS = ((0.7, 1.2), (0.5, 1.15), (0.3, 1.1), (0.15, 1.0))
+PLATFORM_WEAKEST = 0.9
+
+# Price: deviation from the preferred average, deviation <= threshold → factor
+PRICE_TIERS = ((0.15, 1.2), (0.30, 1.1), (0.50, 1.0), (0.75, 0.9), (1.0, 0.8), (1.5, 0.7))
+PRICE_FARTHEST = 0.6
+
+# Factor when the game's value is not in the user's preferences
+NO_MATCH = 0.7
+
+# Genre: no preferred genre at all (or game without genres), and penalties by number of unmatched genres
+GENRE_UNKNOWN = 0.75
+GENRE_NO_MATCH = {1: 0.75, 2: 0.7}
+GENRE_NO_MATCH_MANY = 0.6
+
+
+def _tiered(scores, tiers, weakest):
+    """Map scores to factors: first tier whose threshold is reached, else `weakest`"""
+    factors = np.full(len(scores), weakest)
+    for threshold, factor in reversed(tiers):
+        factors[scores >= threshold] = factor
+    return factors
+
+
+class PreferenceBoostEngine:
+    """Boost factors for catalog rows from a preference profile"""
+
+    def __init__(self, features):
+        """
+        Args:
+            features: GameFeatureStore of the catalog
+        """
+        self.features = features
+
+    def boost_factors(self, preferences, rows=None, breakdown=False):
+        """
+        Args:
+            preferences: Profile from analyze_user_preferences (publishers / genres / age_ratings / modes / platforms ...)
+            rows: Feature store rows to score (default: every row)
+            breakdown: Also return the per-factor matrix (len(rows) × len(BOOST_FACTORS))
+
+        Returns:
+            Total boost per row, or (total, breakdown matrix) when breakdown=True
+        """
+        if rows is None:
+            rows = np.arange(self.features.n_games)
+        rows = np.asarray(rows, dtype=np.int64)
+
+        matrix = np.ones((len(rows), len(BOOST_FACTORS)))
+        if preferences:
+            matrix[:, 0] = self._single_valued(rows, 'publisher', preferences.get('publishers', {}), PUBLISHER_TIERS, PUBLISHER_WEAKEST)
+            matrix[:, 1] = self._genre(rows, preferences.get('genres', {}))
+            matrix[:, 2] = self._price(rows, preferences.get('price', {}))
+            matrix[:, 3] = self._single_valued(rows, 'age_rating', preferences.get('age_ratings', {}), AGE_RATING_TIERS, AGE_RATING_WEAKEST)
+            matrix[:, 4] = self._single_valued(rows, 'mode', preferences.get('modes', {}), MODE_TIERS, MODE_WEAKEST)
+            matrix[:, 5] = self._platform(rows, preferences.get('platforms', {}))
+
+        # Same multiplication order as the per-game breakdown
+        total = matrix[:, 0] * matrix[:, 1] * matrix[:, 2] * matrix[:, 3] * matrix[:, 4] * matrix[:, 5]
+        if breakdown:
+            return total, matrix
+        return total
+
+    def _preference_scores(self, field, preferences):
+        """(score per vocabulary code, present mask) for a {label: score} preference dict"""
+        index = self.features.vocab_index[field]
+        scores = np.zeros(len(index))
+        present = np.zeros(len(index), dtype=bool)
+        for label, score in preferences.items():
+            code = index.get(label)
+            if code is not None:
+                scores[code] = score
+                present[code] = True
+        return scores, present
+
+    def _single_valued(self, rows, field, preferences, tiers, weakest):
+        """Publisher / age rating / mode factor"""
+        factors = np.ones(len(rows))
+        if not preferences:
+            return factors
+
+        codes = self.features.codes[field][rows]
+        has_value = codes >= 0
+        scores, present = self._preference_scores(field, preferences)
+
+        matched = np.zeros(len(rows), dtype=bool)
+        matched[has_value] = present[codes[has_value]]
+        factors[has_value & ~matched] = NO_MATCH
+        factors[matched] = _tiered(scores[codes[matched]], tiers, weakest)
+        return factors
+
+    def _match_average(self, rows, field, preferences):
+        """
+        Per row: number of values, number of matched values and average preference score of the matches
+        Summed value by value in the game's original order (same float result as the per-game loop)
+        """
+        indptr, codes = self.features.multi_codes[field]
+        starts = indptr[rows]
+        lengths = indptr[rows + 1] - starts
+        scores, present = self._preference_scores(field, preferences)
+
+        total = np.zeros(len(rows))
+        matched = np.zeros(len(rows), dtype=np.int64)
+        for position in range(int(lengths.max()) if len(rows) else 0):
+            active = np.flatnonzero(lengths > position)
+            value_codes = codes[starts[active] + position]
+            hit = present[value_codes]
+            total[active[hit]] += scores[value_codes[hit]]
+            matched[active[hit]] += 1
+
+        average = np.zeros(len(rows))
+        np.divide(total, matched, out=average, where=matched > 0)
+        return lengths, matched, average
+
+    def _genre(self, rows, preferences):
+        """Genre factor (average preference of the matched genres, penalty by unmatched count)"""
+        factors = np.full(len(rows), GENRE_UNKNOWN)
+        if not preferences:
+            return factors
+
+        lengths, matched, average = self._match_average(rows, 'genre', preferences)
+        has_match = matched > 0
+        factors[has_match] = _tiered(average[has_match], GENRE_TIERS, GENRE_WEAKEST)
+
+        unmatched = (lengths > 0) & ~has_match
+        factors[unmatched] = GENRE_NO_MATCH_MANY
+        for count, factor in GENRE_NO_MATCH.items():
+            factors[unmatched & (lengths == count)] = factor
+        return factors
+
+    def _platform(self, rows, preferences):
+        """Platform factor (average preference of the matched platforms)"""
+        factors = np.ones(len(rows))
+        if not preferences:
+            return factors
+
+        lengths, matched, average = self._match_average(rows, 'platform', preferences)
+        has_match = matched > 0
+        factors[has_match] = _tiered(average[has_match], PLATFORM_TIERS, PLATFORM_WEAKEST)
+        factors[(lengths > 0) & ~has_match] = NO_MATCH
+        return factors
+
+    def _price(self, rows, price_preferences):
+        """Price factor (deviation from the preferred average price)"""
+        factors = np.ones(len(rows))
+        if not price_preferences:
+            return factors
+
+        avg_price = price_preferences.get('avg', 0)
+        std_price = price_preferences.get('std', 1)
+        prices = self.features.price[rows]
+
+        if avg_price > 0 and std_price > 0:
+            deviation = np.abs(prices - avg_price) / avg_price
+            factors[:] = PRICE_FARTHEST
+            for threshold, factor in reversed(PRICE_TIERS):
+                factors[deviation <= threshold] = factor
+        elif avg_price == 0:
+            # Both free → 1.2, paid game for a free-games player → 0.7
+            factors[:] = np.where(prices == 0, 1.2, 0.7)
+        else:
+            # Free game for a player who usually pays
+            factors[prices == 0] = 0.9
+        return factors
@@ -0,0 +1,540 @@
+"""
+Pre-fork Server
+Multi-process serving of the unified AI service: one supervisor + N worker processes
+- Workers are separate interpreters accepting on one shared listening socket → scoring runs on
+  every core instead of queueing behind a single GIL
+- The supervisor owns the DataStore and builds each model and each similar-games table once;
+  every build is exported as a snapshot (model_snapshot.py) that workers map read-only → SVD
+  factors, similarity index, feature columns, keyword postings, the user-item matrix and the
+  similar-games neighbour tables exist once in the page cache (/dev/shm when available)
+  whatever the number of workers
+- Workers forward /api/data/* writes and model / table misses to the supervisor over a local
+  control socket (multiprocessing.connection), and keep serving the mapped model while the data
+  is unchanged
+- Store records (games / users dicts) are mirrored once per worker per data version: request
+  checks need them as Python objects, which cannot live in a mapped file - the mapped model and
+  table reuse that mirror instead of loading their own JSON copies
+- Dead workers are restarted; SIGTERM / SIGINT stop the workers, then the supervisor
+Kept per worker: the store records mirror, ranked-list sessions and /metrics series
+
+Usage:
+    python prefork_server.py --workers 4 --port 5000
+"""
+
+import argparse
+import os
+import queue
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.connection import Client, Listener
+
+import unified_ai_service as service
+from data_store import DataSnapshot, DataVersionError
+from logging_config import get_logger
+from model_snapshot import (
+    load_model_snapshot, save_model_snapshot, load_similarity_snapshot, save_similarity_snapshot, data_fingerprint
+)
+from unified_ai_service import ModelRegistry, SimilarityEngineRegistry, store_catalog_key
+
+logger = get_logger('prefork')
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Exported model snapshots kept in the shared directory (older ones are removed once replaced)
+SHARED_MODELS_KEPT = 3
+
+# Exported similar-games tables kept in the shared directory
+SHARED_TABLES_KEPT = service.SIMILARITY_CATALOGS_KEPT
+
+# A replaced snapshot handed to a worker is only removed once the worker reports it mapped,
+# or after this long (worker died between the reply and the load)
+EXPORT_LEASE_SECONDS = 60.0
+
+# Shared-memory filesystem for the exported models (falls back to the temp directory)
+SHARED_MEMORY_DIR = '/dev/shm'
+
+# Control connections kept open per worker (one per concurrent call)
+CONTROL_POOL_SIZE = 8
+
+# Restarts closer than this are delayed (worker crashing at startup)
+RESTART_BACKOFF_SECONDS = 1.0
+
+# Workers poll for their supervisor and exit when it is gone
+PARENT_CHECK_SECONDS = 1.0
+
+AUTHKEY_ENV = 'AI_PREFORK_AUTHKEY'
+
+# DataStore methods workers may call on the supervisor's store
+WRITE_METHODS = ('upsert_games', 'delete_games', 'upsert_users', 'delete_users', 'patch_interactions')
+
+
+# ==========================
+# SUPERVISOR
+# ==========================
+
+class ModelSupervisor:
+    """
+    Control side of the supervisor: the authoritative data store and model registry of the
+    service module, with every model exported to `models_dir` for the workers to map
+    """
+
+    def __init__(self, service, models_dir, kept=SHARED_MODELS_KEPT, tables_kept=SHARED_TABLES_KEPT):
+        self.service = service
+        self.models_dir = models_dir
+        self.kept = kept
+        self.tables_kept = tables_kept
+        self._exported = OrderedDict()   # {fingerprint: snapshot path}
+        self._exported_tables = OrderedDict()   # {catalog key: snapshot path}
+        self._leases = {}   # {snapshot path: [workers not done loading it, lease deadline]}
+        self._retired = set()   # replaced snapshot paths waiting for their leases to end
+        self._export_lock = threading.Lock()
+
+    def serve(self, listener):
+        """Accept worker connections (one thread per connection)"""
+        while True:
+            try:
+                connection = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    def _serve_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+                connection.send(self.handle(request))
+
+    def handle(self, request):
+        """One control request → ('ok', value) or an error reply"""
+        command, *args = request
+        try:
+            if command == 'info':
+                return 'ok', self.service.data_store.info()
+            if command == 'records':
+                return 'ok', self.records(*args)
+            if command == 'write':
+                method, call_args = args
+                if method not in WRITE_METHODS:
+                    raise ValueError(f"unknown data store method: {method}")
+                return 'ok', getattr(self.service.data_store, method)(*call_args)
+            if command == 'model':
+                return 'ok', self.model(*args)
+            if command == 'similarity':
+                return 'ok', self.similarity(*args)
+            if command == 'mapped':
+                return 'ok', self.release(*args)
+            raise ValueError(f"unknown control command: {command}")
+        except DataVersionError as e:
+            return 'version_error', e.expected, e.current
+        except ValueError as e:
+            return 'value_error', str(e)
+        except Exception as e:
+            logger.exception("Control request %s failed: %s", command, e)
+            return 'error', f"{type(e).__name__}: {e}"
+
+    def records(self, epoch, version):
+        """Store snapshot fields for a worker mirror (None when it already holds this version)"""
+        snapshot = self.service.data_store.snapshot()
+        if snapshot.epoch == epoch and snapshot.version == version:
+            return None
+        return (snapshot.epoch, snapshot.version, snapshot.games_version, snapshot.users_version,
+                snapshot.games, snapshot.users)
+
+    def model(self, fingerprint, games, users):
+        """
+        (fingerprint, snapshot path) of the model for a fingerprint, built at most once
+        Store fingerprints are served from the current store snapshot (the newest data)
+        """
+        if fingerprint.startswith('store:'):
+            snapshot = self.service.data_store.snapshot()
+            games, users, fingerprint = snapshot.games, snapshot.users, snapshot.fingerprint
+            if not games:
+                raise ValueError("no games synced")
+        fingerprint, model = self.service.model_registry.get_entry(games, users, fingerprint)
+        return fingerprint, self.export(fingerprint, model)
+
+    def similarity(self, key, games):
+        """
+        (catalog key, snapshot path) of the similar-games table of a catalog, built at most once
+        Store catalogs are served from the current store snapshot (the newest catalog)
+        """
+        key = tuple(key)
+        if key[0] == 'store':
+            snapshot = self.service.data_store.snapshot()
+            games, key = snapshot.games, store_catalog_key(snapshot)
+            if not games:
+                raise ValueError("no games synced")
+        engine = self.service.similarity_engines.get(key, games)
+        return key, self.export_similarity(key, engine)
+
+    def export(self, fingerprint, model):
+        """Snapshot path of a model (written on first request)"""
+        path = os.path.join(self.models_dir, fingerprint.replace(':', '-'))
+        return self._export(self._exported, self.kept, fingerprint, path,
+                            lambda: save_model_snapshot(model, path, fingerprint))
+
+    def export_similarity(self, key, engine):
+        """Snapshot path of a catalog's similar-games table (written on first request)"""
+        fingerprint = ':'.join(str(part) for part in key)
+        path = os.path.join(self.models_dir, 'similar-' + fingerprint.replace(':', '-'))
+        return self._export(self._exported_tables, self.tables_kept, key, path,
+                            lambda: save_similarity_snapshot(engine, path, fingerprint))
+
+    def release(self, path):
+        """A worker is done loading a snapshot path it was handed (removed now if already replaced)"""
+        with self._export_lock:
+            lease = self._leases.get(path)
+            if lease is not None:
+                lease[0] -= 1
+                if lease[0] <= 0:
+                    del self._leases[path]
+            self._remove_retired()
+
+    def _export(self, exported, kept, key, path, write):
+        """Snapshot path for a worker to load, leased until it reports the load done"""
+        with self._export_lock:
+            if key in exported:
+                exported.move_to_end(key)
+            else:
+                # Exported again after being replaced → no longer up for removal
+                self._retired.discard(path)
+                write()
+                exported[key] = path
+                logger.info("%s exported to %s", key if isinstance(key, tuple) else key[:24], path)
+                # Workers still mapping a removed snapshot keep its pages until they switch
+                while len(exported) > kept:
+                    _, old_path = exported.popitem(last=False)
+                    self._retired.add(old_path)
+                self._remove_retired()
+
+            path = exported[key]
+            lease = self._leases.setdefault(path, [0, 0.0])
+            lease[0] += 1
+            lease[1] = time.monotonic() + EXPORT_LEASE_SECONDS
+            return path
+
+    def _remove_retired(self):
+        """Delete replaced snapshots no worker is still about to load"""
+        now = time.monotonic()
+        for path in list(self._retired):
+            lease = self._leases.get(path)
+            if lease is not None and lease[1] > now:
+                continue
+            self._leases.pop(path, None)
+            self._retired.discard(path)
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class WorkerPool:
+    """Worker processes sharing the listening socket (restarted when they exit)"""
+
+    def __init__(self, count, command, env, pass_fds):
+        self.count = count
+        self.command = command
+        self.env = env
+        self.pass_fds = pass_fds
+        self.processes = []
+        self._started = []
+        self.restarts = 0
+
+    def start(self):
+        for _ in range(self.count):
+            self._spawn()
+
+    def _spawn(self, slot=None):
+        process = subprocess.Popen(self.command, env=self.env, pass_fds=self.pass_fds)
+        if slot is None:
+            self.processes.append(process)
+            self._started.append(time.monotonic())
+        else:
+            self.processes[slot] = process
+            self._started[slot] = time.monotonic()
+        logger.info("Worker %d started (pid %d)", len(self.processes) if slot is None else slot + 1, process.pid)
+
+    def check(self):
+        """Restart workers that exited"""
+        for slot, process in enumerate(self.processes):
+            code = process.poll()
+            if code is None:
+                continue
+            logger.warning("Worker %d (pid %d) exited with %s - restarting", slot + 1, process.pid, code)
+            if time.monotonic() - self._started[slot] < RESTART_BACKOFF_SECONDS:
+                time.sleep(RESTART_BACKOFF_SECONDS)
+            self.restarts += 1
+            self._spawn(slot)
+
+    def stop(self, timeout=10.0):
+        for process in self.processes:
+            if process.poll() is None:
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            try:
+                process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def run_supervisor(args):
+    models_dir = args.models_dir or tempfile.mkdtemp(
+        prefix='ai-models-', dir=SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None
+    )
+    os.makedirs(models_dir, exist_ok=True)
+    control_dir = tempfile.mkdtemp(prefix='ai-prefork-')
+    control_address = os.path.join(control_dir, 'control.sock')
+    authkey = os.urandom(16)
+
+    listen_socket = socket.create_server((args.host, args.port), backlog=args.backlog)
+    listen_socket.set_inheritable(True)
+
+    listener = Listener(control_address, 'AF_UNIX', authkey=authkey)
+    supervisor = ModelSupervisor(service, models_dir)
+    threading.Thread(target=supervisor.serve, args=(listener,), daemon=True).start()
+
+    # Workers never build nor persist models themselves (the supervisor does both)
+    env = dict(os.environ)
+    env.pop('AI_MODEL_SNAPSHOT_DIR', None)
+    env[AUTHKEY_ENV] = authkey.hex()
+    command = [
+        sys.executable, os.path.abspath(__file__), '--worker',
+        '--fd', str(listen_socket.fileno()), '--control', control_address,
+        '--host', args.host, '--port', str(args.port),
+    ]
+    pool = WorkerPool(args.workers, command, env, (listen_socket.fileno(),))
+
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("Pre-fork server on http://%s:%d - %d workers, models in %s",
+                args.host, args.port, args.workers, models_dir)
+    pool.start()
+    try:
+        while not stopping.wait(0.5):
+            pool.check()
+    finally:
+        logger.info("Stopping %d workers...", len(pool.processes))
+        pool.stop()
+        listener.close()
+        listen_socket.close()
+        shutil.rmtree(control_dir, ignore_errors=True)
+        if not args.models_dir:
+            shutil.rmtree(models_dir, ignore_errors=True)
+
+
+# ==========================
+# WORKER
+# ==========================
+
+class ControlClient:
+    """Pooled connections to the supervisor's control socket (thread-safe calls)"""
+
+    def __init__(self, address, authkey, pool_size=CONTROL_POOL_SIZE):
+        self.address = address
+        self.authkey = authkey
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+
+    def call(self, *request):
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = Client(self.address, 'AF_UNIX', authkey=self.authkey)
+        try:
+            connection.send(request)
+            reply = connection.recv()
+        except BaseException:
+            connection.close()
+            raise
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+        status, *values = reply
+        if status == 'ok':
+            return values[0]
+        if status == 'version_error':
+            raise DataVersionError(*values)
+        if status == 'value_error':
+            raise ValueError(values[0])
+        raise RuntimeError(f"supervisor: {values[0]}")
+
+
+class RemoteDataStore:
+    """
+    DataStore interface of a worker: writes and version checks go to the supervisor's store,
+    snapshot() mirrors its records (fetched again only after a version change)
+    """
+
+    def __init__(self, control):
+        self._control = control
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def info(self):
+        return self._control.call('info')
+
+    def snapshot(self):
+        with self._lock:
+            current = self._snapshot
+            known = (current.epoch, current.version) if current else (None, None)
+            fields = self._control.call('records', *known)
+            if fields is not None:
+                self._snapshot = DataSnapshot(*fields)
+            return self._snapshot
+
+    def _write(self, method, *args):
+        return self._control.call('write', method, args)
+
+    def upsert_games(self, games, replace=False, base_version=None):
+        return self._write('upsert_games', games, replace, base_version)
+
+    def delete_games(self, game_ids, base_version=None):
+        return self._write('delete_games', game_ids, base_version)
+
+    def upsert_users(self, users, replace=False, base_version=None):
+        return self._write('upsert_users', users, replace, base_version)
+
+    def delete_users(self, user_ids, base_version=None):
+        return self._write('delete_users', user_ids, base_version)
+
+    def patch_interactions(self, patches, base_version=None):
+        return self._write('patch_interactions', patches, base_version)
+
+
+class RemoteModelRegistry(ModelRegistry):
+    """
+    ModelRegistry of a worker: a miss asks the supervisor for the model (built once for all
+    workers) and maps its snapshot - `builds` counts snapshot loads
+    """
+
+    def __init__(self, control):
+        super().__init__(builder=None)
+        self._control = control
+
+    def get_entry(self, games, users, fingerprint=None):
+        if fingerprint is None:
+            fingerprint = data_fingerprint(games, users)
+
+        current = self._current
+        if current[0] == fingerprint:
+            self.hits += 1
+            return current
+
+        with self._build_lock:
+            current = self._current
+            if current[0] == fingerprint:
+                self.hits += 1
+                return current
+
+            # Store models are built from the supervisor's own records (no payload to send)
+            payload = (None, None) if fingerprint.startswith('store:') else (games, users)
+            built, path = self._control.call('model', fingerprint, *payload)
+            try:
+                # Same data as this request → reuse its records instead of a second copy from the snapshot
+                model, _ = load_model_snapshot(path, built, records=(games, users) if built == fingerprint else None)
+            finally:
+                self._control.call('mapped', path)
+            self._current = (built, model)
+            self.builds += 1
+            logger.debug("Model %s mapped from %s", built[:24], path)
+            return self._current
+
+
+class RemoteSimilarityEngineRegistry(SimilarityEngineRegistry):
+    """
+    SimilarityEngineRegistry of a worker: a miss asks the supervisor for the catalog's table
+    (built once for all workers) and maps its snapshot - `builds` counts snapshot loads
+    """
+
+    def __init__(self, control, max_catalogs=service.SIMILARITY_CATALOGS_KEPT):
+        super().__init__(max_catalogs)
+        self._control = control
+
+    def get(self, key, games):
+        engine = self._engines.get(key)
+        if engine is not None:
+            self.hits += 1
+            return engine
+
+        with self._build_lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self.hits += 1
+                return engine
+
+            payload = None if key[0] == 'store' else games
+            built, path = self._control.call('similarity', key, payload)
+            built = tuple(built)
+            try:
+                # Same catalog as this request → reuse its records instead of the snapshot's copy
+                engine, _ = load_similarity_snapshot(path, games=games if built == key else None)
+            finally:
+                self._control.call('mapped', path)
+            self._engines[built] = engine
+            while len(self._engines) > self.max_catalogs:
+                self._engines.popitem(last=False)
+            self.builds += 1
+            logger.debug("Similar-games table %s mapped from %s", built, path)
+            return engine
+
+
+def run_worker(args):
+    from werkzeug.serving import make_server
+
+    control = ControlClient(args.control, bytes.fromhex(os.environ[AUTHKEY_ENV]))
+    service.data_store = RemoteDataStore(control)
+    service.model_registry = RemoteModelRegistry(control)
+    service.similarity_engines = RemoteSimilarityEngineRegistry(control)
+
+    server = make_server(args.host, args.port, service.app, threaded=True, fd=args.fd)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    threading.Thread(target=_exit_with_parent, args=(server,), daemon=True).start()
+    server.serve_forever()
+
+
+def _exit_with_parent(server):
+    """Stop serving once the supervisor is gone (killed without a chance to stop the workers)"""
+    parent = os.getppid()
+    while os.getppid() == parent:
+        time.sleep(PARENT_CHECK_SECONDS)
+    logger.warning("Supervisor %d exited - worker %d stopping", parent, os.getpid())
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Unified AI Service - pre-fork multi-process server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Worker processes (default: CPU count)')
+    parser.add_argument('--backlog', type=int, default=128)
+    parser.add_argument('--models-dir', default=None,
+                        help='Directory of the exported model snapshots (default: temporary directory in /dev/shm)')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--fd', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--control', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+    else:
+        run_supervisor(args)
+
+
+if __name__ == '__main__':
+    main()
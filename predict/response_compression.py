@@ -0,0 +1,64 @@
+"""
+Response Compression
+Accept-Encoding negotiation for the unified service's JSON responses
+- brotli (optional package) preferred over gzip (stdlib) when the client accepts both
+- Small bodies are sent as-is: the encoding overhead outweighs the bytes saved
+"""
+
+import gzip
+
+# Optional: brotli compresses JSON better than gzip at similar speed
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Bodies smaller than this are not compressed
+COMPRESSION_MIN_BYTES = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Server preference among the encodings the client accepts
+SUPPORTED_ENCODINGS = ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """{encoding: q} from an Accept-Encoding header (q defaults to 1.0)"""
+    accepted = {}
+    for part in (header or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def negotiate_encoding(header):
+    """Best supported encoding for an Accept-Encoding header, or None (identity)"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = [
+        (accepted.get(encoding, wildcard), -rank, encoding)
+        for rank, encoding in enumerate(SUPPORTED_ENCODINGS)
+    ]
+    q, _, encoding = max(candidates)
+    return encoding if q > 0 else None
+
+
+def compress(body, encoding):
+    """Encoded bytes of a response body"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"unsupported encoding: {encoding}")
@@ -0,0 +1,194 @@
+"""
+Retrain Scheduler
+Background model rebuilds driven by change signals instead of retraining inside requests
+- Callers record changes: record_interactions(n) (user activity), record_data_change(version)
+  (catalog / user data moved to a new version)
+- A rebuild is due once min_interactions interactions or any data change are pending, after
+  debounce_seconds without new changes (a burst of syncs → one build), and at the latest
+  max_staleness_seconds after the first unapplied change (a trickle of changes still lands)
+- build() runs on the scheduler thread; it trains the new model off to the side and swaps it in
+  with a single reference assignment → requests keep using the old model until then
+- Changes recorded during a build are kept for the next one; a failed build keeps its changes
+  and is retried after min_interval_seconds
+- stats(): builds, failures, last build duration, pending changes and staleness
+"""
+
+import threading
+import time
+
+from logging_config import get_logger
+from metrics import stage_timer
+
+logger = get_logger('retrain')
+
+
+class RetrainScheduler:
+    """Single background thread rebuilding a model when enough changes are pending"""
+
+    def __init__(self, build, name='model', min_interactions=50, debounce_seconds=2.0,
+                 max_staleness_seconds=600.0, min_interval_seconds=5.0):
+        """
+        Args:
+            build: build(changes) → trains and installs the new model
+                   (changes: {'interactions': n, 'data_version': latest version or None})
+            name: label of the model in logs and stats
+            min_interactions: pending interactions that make a rebuild due
+            debounce_seconds: quiet time after the last change before a due rebuild starts
+            max_staleness_seconds: oldest unapplied change that forces a rebuild
+            min_interval_seconds: time between the end of a build and the start of the next
+        """
+        self._build = build
+        self.name = name
+        self.min_interactions = min_interactions
+        self.debounce_seconds = debounce_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self.min_interval_seconds = min_interval_seconds
+
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+        # Pending changes (not in the served model yet)
+        self._interactions = 0
+        self._data_version = None
+        self._first_change = None   # monotonic time of the oldest unapplied change
+        self._last_change = None
+
+        self.building = False
+        self.builds = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_build_seconds = None
+        self.last_build_at = None      # wall-clock end of the last successful build
+        self._last_build_end = None    # monotonic end of the last build attempt
+        self._building_from = None     # oldest change of the build in progress
+
+    # --------------------------------------------------------------- signals
+
+    def record_interactions(self, count=1):
+        """New user interactions (not yet in the model)"""
+        self._record(interactions=count)
+
+    def record_data_change(self, version=None):
+        """The data the model is built from moved to a new version"""
+        self._record(data_version=version if version is not None else True)
+
+    def _record(self, interactions=0, data_version=None):
+        now = time.monotonic()
+        with self._condition:
+            self._interactions += interactions
+            if data_version is not None:
+                self._data_version = data_version
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._start()
+            self._condition.notify()
+
+    # ----------------------------------------------------------------- state
+
+    @property
+    def pending(self):
+        """Changes are waiting for (or being applied by) a rebuild"""
+        return self._first_change is not None or self.building
+
+    def staleness(self):
+        """Seconds since the oldest change the served model does not include (0 when up to date)"""
+        oldest = [t for t in (self._building_from, self._first_change) if t is not None]
+        if not oldest:
+            return 0.0
+        return time.monotonic() - min(oldest)
+
+    def stats(self):
+        with self._condition:
+            pending = {'interactions': self._interactions, 'data_version': self._data_version}
+        return {
+            'model': self.name,
+            'building': self.building,
+            'builds': self.builds,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_build_seconds': round(self.last_build_seconds, 3) if self.last_build_seconds is not None else None,
+            'last_build_at': self.last_build_at,
+            'pending': pending,
+            'staleness_seconds': round(self.staleness(), 3),
+        }
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    # ---------------------------------------------------------------- thread
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'retrain-{self.name}', daemon=True)
+            self._thread.start()
+
+    def _due_in(self, now):
+        """Seconds until the pending changes should be built (None: nothing due)"""
+        if self._first_change is None:
+            return None
+        forced_at = self._first_change + self.max_staleness_seconds
+        if self._data_version is not None or self._interactions >= self.min_interactions:
+            due_at = min(self._last_change + self.debounce_seconds, forced_at)
+        else:
+            due_at = forced_at
+        if self._last_build_end is not None:
+            due_at = max(due_at, self._last_build_end + self.min_interval_seconds)
+        return due_at - now
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    due_in = self._due_in(time.monotonic())
+                    if due_in is not None and due_in <= 0:
+                        break
+                    self._condition.wait(due_in)
+                if self._stopped:
+                    return
+                changes = {'interactions': self._interactions, 'data_version': self._data_version}
+                first_change, last_change = self._first_change, self._last_change
+                self._interactions = 0
+                self._data_version = None
+                self._first_change = self._last_change = None
+                self._building_from = first_change
+                self.building = True
+
+            timer = stage_timer('retrain')
+            started = time.perf_counter()
+            try:
+                self._build(changes)
+            except Exception as e:
+                self._failed(changes, first_change, last_change, e)
+                continue
+            finally:
+                timer.lap(self.name)
+
+            with self._condition:
+                self.building = False
+                self._building_from = None
+                self.builds += 1
+                self.last_error = None
+                self.last_build_seconds = time.perf_counter() - started
+                self.last_build_at = time.time()
+                self._last_build_end = time.monotonic()
+            logger.info("Rebuilt %s in %.2fs (%d interactions, data version %s)", self.name,
+                        self.last_build_seconds, changes['interactions'], changes['data_version'])
+
+    def _failed(self, changes, first_change, last_change, error):
+        """Put the changes of a failed build back (merged with the ones recorded meanwhile)"""
+        logger.exception("Rebuilding %s failed: %s", self.name, error)
+        with self._condition:
+            self.building = False
+            self._building_from = None
+            self.failures += 1
+            self.last_error = str(error)
+            self._last_build_end = time.monotonic()
+            self._interactions += changes['interactions']
+            if self._data_version is None:
+                self._data_version = changes['data_version']
+            self._first_change = first_change if self._first_change is None else min(first_change, self._first_change)
+            self._last_change = last_change if self._last_change is None else max(last_change, self._last_change)
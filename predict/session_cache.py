@@ -0,0 +1,132 @@
+"""
+Session Cache
+Ranked recommendation lists kept per (model, user, query) session for server-side pagination
+- Scores are computed once per session; only the requested page is selected (np.argpartition)
+  and sorted up front, the rest of the ranking is sorted when a later page needs it
+- Bounded LRU with a TTL (expired or evicted sessions are simply recomputed)
+- Cursors are opaque to clients: URL-safe base64 of the request parameters + next offset
+"""
+
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Sessions kept at once (least recently used dropped first)
+SESSION_CACHE_SIZE = 256
+
+# Seconds a ranked list stays valid after it was computed
+SESSION_TTL_SECONDS = 300
+
+# Page size when the request asks for pagination without a limit, and the largest allowed
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+
+
+def top_order(scores, k):
+    """
+    Indices of the k best scores, best first - the order of a stable descending sort
+    (np.argpartition selects them in O(n), only those k are sorted)
+    """
+    n = len(scores)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    # Ties at the threshold keep their earliest indices, as in the stable sort
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    selected = np.concatenate((above, ties))
+    return selected[np.argsort(-scores[selected], kind='stable')]
+
+
+class RankedList:
+    """
+    Ranking of one session (ids and hybrid scores, best first)
+    first: number of best entries sorted up front (None: all); pages past them sort the whole list once
+    """
+
+    def __init__(self, game_ids, scores, expires_at, first=None):
+        self.game_ids = np.asarray(game_ids)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.expires_at = expires_at
+        self._order = top_order(self.scores, len(self.scores) if first is None else first)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.game_ids)
+
+    def page(self, offset, limit):
+        """[{'game_id', 'hybrid_score'}] for one page"""
+        if offset + limit > len(self._order) and len(self._order) < len(self.scores):
+            with self._lock:
+                if len(self._order) < len(self.scores):
+                    self._order = top_order(self.scores, len(self.scores))
+        order = self._order[offset:offset + limit]
+        game_ids = self.game_ids[order].tolist()
+        scores = self.scores[order].tolist()
+        return [{'game_id': game_id, 'hybrid_score': score} for game_id, score in zip(game_ids, scores)]
+
+
+class RankedListCache:
+    """Bounded, TTL'd LRU of RankedList by session key"""
+
+    def __init__(self, max_entries=SESSION_CACHE_SIZE, ttl=SESSION_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Cached RankedList for the key, or None if missing / expired"""
+        with self._lock:
+            ranked = self._entries.get(key)
+            if ranked is None or ranked.expires_at <= self._clock():
+                if ranked is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return ranked
+
+    def put(self, key, game_ids, scores, first=None):
+        """Store a session's scores and return them as a RankedList (first: see RankedList)"""
+        ranked = RankedList(game_ids, scores, self._clock() + self.ttl, first)
+        with self._lock:
+            self._entries[key] = ranked
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return ranked
+
+    def stats(self):
+        return {'sessions': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def encode_cursor(params):
+    """Opaque cursor for a dict of request parameters"""
+    payload = json.dumps(params, separators=(',', ':'), ensure_ascii=False, sort_keys=True)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Request parameters of a cursor (ValueError if it is not one of ours)"""
+    if not isinstance(cursor, str):
+        raise ValueError("invalid cursor")
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        params = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"invalid cursor: {e}")
+    if not isinstance(params, dict):
+        raise ValueError("invalid cursor")
+    return params
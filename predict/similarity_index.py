@@ -0,0 +1,215 @@
+"""
+Similarity Index
+Top-K content similarity index - replaces the dense N×N cosine similarity matrix
+- Keeps the L2-normalised feature matrix (sparse) instead of N×N similarities
+- Precomputes each item's top-K neighbours in blocked chunks → memory O(N·K)
+- Answers "similar to game X" and "similar to a weighted set of games" queries
+- Exact similarities are always available on demand (row / pair / full matrix for debugging)
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+from sklearn.preprocessing import normalize
+
+
+# Default number of neighbours kept per item
+DEFAULT_TOP_K = 50
+
+# Rows processed per block when computing neighbour lists (memory: block_size × N floats)
+DEFAULT_BLOCK_SIZE = 1024
+
+
+class SimilarityIndex:
+    """Cosine similarity index over a (sparse) feature matrix"""
+
+    def __init__(self, features, top_k=DEFAULT_TOP_K, block_size=DEFAULT_BLOCK_SIZE, exact=False):
+        """
+        Args:
+            features: N × D feature matrix (sparse or dense), one row per item
+            top_k: Number of neighbours to keep for each item
+            block_size: Rows per block when computing neighbour lists
+            exact: Also keep the full dense N×N matrix (debugging only - O(N²) memory)
+        """
+        if not issparse(features):
+            features = csr_matrix(np.asarray(features, dtype=np.float64))
+
+        # L2-normalised rows → cosine similarity = dot product
+        self.features = normalize(features.tocsr().astype(np.float64), norm='l2', axis=1)
+        self.features_t = self.features.T.tocsr()
+        self.n_items = self.features.shape[0]
+        self.top_k = max(0, min(top_k, self.n_items - 1))
+        self.block_size = max(1, block_size)
+
+        self.neighbor_indices = None  # N × K (int32)
+        self.neighbor_scores = None   # N × K (float64)
+        self.exact_matrix = None
+
+        self._build_neighbors()
+        if exact:
+            self.exact_matrix = self.full_matrix()
+
+    def _build_neighbors(self):
+        """Compute per-item top-K neighbour lists in blocks of rows"""
+        n, k = self.n_items, self.top_k
+        self.neighbor_indices = np.zeros((n, k), dtype=np.int32)
+        self.neighbor_scores = np.zeros((n, k), dtype=np.float64)
+        if k == 0:
+            return
+
+        for start in range(0, n, self.block_size):
+            end = min(start + self.block_size, n)
+            block = (self.features[start:end] @ self.features_t).toarray()
+
+            # Exclude self
+            rows = np.arange(end - start)
+            block[rows, rows + start] = -np.inf
+
+            # Top-K per row (argpartition), then order by (-score, index) like a stable sort
+            candidates = np.argpartition(-block, k - 1, axis=1)[:, :k] if k < n else np.tile(np.arange(n), (end - start, 1))
+            candidate_scores = np.take_along_axis(block, candidates, axis=1)
+            order = np.lexsort((candidates, -candidate_scores), axis=1)
+            self.neighbor_indices[start:end] = np.take_along_axis(candidates, order, axis=1)
+            self.neighbor_scores[start:end] = np.take_along_axis(candidate_scores, order, axis=1)
+
+    # ==========================
+    # EXACT QUERIES
+    # ==========================
+
+    def similarity(self, i, j):
+        """Exact cosine similarity between items i and j"""
+        if self.exact_matrix is not None:
+            return self.exact_matrix[i, j]
+        return self.features[i].multiply(self.features[j]).sum()
+
+    def row(self, i):
+        """Exact similarity of item i to every item (length N)"""
+        if self.exact_matrix is not None:
+            return self.exact_matrix[i]
+        return np.asarray((self.features @ self.features[i].T).todense()).ravel()
+
+    def profile_scores(self, weights):
+        """
+        Exact weighted similarity of every item to a set of items
+        weights: length-N vector (0 = not in the set), or N × B matrix (one column per set)
+        Returns Σ_j w_j · sim(·, j) for all items in one sparse product (no N×N matrix)
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        if self.exact_matrix is not None:
+            return self.exact_matrix @ weights
+        return self.features @ (self.features_t @ weights)
+
+    def full_matrix(self):
+        """Exact dense N×N similarity matrix (debugging fallback - O(N²) memory)"""
+        return (self.features @ self.features_t).toarray()
+
+    # ==========================
+    # TOP-N QUERIES
+    # ==========================
+
+    def neighbors(self, i, top_n=None, exclude=None):
+        """
+        Most similar items to item i (excluding i itself)
+
+        Args:
+            i: Item index
+            top_n: Number of results (default: top_k)
+            exclude: Set of item indices to skip
+
+        Returns:
+            List of (index, score) sorted by score descending.
+            Served from the precomputed top-K list; falls back to an exact row scan
+            when top_n exceeds K or exclusions leave too few neighbours.
+        """
+        if top_n is None:
+            top_n = self.top_k
+        exclude = exclude or set()
+
+        results = []
+        for idx, score in zip(self.neighbor_indices[i], self.neighbor_scores[i]):
+            if idx in exclude:
+                continue
+            results.append((int(idx), float(score)))
+            if len(results) >= top_n:
+                return results
+
+        # Neighbour list exhausted (and it covers every other item) → nothing more to find
+        if self.top_k >= self.n_items - 1:
+            return results
+
+        return self._ranked(self.row(i), top_n, exclude | {i})
+
+    def similar_to_set(self, weights, top_n=10, exclude=None):
+        """
+        Items most similar to a weighted set of items (weighted average similarity)
+
+        Args:
+            weights: Dict {index: weight} or length-N weight vector
+            top_n: Number of results
+            exclude: Set of item indices to skip (e.g. the set itself)
+        """
+        if isinstance(weights, dict):
+            vector = np.zeros(self.n_items)
+            for idx, weight in weights.items():
+                vector[idx] += weight
+        else:
+            vector = np.asarray(weights, dtype=np.float64)
+
+        total = vector.sum()
+        if total == 0:
+            return []
+        return self._ranked(self.profile_scores(vector) / total, top_n, exclude or set())
+
+    def _ranked(self, scores, top_n, exclude):
+        """Top-N (index, score) pairs from a dense score vector, skipping excluded indices"""
+        scores = np.array(scores, dtype=np.float64)
+        if exclude:
+            scores[list(exclude)] = -np.inf
+
+        n_valid = int(np.isfinite(scores).sum())
+        top_n = min(top_n, n_valid)
+        if top_n <= 0:
+            return []
+
+        # Everything scoring at least the N-th best (keeps ties), then order by (-score, index)
+        threshold = np.partition(scores, len(scores) - top_n)[len(scores) - top_n]
+        candidates = np.flatnonzero(scores >= threshold)
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(int(idx), float(scores[idx])) for idx in candidates[:top_n]]
+
+    # ==========================
+    # SNAPSHOTS
+    # ==========================
+
+    def to_arrays(self):
+        """(arrays, meta) for a model snapshot - the exact matrix is not saved (rebuilt on load)"""
+        arrays = {
+            'features': self.features,
+            'features_t': self.features_t,
+            'neighbor_indices': self.neighbor_indices,
+            'neighbor_scores': self.neighbor_scores,
+        }
+        meta = {'top_k': self.top_k, 'block_size': self.block_size, 'exact': self.exact_matrix is not None}
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        """Index restored from to_arrays() output (arrays may be read-only memory maps)"""
+        index = cls.__new__(cls)
+        index.features = arrays['features']
+        index.features_t = arrays['features_t']
+        index.n_items = index.features.shape[0]
+        index.top_k = meta['top_k']
+        index.block_size = meta['block_size']
+        index.neighbor_indices = arrays['neighbor_indices']
+        index.neighbor_scores = arrays['neighbor_scores']
+        index.exact_matrix = index.full_matrix() if meta.get('exact') else None
+        return index
+
+    def memory_bytes(self):
+        """Approximate memory held by the index"""
+        total = self.neighbor_indices.nbytes + self.neighbor_scores.nbytes
+        for matrix in (self.features, self.features_t):
+            total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        if self.exact_matrix is not None:
+            total += self.exact_matrix.nbytes
+        return total
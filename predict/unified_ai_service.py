@@ -3,11 +3,28 @@ Unified AI Service
 Combines Recommendation System + Similar Games into one microservice
 - GameRecommendationSystem: Personalized recommendations (needs user data)
 - ContentSimilarityEngine: Similar games (pure content-based, no user data)
+- DataStore: catalog / user state synced by delta (/api/data/*), so requests can send
+  ids + data_version instead of the full games/users payload
+- RankedListCache: full ranking cached per (model, user, query) session → paginated pages are slices
+- Responses: fields= projection, compact ids+scores format, gzip/brotli by Accept-Encoding
+- /metrics: per-stage latency histograms, request sizes and cache counters (Prometheus text)
+- AI_MODEL_SNAPSHOT_DIR: each trained model is snapshotted to disk and reloaded at startup
+  (memory-mapped) → a restarted service serves its first request without rebuilding
+- Data store writes schedule a debounced background model rebuild (retrain_scheduler.py); until it
+  is in, /api/recommend keeps serving the current model (catalog changes → "stale_model": true)
+- Multi-process serving: prefork_server.py (supervisor builds each model once, workers map it)
+- asyncio front end: asgi_service.py (bodies / connections on the event loop, bounded scoring pool)
+- Logging: level-gated "ai.*" loggers (AI_LOG_LEVEL / AI_LOG_LEVELS / AI_LOG_FORMAT), per-request
+  detail at DEBUG, AI_TRACE_SAMPLE_RATE of requests traced in full with their request_id
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
 
 # Import recommendation system (needs user data)
 from game_recommendation_system import GameRecommendationSystem
@@ -15,22 +32,132 @@ from game_recommendation_system import GameRecommendationSystem
 # Import content similarity engine (no user data needed)
 from content_similarity_engine import ContentSimilarityEngine
 
+# Catalog / user state synced by delta
+from data_store import DataStore, DataVersionError
+
+# Ranked lists per session for server-side pagination
+from session_cache import RankedListCache, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Negotiated response compression
+from response_compression import negotiate_encoding, compress, COMPRESSION_MIN_BYTES
+
+# Stage timings / counters exposed on /metrics
+import metrics
+from metrics import stage_timer
+
+# Background model rebuilds after data changes
+from retrain_scheduler import RetrainScheduler
+
+# On-disk model snapshots (restart without rebuilding)
+from model_snapshot import (
+    load_model_snapshot, save_model_snapshot, read_manifest, SnapshotError,
+    data_fingerprint as compute_data_fingerprint
+)
+
+# Level-gated structured logging
+from logging_config import (
+    get_logger, configure_logging, debug_enabled, start_request_trace, end_request_trace
+)
+
+configure_logging()
+logger = get_logger('service')
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
 # Global recommendation system instance
 recommender = None
 
+# Model snapshot directory ('' = disabled): written after every model build, loaded at startup
+MODEL_SNAPSHOT_DIR = os.environ.get('AI_MODEL_SNAPSHOT_DIR', '')
+
+# Background rebuild after data store writes: starts once writes pause for RETRAIN_DEBOUNCE_SECONDS;
+# meanwhile the current model serves /api/recommend for at most RETRAIN_MAX_STALENESS_SECONDS
+RETRAIN_DEBOUNCE_SECONDS = float(os.environ.get('AI_RETRAIN_DEBOUNCE_SECONDS', 1.0))
+RETRAIN_MAX_STALENESS_SECONDS = float(os.environ.get('AI_RETRAIN_MAX_STALENESS_SECONDS', 30.0))
+
+
+class ModelRegistry:
+    """
+    Long-lived holder for the trained GameRecommendationSystem.
+    - The model is keyed by a content fingerprint of the games/users payload
+    - Requests with an unchanged fingerprint reuse the warm model (scoring only)
+    - When the data changes, a new model is built off to the side and swapped in atomically,
+      so concurrent requests keep using the old model until the new one is ready
+    """
+
+    def __init__(self, builder, on_build=None):
+        self._builder = builder
+        self._on_build = on_build     # on_build(fingerprint, model) after each build (snapshots)
+        self._current = (None, None)  # (fingerprint, model) - replaced as a single tuple
+        self._build_lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+
+    @property
+    def fingerprint(self):
+        return self._current[0]
+
+    @property
+    def model(self):
+        return self._current[1]
 
-def initialize_recommender(games, users):
-    """Initialize or update the recommender with new data"""
+    @property
+    def current(self):
+        """(fingerprint, model) being served"""
+        return self._current
+
+    def get(self, games, users, fingerprint=None):
+        """
+        Return a trained model for this payload, building it only if the data changed
+        fingerprint: precomputed data key (data store snapshots) - default: hash of the payload
+        """
+        return self.get_entry(games, users, fingerprint)[1]
+
+    def get_entry(self, games, users, fingerprint=None):
+        """(fingerprint, model) for this payload - the fingerprint identifies the model that was returned"""
+        if fingerprint is None:
+            fingerprint = compute_data_fingerprint(games, users)
+
+        current = self._current
+        if current[0] == fingerprint:
+            self.hits += 1
+            return current
+
+        # Only one build at a time - requests for the same new data wait and then reuse it
+        with self._build_lock:
+            current = self._current
+            if current[0] == fingerprint:
+                self.hits += 1
+                return current
+
+            logger.info("Data changed (fingerprint %s) - building new model...", fingerprint[:12])
+            new_model = self._builder(games, users, current[1])
+            self._current = (fingerprint, new_model)
+            self.builds += 1
+            if self._on_build is not None:
+                self._on_build(fingerprint, new_model)
+            return self._current
+
+    def install(self, fingerprint, model):
+        """Serve an already trained model (loaded from a snapshot) for this fingerprint"""
+        with self._build_lock:
+            self._current = (fingerprint, model)
+
+
+def initialize_recommender(games, users, previous=None):
+    """
+    Initialize or update the recommender with new data
+    previous: the model being replaced (used to warm-start SVD when few users changed)
+    """
     global recommender
+    timer = stage_timer('model_build')
     
     # Create new instance
     recommender = GameRecommendationSystem()
     
     # ⚠️ Clear user preferences cache to ensure fresh calculation
-    recommender.user_preferences = {}
+    recommender.user_preferences.clear()
     
     # Set data directly (skip file loading)
     recommender.games_data = games
@@ -46,7 +173,7 @@ def initialize_recommender(games, users):
     
     # ⭐ Data comes from MySQL via the request body, no need for separate SQLite
     recommender.use_sqlite = False
-    print("✓ Using integrated MySQL data for adaptive boosting")
+    logger.debug("Using integrated MySQL data for adaptive boosting")
     
     # Load CPU/GPU data for spec checking
     try:
@@ -57,19 +184,520 @@ def initialize_recommender(games, users):
     except:
         recommender.cpu_data = {}
         recommender.gpu_data = {}
+    timer.lap('load_reference_data')
     
     # Preprocess and train models
     recommender.preprocess_data()
-    recommender.train_svd_model(k=2)
+    timer.lap('preprocess')
+    recommender.train_svd_model(warm_start=previous)
+    timer.lap('svd')
     recommender.build_content_similarity()
+    timer.lap('content_similarity')
     
     return recommender
 
 
+class ModelSnapshots:
+    """
+    Model snapshots of the service in MODEL_SNAPSHOT_DIR
+    - save_async(): after a build, the new model is written in a background thread
+      (one write at a time, a newer model queued behind it replaces an older pending one)
+    - load(): at startup, the last snapshot becomes the current model; a data store
+      snapshot ("store:<epoch>:<version>") also restores the store at that version,
+      so callers synced before the restart keep their data_version
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._pending = None
+        self.saved = None    # Fingerprint of the last snapshot written
+        self.loaded = None   # Fingerprint of the snapshot loaded at startup
+        self.errors = 0
+
+    def save_async(self, fingerprint, model):
+        if not self.directory:
+            return
+        with self._lock:
+            start = self._pending is None
+            self._pending = (fingerprint, model)
+        if start:
+            threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        drained = False
+        try:
+            while True:
+                with self._lock:
+                    pending = self._pending
+                fingerprint, model = pending
+                timer = stage_timer('model_snapshot')
+                try:
+                    save_model_snapshot(model, self.directory, fingerprint)
+                    timer.lap('save')
+                    self.saved = fingerprint
+                    logger.info("Model snapshot saved to %s (fingerprint %s)", self.directory, fingerprint[:12])
+                except Exception as e:
+                    # Any failure (disk, pickling, ...) only skips this snapshot
+                    self.errors += 1
+                    logger.exception("Model snapshot not saved: %s", e)
+                with self._lock:
+                    if self._pending is pending:
+                        self._pending = None
+                        drained = True
+                        return
+        finally:
+            if not drained:
+                # Thread ending on an unexpected error: the next save_async starts a new one
+                with self._lock:
+                    self._pending = None
+
+    def load(self, registry, store):
+        """Install the snapshot in the registry (and the data store) - False when there is none usable"""
+        if not self.directory:
+            return False
+        timer = stage_timer('model_snapshot')
+        try:
+            model, manifest = load_model_snapshot(self.directory)
+        except FileNotFoundError:
+            return False
+        except SnapshotError as e:
+            self.errors += 1
+            logger.warning("Model snapshot in %s ignored: %s", self.directory, e)
+            return False
+        timer.lap('load')
+
+        fingerprint = manifest['fingerprint']
+        if fingerprint.startswith('store:'):
+            _, epoch, version = fingerprint.split(':')
+            store.restore(epoch, int(version), model.games_data, model.users_data)
+        registry.install(fingerprint, model)
+        self.loaded = self.saved = fingerprint
+        logger.info("Model loaded from snapshot %s (fingerprint %s, %d games, %d users)",
+                    self.directory, fingerprint[:12], manifest['counts']['games'], manifest['counts']['users'])
+        return True
+
+    def info(self):
+        info = {'enabled': bool(self.directory), 'loaded': self.loaded, 'saved': self.saved, 'errors': self.errors}
+        if self.directory:
+            try:
+                manifest = read_manifest(self.directory)
+                info['created_at'] = manifest.get('created_at')
+            except (OSError, ValueError):
+                pass
+        return info
+
+
+model_snapshots = ModelSnapshots(MODEL_SNAPSHOT_DIR)
+
+model_registry = ModelRegistry(initialize_recommender, on_build=model_snapshots.save_async)
+
+data_store = DataStore()
+
+model_snapshots.load(model_registry, data_store)
+
+
+def rebuild_store_model(changes):
+    """Background build of the model for the latest data store snapshot (swapped in by the registry)"""
+    snapshot = data_store.snapshot()
+    if snapshot.games and snapshot.users:
+        model_registry.get_entry(snapshot.games, snapshot.users, snapshot.fingerprint)
+
+
+retrain_scheduler = RetrainScheduler(
+    rebuild_store_model, name='store_model', debounce_seconds=RETRAIN_DEBOUNCE_SECONDS,
+    max_staleness_seconds=RETRAIN_MAX_STALENESS_SECONDS, min_interval_seconds=0.0
+)
+
+session_cache = RankedListCache()
+
+# Catalog versions whose similar-games tables are kept
+SIMILARITY_CATALOGS_KEPT = 2
+
+
+class SimilarityEngineRegistry:
+    """
+    ContentSimilarityEngine per catalog version - each holds the precomputed top-K neighbour table,
+    so /api/similar-games only walks K neighbours (exact row scan only if exclusions empty the list)
+    - Keyed by catalog: data store (epoch, games_version) or a fingerprint of a games payload
+    - warm() builds the table in the background right after a catalog change,
+      so game detail requests find it ready instead of paying the build
+    """
+
+    def __init__(self, max_catalogs=SIMILARITY_CATALOGS_KEPT):
+        self.max_catalogs = max_catalogs
+        self._engines = OrderedDict()
+        self._build_lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+
+    def get(self, key, games):
+        """Engine for a catalog, building its neighbour table only on the first request"""
+        engine = self._engines.get(key)
+        if engine is not None:
+            self.hits += 1
+            return engine
+
+        # One build at a time - requests for the same catalog wait and then reuse it
+        with self._build_lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self.hits += 1
+                return engine
+
+            timer = stage_timer('similarity_build')
+            engine = ContentSimilarityEngine()
+            engine.load_games(games)
+            timer.lap('neighbour_table')
+            self._engines[key] = engine
+            while len(self._engines) > self.max_catalogs:
+                self._engines.popitem(last=False)
+            self.builds += 1
+            return engine
+
+    def warm(self, key, games):
+        """Build a catalog's table in a background thread (no-op if it is already built)"""
+        if key not in self._engines:
+            threading.Thread(target=self.get, args=(key, games), daemon=True).start()
+
+    def stats(self):
+        return {'catalogs': len(self._engines), 'builds': self.builds, 'cache_hits': self.hits}
+
+
+similarity_engines = SimilarityEngineRegistry()
+
+
+def store_catalog_key(snapshot):
+    """Similar-games catalog key of a data store snapshot"""
+    return ('store', snapshot.epoch, snapshot.games_version)
+
+
+def uses_data_store(data):
+    """Store mode: the request sends a data_version (or no games payload) instead of the data"""
+    return 'data_version' in data or 'games' not in data
+
+
+def parse_store_version(data):
+    """
+    (data_epoch, data_version) expected by a store-mode request (data_version 0 when absent)
+    Raises ValueError when data_epoch is not a string or data_version not a non-negative integer
+    """
+    epoch = data.get('data_epoch')
+    if epoch is not None and not isinstance(epoch, str):
+        raise ValueError('data_epoch must be a string')
+    
+    data_version = data.get('data_version')
+    if data_version is None:
+        return epoch, 0
+    if isinstance(data_version, str) and data_version.isdigit():
+        data_version = int(data_version)
+    if isinstance(data_version, bool) or not isinstance(data_version, int) or data_version < 0:
+        raise ValueError('data_version must be a non-negative integer')
+    return epoch, data_version
+
+
+def resolve_store_snapshot(data):
+    """
+    Data store snapshot for a store-mode request
+    Returns (snapshot, None), or (None, error response) when the caller expects data this store does not
+    have or sends an invalid data_epoch / data_version
+    """
+    try:
+        epoch, data_version = parse_store_version(data)
+    except ValueError as e:
+        return None, (jsonify({
+            'success': False,
+            'error': 'INVALID_DATA',
+            'message': str(e)
+        }), 400)
+    
+    snapshot = data_store.snapshot()
+    
+    if (epoch is not None and epoch != snapshot.epoch) or data_version > snapshot.version:
+        return None, (jsonify({
+            'success': False,
+            'error': 'DATA_VERSION_MISMATCH',
+            'message': 'AI service data is behind the caller - resync via /api/data',
+            **data_store.info()
+        }), 409)
+    
+    if not snapshot.games:
+        return None, (jsonify({
+            'success': False,
+            'error': 'DATA_NOT_SYNCED',
+            'message': 'No games synced - push the catalog to /api/data/games first',
+            **data_store.info()
+        }), 409)
+    
+    return snapshot, None
+
+
+def store_model_entry(snapshot, user_id):
+    """
+    (fingerprint, model, data_version, stale) serving a store-mode /api/recommend request
+    The current model of this epoch keeps serving while the scheduler rebuilds in the background
+    (requests never wait for a build):
+    - catalog unchanged since the model was built (only users / interactions moved, e.g. the caller's
+      own user upsert): the requesting user is scored from its record in the snapshot, the other users
+      from the model
+    - catalog moved: the model serves as it is, tagged stale (data_version = the model's version)
+    The model is built here only when none exists for this epoch yet
+    """
+    fingerprint, model = model_registry.current
+    if fingerprint and fingerprint.startswith('store:'):
+        _, epoch, version = fingerprint.split(':')
+        version = int(version)
+        if epoch == snapshot.epoch:
+            if version >= snapshot.version:
+                return fingerprint, model, version, False
+            if not retrain_scheduler.pending:
+                # Change not signalled (e.g. restored store) → make sure a rebuild is coming
+                retrain_scheduler.record_data_change(snapshot.version)
+            if snapshot.games_version > version:
+                return fingerprint, model, version, True
+            record = snapshot.user(user_id)
+            if record is not None and record != model.users_by_id.get(user_id):
+                # Own session key: rankings of the model's older record are not reused
+                fingerprint, model = f"{fingerprint}+{snapshot.version}", model.with_user_record(record)
+            return fingerprint, model, snapshot.version, False
+    
+    fingerprint, model = model_registry.get_entry(snapshot.games, snapshot.users, snapshot.fingerprint)
+    return fingerprint, model, snapshot.version, False
+
+
+def apply_data_change(change):
+    """Run a data store change and build the response (new version counters)"""
+    try:
+        changed = change()
+    except DataVersionError as e:
+        return jsonify({
+            'success': False,
+            'error': 'DATA_VERSION_MISMATCH',
+            'message': str(e),
+            **data_store.info()
+        }), 409
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': 'INVALID_DATA',
+            'message': str(e)
+        }), 400
+    
+    info = data_store.info()
+    if changed:
+        retrain_scheduler.record_data_change(info['version'])
+    return jsonify({
+        'success': True,
+        'changed': changed,
+        **info
+    })
+
+
+# API fields of a recommended game: {field: (game, hybrid item) → value}
+RECOMMENDATION_FIELDS = {
+    'id': lambda game, rec_item: game['id'],
+    'name': lambda game, rec_item: game['name'],
+    'description': lambda game, rec_item: game.get('description', ''),
+    'price': lambda game, rec_item: game.get('price', 0),
+    'rating': lambda game, rec_item: game.get('rating', 0),
+    'image': lambda game, rec_item: game.get('image', ''),
+    'genre': lambda game, rec_item: game.get('genre', []),
+    'platform': lambda game, rec_item: game.get('platform', []),
+    'publisher': lambda game, rec_item: game.get('publisher', ''),
+    'score': lambda game, rec_item: float(rec_item.get('hybrid_score', 0)),
+    'downloads': lambda game, rec_item: game.get('downloads', 0),
+}
+
+# "full": game dicts (optionally projected by fields) | "compact": parallel ids / scores arrays
+RESPONSE_FORMATS = ('full', 'compact')
+
+
+def parse_response_shape(data):
+    """
+    (format, fields) requested by a recommendation request
+    fields: list or comma-separated string of RECOMMENDATION_FIELDS ('id' is always included)
+    Raises ValueError for an unknown format or field
+    """
+    response_format = data.get('format') or 'full'
+    if response_format not in RESPONSE_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(RESPONSE_FORMATS)}")
+    
+    fields = data.get('fields')
+    if not fields:
+        return response_format, None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = [str(field).strip() for field in fields if str(field).strip()]
+    unknown = [field for field in fields if field not in RECOMMENDATION_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return response_format, tuple(dict.fromkeys(['id'] + fields))
+
+
+def format_recommendations(recommender, recommendations, fields=None):
+    """Transform hybrid recommendations to the API game format (fields: projection, default all)"""
+    getters = [(field, RECOMMENDATION_FIELDS[field]) for field in (fields or RECOMMENDATION_FIELDS)]
+    api_recommendations = []
+    for rec_item in recommendations:
+        game = recommender.games_by_id.get(rec_item['game_id'])
+        if game:
+            api_recommendations.append({field: getter(game, rec_item) for field, getter in getters})
+    return api_recommendations
+
+
+def shape_recommendations(recommender, recommendations, response_format='full', fields=None):
+    """Response part for a list of recommendations: {'games': [...]} or compact {'ids', 'scores'}, plus 'total'"""
+    if response_format == 'compact':
+        ids = []
+        scores = []
+        for rec_item in recommendations:
+            game = recommender.games_by_id.get(rec_item['game_id'])
+            if game:
+                ids.append(game['id'])
+                scores.append(float(rec_item.get('hybrid_score', 0)))
+        return {'ids': ids, 'scores': scores, 'total': len(ids)}
+    
+    api_recommendations = format_recommendations(recommender, recommendations, fields)
+    return {'games': api_recommendations, 'total': len(api_recommendations)}
+
+
+REQUEST_SECONDS = metrics.registry.histogram(
+    'ai_request_duration_seconds', 'Request latency by endpoint (parsing to serialised body)', ('endpoint',)
+)
+REQUESTS = metrics.registry.counter('ai_requests_total', 'Requests by endpoint and status', ('endpoint', 'status'))
+REQUEST_BYTES = metrics.registry.histogram(
+    'ai_request_body_bytes', 'Request body size', ('endpoint',), metrics.SIZE_BUCKETS
+)
+RESPONSE_BYTES = metrics.registry.histogram(
+    'ai_response_body_bytes', 'Response body size as sent (after compression)', ('endpoint', 'encoding'),
+    metrics.SIZE_BUCKETS
+)
+
+
+def collect_service_stats():
+    """Cache / store counters the service objects already keep (read at scrape time)"""
+    sessions = session_cache.stats()
+    store = data_store.info()
+    return [
+        ('ai_cache_hits_total', 'counter', 'Cache hits by cache', [
+            ({'cache': 'model'}, model_registry.hits),
+            ({'cache': 'session'}, sessions['hits']),
+            ({'cache': 'similarity'}, similarity_engines.hits),
+        ]),
+        ('ai_cache_misses_total', 'counter', 'Cache misses by cache (model / similarity: builds)', [
+            ({'cache': 'model'}, model_registry.builds),
+            ({'cache': 'session'}, sessions['misses']),
+            ({'cache': 'similarity'}, similarity_engines.builds),
+        ]),
+        ('ai_model_builds_total', 'counter', 'Recommendation models built after a data change', [
+            ({}, model_registry.builds),
+        ]),
+        ('ai_retrain_builds_total', 'counter', 'Background model rebuilds by outcome', [
+            ({'outcome': 'success'}, retrain_scheduler.builds),
+            ({'outcome': 'failure'}, retrain_scheduler.failures),
+        ]),
+        ('ai_model_staleness_seconds', 'gauge', 'Age of the oldest data change the served model does not include', [
+            ({}, retrain_scheduler.staleness()),
+        ]),
+        ('ai_model_snapshot_errors_total', 'counter', 'Model snapshots that failed to save or load', [
+            ({}, model_snapshots.errors),
+        ]),
+        ('ai_sessions', 'gauge', 'Ranked-list sessions cached for pagination', [({}, sessions['sessions'])]),
+        ('ai_data_store_version', 'gauge', 'Data store version', [({}, store['version'])]),
+        ('ai_data_store_records', 'gauge', 'Records held by the data store', [
+            ({'kind': 'games'}, store['games']),
+            ({'kind': 'users'}, store['users']),
+        ]),
+    ]
+
+
+metrics.registry.register_collector(collect_service_stats)
+
+
+@app.before_request
+def begin_request_log():
+    """request_id for the log records of this request (sampled requests log at DEBUG)"""
+    g.request_id, g.request_traced = start_request_trace()
+    if g.request_traced:
+        g.trace_started = time.perf_counter()
+
+
+@app.after_request
+def log_request_trace(response):
+    """X-Request-ID header + one summary record per traced request"""
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers['X-Request-ID'] = request_id
+    if g.get('request_traced'):
+        logger.info("Traced request %s %s → %d", request.method, request.path, response.status_code, extra={'fields': {
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.trace_started) * 1000, 3),
+            'request_bytes': request.content_length or 0,
+        }})
+    return response
+
+
+@app.teardown_request
+def end_request_log(exc):
+    end_request_trace()
+
+
+@app.before_request
+def start_request_timer():
+    if metrics.METRICS_ENABLED:
+        g.request_started = time.perf_counter()
+
+
+# Registered before compress_response → runs after it (Flask runs after_request hooks in reverse)
+@app.after_request
+def record_request_metrics(response):
+    """Latency, status and body sizes of the request"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint)
+    REQUESTS.inc(endpoint, str(response.status_code))
+    if request.content_length:
+        REQUEST_BYTES.observe(request.content_length, endpoint)
+    if not response.direct_passthrough:
+        RESPONSE_BYTES.observe(response.content_length or 0, endpoint, response.headers.get('Content-Encoding', 'identity'))
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    """gzip / brotli JSON responses when the client accepts it (bodies >= COMPRESSION_MIN_BYTES)"""
+    if (response.status_code < 200 or response.status_code >= 300 or response.direct_passthrough
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
 # ==========================
 # API ENDPOINTS
 # ==========================
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition (stage latencies, request sizes, cache counters)"""
+    return Response(metrics.registry.render(), mimetype='text/plain', content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -81,24 +709,118 @@ def health_check():
             'recommendations': 'GameRecommendationSystem (user-based)',
             'similar_games': 'ContentSimilarityEngine (content-based)'
         },
+        'model': {
+            'fingerprint': model_registry.fingerprint,
+            'builds': model_registry.builds,
+            'cache_hits': model_registry.hits,
+            'snapshot': model_snapshots.info(),
+            'retraining': retrain_scheduler.stats()
+        },
+        'data_store': data_store.info(),
+        'sessions': session_cache.stats(),
+        'similar_games': similarity_engines.stats(),
         'features': [
             'personalized_recommendations',
             'keyword_search',
+            'batch_recommendations',
             'similar_games',
-            'adaptive_boosting'
+            'adaptive_boosting',
+            'delta_sync',
+            'pagination',
+            'metrics',
+            'model_snapshots',
+            'background_retraining'
         ]
     })
 
 
+@app.route('/api/data/version', methods=['GET'])
+def get_data_version():
+    """Current data store versions (epoch changes when the service restarts → full resync)"""
+    return jsonify({'success': True, **data_store.info()})
+
+
+@app.route('/api/data/games', methods=['POST', 'DELETE'])
+def sync_games():
+    """
+    Delta sync of the game catalog
+    POST   /api/data/games  Body: {"games": [...], "replace": false, "base_version": 12}
+    DELETE /api/data/games  Body: {"ids": [1, 2], "base_version": 12}
+    base_version (optional): rejected with 409 if the store moved on (caller missed updates)
+    replace=true: the games list becomes the whole catalog (initial / full sync)
+    """
+    data = request.get_json(silent=True) or {}
+    if request.method == 'DELETE':
+        response = apply_data_change(lambda: data_store.delete_games(data.get('ids', []), data.get('base_version')))
+    else:
+        response = apply_data_change(lambda: data_store.upsert_games(
+            data.get('games', []), data.get('replace', False), data.get('base_version')
+        ))
+    
+    # Precompute the similar-games table of the new catalog version in the background
+    snapshot = data_store.snapshot()
+    if snapshot.games:
+        similarity_engines.warm(store_catalog_key(snapshot), snapshot.games)
+    return response
+
+
+@app.route('/api/data/users', methods=['POST', 'DELETE'])
+def sync_users():
+    """
+    Delta sync of users (same body as /api/data/games with "users")
+    POST   /api/data/users  Body: {"users": [...], "replace": false, "base_version": 12}
+    DELETE /api/data/users  Body: {"ids": [1, 2], "base_version": 12}
+    """
+    data = request.get_json(silent=True) or {}
+    if request.method == 'DELETE':
+        return apply_data_change(lambda: data_store.delete_users(data.get('ids', []), data.get('base_version')))
+    return apply_data_change(lambda: data_store.upsert_users(
+        data.get('users', []), data.get('replace', False), data.get('base_version')
+    ))
+
+
+@app.route('/api/data/interactions', methods=['POST'])
+def sync_interactions():
+    """
+    Replace interaction fields of existing users
+    POST /api/data/interactions
+    Body: {
+        "interactions": [
+            {"user_id": 1, "favorite_games": [...], "purchased_games": {...},
+             "view_history": {...}, "interactions": [...]}
+        ],
+        "base_version": 12
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    return apply_data_change(lambda: data_store.patch_interactions(
+        data.get('interactions', []), data.get('base_version')
+    ))
+
+
 @app.route('/api/recommend', methods=['POST'])
 def get_recommendations():
+    """
+    Personalized recommendations
+    POST /api/recommend
+    Body: {
+        "user_id": 1,
+        "games": [...], "users": [...],   # or "data_version": 12 to use the data store
+        "query": "",
+        "days": 7,
+        "enable_adaptive": true,
+        "top_n": 10,                     # whole list in one response, or paginate with:
+        "offset": 0, "limit": 20,        # page of the ranking cached for this (user, query) session
+        "cursor": "...",                 # next_cursor of the previous page (replaces the fields above)
+        "fields": "id,name,score",       # optional projection of the game fields (id always included)
+        "format": "compact"              # optional: "ids" + "scores" arrays instead of "games"
+    }
+    """
 
-    print("\n" + "🟢"*30)
-    print("📨 NEW REQUEST RECEIVED - CODE VERSION 2.0")
-    print("🟢"*30)
-    
+    timer = stage_timer('recommend')
     try:
         data = request.get_json()
+        timer.lap('parse')
         
         if not data:
             return jsonify({
@@ -107,14 +829,45 @@ def get_recommendations():
                 'message': 'Request body is required'
             }), 400
         
+        # Cursor → parameters of the session it continues (user, query, days, adaptive, offset, limit)
+        cursor = data.get('cursor')
+        if cursor:
+            try:
+                data = dict(data, **decode_cursor(cursor))
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': 'INVALID_CURSOR',
+                    'message': str(e)
+                }), 400
+        
         user_id = data.get('user_id')
-        games = data.get('games', [])
-        users = data.get('users', [])
         query = data.get('query', '').strip()  # Keyword search
         recent_days = data.get('days', 7)  # ⏰ Default to 7 days
         enable_adaptive = data.get('enable_adaptive', True)  # Adaptive boost setting (default: True)
         top_n = data.get('top_n', 10)
         
+        # Pagination: offset/limit (or a cursor) instead of top_n
+        paginated = bool(cursor) or 'offset' in data or 'limit' in data
+        try:
+            offset = max(int(data.get('offset') or 0), 0)
+            limit = min(max(int(data.get('limit') or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'INVALID_PAGE',
+                'message': 'offset and limit must be integers'
+            }), 400
+        
+        try:
+            response_format, fields = parse_response_shape(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': 'INVALID_FIELDS',
+                'message': str(e)
+            }), 400
+        
         if not user_id:
             return jsonify({
                 'success': False,
@@ -122,6 +875,18 @@ def get_recommendations():
                 'message': 'user_id is required'
             }), 400
         
+        # Store mode: ids + data_version only (data synced via /api/data/*)
+        snapshot = None
+        if uses_data_store(data):
+            snapshot, error = resolve_store_snapshot(data)
+            if error:
+                return error
+            games, users, fingerprint = snapshot.games, snapshot.users, snapshot.fingerprint
+        else:
+            games = data.get('games', [])
+            users = data.get('users', [])
+            fingerprint = None
+        
         if not games or not users:
             return jsonify({
                 'success': False,
@@ -129,35 +894,44 @@ def get_recommendations():
                 'message': 'games and users data are required'
             }), 400
         
-        print(f"\n{'='*50}")
-        print(f"📨 Recommendation request")
-        print(f"   User ID: {user_id}")
-        print(f"   Games: {len(games)}")
-        print(f"   Users: {len(users)}")
-        print(f"   Keyword: '{query}'" if query else "   Keyword: (none)")
-        print(f"   Recent days: {recent_days}" if recent_days else "   Recent days: (all time)")
-        print(f"   Adaptive Boost: {'ENABLED ⚡' if enable_adaptive else 'DISABLED 🔒'}")
-        print(f"   Top N: {top_n}")
+        if debug_enabled(logger):
+            logger.debug("Recommendation request: user %s, %d games, %d users", user_id, len(games), len(users), extra={'fields': {
+                'user_id': user_id,
+                'keyword': query or None,
+                'recent_days': recent_days,
+                'enable_adaptive': enable_adaptive,
+                'page': {'offset': offset, 'limit': limit} if paginated else None,
+                'top_n': None if paginated else top_n,
+                'data_version': snapshot.version if snapshot else None,
+            }})
         
-        # DEBUG: Check interactions for user
-        target_user = next((u for u in users if u['id'] == user_id), None)
-        if target_user:
-            interactions = target_user.get('interactions', [])
-            print(f"   🔍 User {user_id} Interactions (Last 7 days): {len(interactions)}")
-            if interactions:
-                print(f"      sample: {interactions[0]}")
+        # Reuse the warm model while the data is unchanged (rebuild only on data change)
+        if snapshot:
+            fingerprint, rec, data_version, stale_model = store_model_entry(snapshot, user_id)
         else:
-            print(f"   ⚠️ User {user_id} not found in user list!")
-            
-        print(f"{'='*50}\n")
+            fingerprint, rec = model_registry.get_entry(games, users, fingerprint)
+        timer.lap('model')
         
-        # Initialize recommender with data (FRESH INSTANCE mỗi request)
-        rec = initialize_recommender(games, users)
+        # DEBUG: Check interactions for user
+        target_user = rec.users_by_id.get(user_id)
+        if target_user is None:
+            logger.debug("User %s not found in user list!", user_id)
+        elif debug_enabled(logger):
+            interactions = target_user.get('interactions', [])
+            logger.debug("User %s interactions: %d (sample: %s)", user_id, len(interactions), interactions[0] if interactions else None)
         
-        print(f"\n🔧 CALLING get_hybrid_recommendations:")
-        print(f"   user_id={user_id}")
-        print(f"   enable_adaptive={enable_adaptive} (type: {type(enable_adaptive).__name__})")
-        print(f"   keyword='{query}'")
+        if paginated:
+            response = get_recommendation_page(
+                rec, fingerprint, user_id, query, recent_days, enable_adaptive, offset, limit,
+                response_format, fields
+            )
+            timer.lap('page')
+            if snapshot:
+                response['data_version'] = data_version
+                response['stale_model'] = stale_model
+            response = jsonify(response)
+            timer.lap('serialize')
+            return response
         
         # Get hybrid recommendations with keyword support and adaptive setting
         recommendations = rec.get_hybrid_recommendations(
@@ -167,60 +941,213 @@ def get_recommendations():
             enable_adaptive=enable_adaptive,  # Use setting from request
             recent_days=recent_days
         )
+        timer.lap('rank')
         
-        print(f"\n📦 RECOMMENDATION RESULTS:")
-        print(f"   Total: {len(recommendations)} games")
-        if recommendations:
-            print(f"   Top 3 games: {[r['game_name'] for r in recommendations[:3]]}")
-            print(f"   Top 3 scores: {[round(r.get('hybrid_score', 0), 4) for r in recommendations[:3]]}")
-            print(f"   Top 3 boost factors: {[round(r.get('boost_factor', 1.0), 2) for r in recommendations[:3]]}")
-            
+        if recommendations and debug_enabled(logger):
             # Check if boost worked
             has_boost = any(r.get('boost_factor', 1.0) != 1.0 for r in recommendations)
-            if enable_adaptive and not has_boost:
-                print(f"\n   ⚠️  WARNING: enable_adaptive=True but all boost_factors = 1.0!")
-                print(f"   → Adaptive boosting DID NOT WORK")
-            elif enable_adaptive and has_boost:
-                print(f"\n   ✅ Adaptive boosting WORKED! Boost factors vary")
-            else:
-                print(f"\n   ℹ️  Adaptive boosting disabled (expected)")
+            logger.debug("Recommendation results: %d games, top 3: %s", len(recommendations),
+                         [r['game_name'] for r in recommendations[:3]], extra={'fields': {
+                'top_scores': [round(r.get('hybrid_score', 0), 4) for r in recommendations[:3]],
+                'top_boost_factors': [round(r.get('boost_factor', 1.0), 2) for r in recommendations[:3]],
+                'adaptive_boost': ('applied' if has_boost else 'no effect') if enable_adaptive else 'disabled',
+            }})
         
         # Transform to API format
-        api_recommendations = []
-        for rec_item in recommendations:
-            game = next((g for g in games if g['id'] == rec_item['game_id']), None)
-            if game:
-                api_recommendations.append({
-                    'id': game['id'],
-                    'name': game['name'],
-                    'description': game.get('description', ''),
-                    'price': game.get('price', 0),
-                    'rating': game.get('rating', 0),
-                    'image': game.get('image', ''),
-                    'genre': game.get('genre', []),
-                    'platform': game.get('platform', []),
-                    'publisher': game.get('publisher', ''),
-                    'score': float(rec_item.get('hybrid_score', 0)),
-                    'downloads': game.get('downloads', 0)
-                })
-        
-        print(f"✅ Generated {len(api_recommendations)} recommendations")
-        if query:
+        shaped = shape_recommendations(rec, recommendations, response_format, fields)
+        timer.lap('shape')
+        
+        if query and debug_enabled(logger):
             matching_count = sum(1 for r in recommendations if r.get('keyword_score', 0) > 0)
-            print(f"   {matching_count} games match keyword '{query}'")
+            logger.debug("Generated %d recommendations, %d match keyword '%s'", shaped['total'], matching_count, query)
         
-        return jsonify({
+        response = {
             'success': True,
-            'games': api_recommendations,
-            'total': len(api_recommendations),
+            **shaped,
             'message': 'Recommendations generated successfully',
             'keyword': query if query else None
+        }
+        if snapshot:
+            response['data_version'] = data_version
+            response['stale_model'] = stale_model
+        response = jsonify(response)
+        timer.lap('serialize')
+        return response
+        
+    except Exception as e:
+        logger.exception("Error in get_recommendations: %s", e)
+        
+        return jsonify({
+            'success': False,
+            'error': 'RECOMMENDATION_ERROR',
+            'message': str(e)
+        }), 500
+
+
+def get_recommendation_page(rec, fingerprint, user_id, query, recent_days, enable_adaptive, offset, limit,
+                            response_format='full', fields=None):
+    """
+    One page of a user's ranked recommendations
+    Scores are computed on the first request of a session and cached (RankedListCache); only the best
+    offset + limit games are selected and sorted then (the rest when a later page needs them),
+    and only the requested page is shaped and serialised
+    """
+    session_key = (fingerprint, user_id, query, recent_days, bool(enable_adaptive))
+    ranked = session_cache.get(session_key)
+    if ranked is None:
+        game_ids, scores = rec.get_hybrid_scores(
+            user_id=user_id,
+            keyword=query,
+            enable_adaptive=enable_adaptive,
+            recent_days=recent_days
+        )
+        ranked = session_cache.put(session_key, game_ids, scores, first=offset + limit)
+        logger.debug("Ranked %d games for session (user %s, keyword '%s')", len(ranked), user_id, query)
+    
+    shaped = shape_recommendations(rec, ranked.page(offset, limit), response_format, fields)
+    
+    next_cursor = None
+    if offset + limit < len(ranked):
+        next_cursor = encode_cursor({
+            'user_id': user_id,
+            'query': query,
+            'days': recent_days,
+            'enable_adaptive': enable_adaptive,
+            'offset': offset + limit,
+            'limit': limit
         })
+    
+    logger.debug("Page offset=%d limit=%d: %d of %d games", offset, limit, shaped['total'], len(ranked))
+    
+    return {
+        'success': True,
+        **shaped,
+        'total_ranked': len(ranked),
+        'offset': offset,
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'message': 'Recommendations generated successfully',
+        'keyword': query if query else None
+    }
+
+
+@app.route('/api/recommend/batch', methods=['POST'])
+def get_batch_recommendations():
+    """
+    Recommendations for many users in one pass (nightly jobs, email/push campaigns)
+    POST /api/recommend/batch
+    Body: {
+        "user_ids": [1, 2, 3],          # optional - default: every user in "users"
+        "games": [...],                 # or "data_version": 12 to use the data store
+        "users": [...],
+        "query": "",                    # keyword for every user
+        "queries": {"2": "horror"},     # optional per-user keyword (by user id)
+        "days": 7,
+        "enable_adaptive": true,
+        "top_n": 10,
+        "fields": "id,score"            # optional projection / "format": "compact" (as /api/recommend)
+    }
+    """
+    timer = stage_timer('batch_recommend')
+    try:
+        data = request.get_json()
+        timer.lap('parse')
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'NO_DATA',
+                'message': 'Request body is required'
+            }), 400
+        
+        snapshot = None
+        if uses_data_store(data):
+            snapshot, error = resolve_store_snapshot(data)
+            if error:
+                return error
+            games, users, fingerprint = snapshot.games, snapshot.users, snapshot.fingerprint
+        else:
+            games = data.get('games', [])
+            users = data.get('users', [])
+            fingerprint = None
+        
+        user_ids = data.get('user_ids') or [user['id'] for user in users]
+        query = data.get('query', '').strip()
+        queries = data.get('queries', {})
+        recent_days = data.get('days', 7)
+        enable_adaptive = data.get('enable_adaptive', True)
+        top_n = data.get('top_n', 10)
+        
+        if not games or not users:
+            return jsonify({
+                'success': False,
+                'error': 'INVALID_DATA',
+                'message': 'games and users data are required'
+            }), 400
+        
+        if not isinstance(user_ids, list):
+            return jsonify({
+                'success': False,
+                'error': 'INVALID_USER_IDS',
+                'message': 'user_ids must be a list'
+            }), 400
+        
+        try:
+            response_format, fields = parse_response_shape(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': 'INVALID_FIELDS',
+                'message': str(e)
+            }), 400
+        
+        logger.debug("Batch recommendation request: %d users, %d games", len(user_ids), len(games))
+        
+        rec = model_registry.get(games, users, fingerprint)
+        timer.lap('model')
+        
+        # JSON object keys are strings → match per-user queries by str(user_id)
+        keywords = {
+            user_id: str(queries[str(user_id)]).strip()
+            for user_id in user_ids if str(user_id) in queries
+        }
+        
+        recommendations = rec.get_batch_recommendations(
+            user_ids,
+            top_n=top_n,
+            keyword=query,
+            enable_adaptive=enable_adaptive,
+            recent_days=recent_days,
+            keywords=keywords
+        )
+        timer.lap('rank')
+        
+        results = []
+        for user_id in dict.fromkeys(user_ids):
+            results.append({
+                'user_id': user_id,
+                'found': user_id in rec.users_by_id,
+                **shape_recommendations(rec, recommendations[user_id], response_format, fields),
+                'keyword': keywords.get(user_id, query) or None
+            })
+        timer.lap('shape')
+        
+        logger.debug("Generated batch recommendations for %d users", len(results))
+        
+        response = {
+            'success': True,
+            'results': results,
+            'total_users': len(results),
+            'message': 'Batch recommendations generated successfully'
+        }
+        if snapshot:
+            response['data_version'] = snapshot.version
+        response = jsonify(response)
+        timer.lap('serialize')
+        return response
         
     except Exception as e:
-        print(f"❌ Error in get_recommendations: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_batch_recommendations: %s", e)
         
         return jsonify({
             'success': False,
@@ -236,13 +1163,15 @@ def get_similar_games():
     POST /api/similar-games
     Body: {
         "game_id": 1,
-        "games": [...],
+        "games": [...],                 # or "data_version": 12 to use the data store
         "top_n": 8,
         "exclude_purchased": [1, 2, 3]
     }
     """
+    timer = stage_timer('similar_games')
     try:
         data = request.get_json()
+        timer.lap('parse')
         
         if not data:
             return jsonify({
@@ -252,7 +1181,6 @@ def get_similar_games():
             }), 400
         
         game_id = data.get('game_id')
-        games = data.get('games', [])
         top_n = data.get('top_n', 8)
         exclude_purchased = set(data.get('exclude_purchased', []))
         
@@ -263,6 +1191,16 @@ def get_similar_games():
                 'message': 'game_id is required'
             }), 400
         
+        # Store mode: catalog synced via /api/data/games
+        snapshot = None
+        if uses_data_store(data):
+            snapshot, error = resolve_store_snapshot(data)
+            if error:
+                return error
+            games = snapshot.games
+        else:
+            games = data.get('games', [])
+        
         if not games:
             return jsonify({
                 'success': False,
@@ -270,16 +1208,20 @@ def get_similar_games():
                 'message': 'games data is required'
             }), 400
         
-        print(f"\n{'='*50}")
-        print(f"🎮 Similar games request")
-        print(f"   Game ID: {game_id}")
-        print(f"   Total games: {len(games)}")
-        print(f"   Top N: {top_n}")
-        print(f"   Exclude purchased: {len(exclude_purchased)} games")
-        print(f"{'='*50}\n")
+        logger.debug("Similar games request: game %s, %d games, top %s, excluding %d purchased",
+                     game_id, len(games), top_n, len(exclude_purchased))
+        
+        # Use ContentSimilarityEngine (no user data needed!)
+        # This is pure content-based similarity - neighbour table precomputed once per catalog version
+        if snapshot:
+            catalog_key = store_catalog_key(snapshot)
+        else:
+            catalog_key = ('payload', compute_data_fingerprint(games, []))
+        engine = similarity_engines.get(catalog_key, games)
+        timer.lap('table')
         
         # Find current game
-        current_game = next((g for g in games if g['id'] == game_id), None)
+        current_game = engine.get_game(game_id)
         if not current_game:
             return jsonify({
                 'success': False,
@@ -287,17 +1229,13 @@ def get_similar_games():
                 'message': f'Game {game_id} not found'
             }), 404
         
-        # Use ContentSimilarityEngine (no user data needed!)
-        # This is pure content-based similarity
-        engine = ContentSimilarityEngine()
-        engine.load_games(games)
-        
         # Get similar games with exclusions
         similar_games_list = engine.get_similar_games(
             game_id=game_id,
             top_n=top_n,
             exclude_ids=list(exclude_purchased)
         )
+        timer.lap('query')
         
         # Format response (already formatted by engine)
         similar_games = []
@@ -319,24 +1257,28 @@ def get_similar_games():
                 'similarity_score': item['similarity_score'],
                 'multiplayer': game.get('multiplayer', False)
             })
+        timer.lap('shape')
         
-        print(f"✅ Found {len(similar_games)} similar games for '{current_game['name']}'")
-        for i, sg in enumerate(similar_games[:3], 1):
-            print(f"   {i}. {sg['name']} (similarity: {sg['similarity_score']:.3f})")
+        if debug_enabled(logger):
+            logger.debug("Found %d similar games for '%s', top 3: %s", len(similar_games), current_game['name'],
+                         [(sg['name'], round(sg['similarity_score'], 3)) for sg in similar_games[:3]])
         
-        return jsonify({
+        response = {
             'success': True,
             'game_id': game_id,
             'game_name': current_game['name'],
             'similar_games': similar_games,
             'total': len(similar_games),
             'message': 'Similar games found successfully'
-        })
+        }
+        if snapshot:
+            response['data_version'] = snapshot.version
+        response = jsonify(response)
+        timer.lap('serialize')
+        return response
         
     except Exception as e:
-        print(f"❌ Error in get_similar_games: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_similar_games: %s", e)
         
         return jsonify({
             'success': False,
@@ -346,21 +1288,20 @@ def get_similar_games():
 
 
 if __name__ == '__main__':
-    print("\n" + "="*60)
-    print("🚀 Starting Unified AI Service v4.0")
-    print("="*60)
-    print("📡 Endpoints:")
-    print("   GET  /health - Health check")
-    print("   POST /api/recommend - Personalized recommendations")
-    print("   POST /api/similar-games - Content-based similar games")
-    print("="*60)
-    print("🧠 AI Engines:")
-    print("   • GameRecommendationSystem (with user data)")
-    print("     → SVD + Content + Demographic + Keyword Search")
-    print("   • ContentSimilarityEngine (no user data)")
-    print("     → Pure content-based similarity")
-    print("="*60)
-    print("🌐 Service running on http://localhost:5000")
-    print("="*60 + "\n")
+    logger.info(
+        "Starting Unified AI Service v4.0 on http://localhost:5000\n"
+        "Endpoints:\n"
+        "   GET  /health - Health check\n"
+        "   GET  /metrics - Prometheus metrics\n"
+        "   POST /api/recommend - Personalized recommendations\n"
+        "   POST /api/recommend/batch - Batch recommendations for many users\n"
+        "   POST /api/similar-games - Content-based similar games\n"
+        "   GET  /api/data/version - Data store versions\n"
+        "   POST/DELETE /api/data/games | /api/data/users - Delta sync\n"
+        "   POST /api/data/interactions - User interaction updates\n"
+        "AI Engines:\n"
+        "   GameRecommendationSystem (with user data): SVD + Content + Demographic + Keyword Search\n"
+        "   ContentSimilarityEngine (no user data): pure content-based similarity"
+    )
     
     app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)